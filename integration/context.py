@@ -1,3 +1,5 @@
+import time
+
 from invoke import Context, Config
 from invocations import ci as ci_mod
 
@@ -17,3 +19,29 @@ class Context_:
             # Safety 2: make sure we ARE them (and not eg root already)
             assert c.run("whoami", hide=True).stdout.strip() == user
             assert c.sudo("whoami", hide=True).stdout.strip() == "root"
+
+    class session:
+        def runs_commands_in_one_shell(self) -> None:
+            c = Context()
+            with c.session():
+                first = c.run("echo $$", hide=True).stdout
+                second = c.run("echo $$", hide=True).stdout
+            assert first == second
+
+        def prefixes_only_run_once(self) -> None:
+            c = Context()
+            with c.prefix("sleep 0.1"):
+                with c.session():
+                    start = time.time()
+                    for _ in range(10):
+                        c.run("true")
+                    elapsed = time.time() - start
+            assert elapsed < 0.5
+
+        def output_is_still_mirrored(self, capsys) -> None:
+            c = Context()
+            with c.session():
+                c.run("echo hi; echo oops >&2", in_stream=False)
+            out, err = capsys.readouterr()
+            assert out == "hi\n"
+            assert err == "oops\n"
@@ -0,0 +1,42 @@
+import time
+
+from invoke import Collection, Executor, ParallelExecutor, Task, call
+
+
+def _noop(c, *args):
+    pass
+
+
+class Executor_:
+    class large_graphs:
+        # Some 10k calls before deduping: 3333 parameterized builds sharing
+        # a couple of pre-tasks, as generated collections tend to have.
+        def setup_method(self):
+            setup = Task(_noop, name="setup")
+            lint = Task(_noop, name="lint", pre=[setup])
+            build = Task(_noop, name="build", pre=[setup, lint])
+            builds = [call(build, n) for n in range(3333)]
+            release = Task(_noop, name="release", pre=builds)
+            self.collection = Collection(release, build, lint, setup)
+
+        def expand_and_dedupe_quickly(self):
+            executor = Executor(self.collection)
+            calls = executor.normalize(("release",))
+            start = time.time()
+            expanded = executor.expand_calls(calls)
+            deduped = executor.dedupe(expanded)
+            elapsed = time.time() - start
+            assert len(expanded) == 13333
+            assert len(deduped) == 3336
+            print("Expanded & deduped in {:.2f}s".format(elapsed))
+            assert elapsed < 1
+
+        def graph_quickly(self):
+            executor = ParallelExecutor(self.collection)
+            calls = executor.normalize(("release",))
+            start = time.time()
+            nodes = executor.graph(calls)
+            elapsed = time.time() - start
+            assert len(nodes) == 3336
+            print("Graphed in {:.2f}s".format(elapsed))
+            assert elapsed < 1
@@ -1,21 +1,32 @@
+import asyncio
+import io
 import os
 import platform
+import threading
 import time
-from unittest.mock import Mock
+from typing import Any, List, Optional
+from unittest.mock import Mock, patch
 
 from _util import assert_cpu_usage
 from pytest import raises, skip
 
 from invoke import (
+    FIRST_EXCEPTION,
+    AsyncLocal,
+    AuthFailure,
     CommandTimedOut,
     Context,
     FailingResponder,
     Failure,
     Local,
     Responder,
+    Result,
     ThreadException,
+    UnexpectedExit,
     WatcherError,
+    as_completed,
     run,
+    wait,
 )
 
 PYPY = platform.python_implementation() == "PyPy"
@@ -95,6 +106,16 @@ class Runner_:
             # Re: #425 - IOError occurs when bug present
             run("inv -c nested_or_piped foo < /dev/null", hide=True)
 
+        def large_files_are_forwarded_intact(self, tmp_path) -> None:
+            path = tmp_path / "big.txt"
+            data = "".join("line {}\n".format(x) for x in range(200000))
+            path.write_text(data)
+            with open(path) as in_stream:
+                with patch("invoke.runners.time.sleep") as sleep:
+                    result = run("cat", in_stream=in_stream, hide=True)
+            assert result.stdout == data
+            assert not sleep.called
+
     class IO_hangs:
         "IO hangs"
 
@@ -144,3 +165,379 @@ class Runner_:
             assert info.value.timeout == 0.5  # type:ignore[attr-defined]
             cmd = info.value.result.command  # type:ignore[attr-defined]
             assert cmd == "sleep 5"
+
+    class waiting:
+        def does_not_sleep_poll_where_pidfd_is_available(self) -> None:
+            if not hasattr(os, "pidfd_open"):
+                skip()
+            with patch("invoke.runners.time.sleep") as sleep:
+                assert run("sleep 0.2", in_stream=False, hide=True)
+            assert not sleep.called
+
+        def falls_back_to_polling_without_pidfd(self) -> None:
+            runner = Local(Context())
+            runner._open_pidfd = Mock(  # type: ignore[method-assign]
+                return_value=None
+            )
+            with patch("invoke.runners.time.sleep", wraps=time.sleep) as sleep:
+                assert runner.run("sleep 0.2", in_stream=False, hide=True)
+            assert sleep.called
+
+        def as_completed_yields_promises_in_order_of_exit(self) -> None:
+            c = Context()
+            promises = [
+                c.run(f"sleep {x}", asynchronous=True, in_stream=False)
+                for x in ("0.6", "0.2", "0.4")
+            ]
+            start = time.time()
+            first = next(as_completed(promises, timeout=5))
+            assert first.command == "sleep 0.2"
+            assert time.time() - start < 0.5
+            order = [x.join().command for x in as_completed(promises)]
+            assert order == ["sleep 0.2", "sleep 0.4", "sleep 0.6"]
+
+        def wait_notices_failures_without_pidfd(self) -> None:
+            promises = []
+            for command in ("sleep 0.1 && false", "sleep 2"):
+                runner = Local(Context())
+                runner._open_pidfd = Mock(  # type: ignore[method-assign]
+                    return_value=None
+                )
+                promises.append(
+                    runner.run(command, asynchronous=True, in_stream=False)
+                )
+            done, not_done = wait(
+                promises, timeout=5, return_when=FIRST_EXCEPTION
+            )
+            assert done == {promises[0]}
+            with raises(UnexpectedExit):
+                promises[0].join()
+            assert promises[1].join().ok
+
+        def futures_can_be_awaited_from_asyncio(self) -> None:
+            c = Context()
+
+            async def main() -> List[Result]:
+                futures = [
+                    c.run(cmd, asynchronous="future", in_stream=False)
+                    for cmd in ("sleep 0.2 && echo slow", "echo fast")
+                ]
+                return await asyncio.gather(
+                    *(asyncio.wrap_future(x) for x in futures)
+                )
+
+            slow, fast = asyncio.run(main())
+            assert slow.stdout == "slow\n"
+            assert fast.stdout == "fast\n"
+
+    class argv:
+        def arguments_reach_the_program_verbatim(self) -> None:
+            args = ["printf", "%s|", "two words", "$HOME", "*"]
+            result = run(args, hide=True, in_stream=False)
+            assert result.stdout == "two words|$HOME|*|"
+            assert result.command == "printf '%s|' 'two words' '$HOME' '*'"
+
+        def uses_posix_spawn_where_available(self) -> None:
+            if not hasattr(os, "posix_spawn"):
+                skip()
+            with patch("os.posix_spawn", wraps=os.posix_spawn) as spawn:
+                assert run(["true"], hide=True, in_stream=False)
+            assert spawn.called
+
+        def honors_cd_via_cwd(self, tmp_path: Any) -> None:
+            c = Context()
+            with c.cd(str(tmp_path)):
+                result = c.run(["pwd"], hide=True, in_stream=False)
+                assert result.stdout.strip() == str(tmp_path)
+                result = c.run(["pwd"], pty=True, hide=True, in_stream=False)
+                assert result.stdout.strip() == str(tmp_path)
+
+        def missing_programs_raise_FileNotFoundError(self) -> None:
+            with raises(FileNotFoundError):
+                run(["definitely-not-a-real-program"], in_stream=False)
+
+        def work_with_arun(self) -> None:
+            c = Context()
+            result = asyncio.run(c.arun(["echo", "$HOME"], hide=True))
+            assert result.stdout == "$HOME\n"
+
+    class spawn_backend:
+        def forkserver_runs_commands_out_of_process(self) -> None:
+            with patch("invoke.runners.Popen") as Popen:
+                result = run(
+                    "echo out; echo err >&2; exit 3",
+                    spawn_backend="forkserver",
+                    hide=True,
+                    warn=True,
+                    in_stream=False,
+                )
+            assert not Popen.called
+            assert result.stdout == "out\n"
+            assert result.stderr == "err\n"
+            assert result.exited == 3
+
+        def forkserver_handles_stdin_argv_and_cwd(self, tmp_path: Any) -> None:
+            result = run(
+                ["cat"],
+                spawn_backend="forkserver",
+                hide=True,
+                in_stream=io.StringIO("hello"),
+            )
+            assert result.stdout == "hello"
+            result = run(
+                "pwd",
+                spawn_backend="forkserver",
+                hide=True,
+                cwd=str(tmp_path),
+                in_stream=False,
+            )
+            assert result.stdout.strip() == str(tmp_path)
+
+        def forkserver_missing_programs_raise_FileNotFoundError(
+            self,
+        ) -> None:
+            with raises(FileNotFoundError):
+                run(["not-a-real-program"], spawn_backend="forkserver")
+
+        def forkserver_works_with_timeouts_and_promises(self) -> None:
+            with raises(CommandTimedOut):
+                run(
+                    "sleep 5",
+                    spawn_backend="forkserver",
+                    timeout=0.2,
+                    in_stream=False,
+                )
+            promises = [
+                run(
+                    "sleep 0.2; echo {}".format(x),
+                    spawn_backend="forkserver",
+                    asynchronous=True,
+                    hide=True,
+                    in_stream=False,
+                )
+                for x in range(3)
+            ]
+            done, _ = wait(promises, timeout=5)
+            assert {x.join().stdout for x in done} == {"0\n", "1\n", "2\n"}
+
+    class resources:
+        # A CPU-bound loop, which also allocates ~50MB.
+        _command = (
+            "python -c 'x = bytearray(50 * 1024 * 1024); sum(range(10**6))'"
+        )
+
+        def are_collected_for_subprocesses(self) -> None:
+            resources = run(self._command, in_stream=False).resources
+            assert resources.wall_time > 0
+            assert resources.cpu_time > 0
+            assert resources.max_rss > 50 * 1024 * 1024
+
+        def are_collected_via_the_forkserver(self) -> None:
+            resources = run(
+                self._command, spawn_backend="forkserver", in_stream=False
+            ).resources
+            assert resources.cpu_time > 0
+            assert resources.max_rss > 50 * 1024 * 1024
+
+        def are_available_on_UnexpectedExit(self) -> None:
+            with raises(UnexpectedExit) as info:
+                run(self._command + "; exit 1", hide=True, in_stream=False)
+            assert info.value.resources.max_rss > 50 * 1024 * 1024
+
+    class capture:
+        def tail_bounds_memory_for_large_output(self) -> None:
+            result = run(
+                "seq 1 200000", hide=True, capture="tail", capture_limit=1024
+            )
+            assert len(result.stdout_bytes) == 1024
+            assert result.stdout.endswith("199999\n200000\n")
+
+        def spill_round_trips_large_output(self) -> None:
+            expected = "".join("{}\n".format(x) for x in range(1, 200001))
+            result = run(
+                "seq 1 200000", hide=True, capture="spill", capture_limit=4096
+            )
+            assert result.raw("stdout").read() == expected.encode()
+            assert result.stdout == expected
+
+        def uncaptured_output_goes_straight_to_real_files(
+            self, tmp_path
+        ) -> None:
+            path = tmp_path / "out.txt"
+            with open(path, "w") as out:
+                result = run(
+                    "seq 1 200000", capture=False, out_stream=out, pty=False
+                )
+            assert result.captured is False
+            assert result.stdout == ""
+            expected = "".join("{}\n".format(x) for x in range(1, 200001))
+            assert path.read_text() == expected
+
+    class read_chunk_sizing:
+        def _reads_for(self, megabytes: int, **kwargs) -> int:
+            class Counting(Local):
+                reads = 0
+
+                def read_proc_stdout(self, num_bytes: int) -> bytes:
+                    type(self).reads += 1
+                    return super().read_proc_stdout(num_bytes)
+
+            cmd = "head -c {}M /dev/zero".format(megabytes)
+            result = Counting(Context()).run(cmd, hide=True, **kwargs)
+            assert len(result.stdout_bytes) == megabytes * 1024 * 1024
+            return Counting.reads
+
+        def large_output_needs_far_fewer_reads(self) -> None:
+            fixed = self._reads_for(10, read_chunk_max=Local.read_chunk_size)
+            assert fixed > 10000
+            assert self._reads_for(10) < fixed / 10
+
+        def works_with_reactor_io_backend(self) -> None:
+            reads = self._reads_for(10, io_backend="reactor")
+            assert reads < 1000
+
+    class reactor_io_backend:
+        def captures_both_streams(self) -> None:
+            result = run(
+                "echo out; echo err >&2; exit 2",
+                io_backend="reactor",
+                hide=True,
+                warn=True,
+            )
+            assert result.stdout == "out\n"
+            assert result.stderr == "err\n"
+            assert result.exited == 2
+
+        def works_with_pty(self) -> None:
+            result = run("echo hi", io_backend="reactor", pty=True, hide=True)
+            assert result.stdout.strip() == "hi"
+
+        def many_async_commands_do_not_add_threads(self) -> None:
+            before = threading.active_count()
+            promises = [
+                run(
+                    "echo {}; sleep 0.2".format(i),
+                    io_backend="reactor",
+                    asynchronous=True,
+                )
+                for i in range(100)
+            ]
+            # At most, the shared reactor thread itself may have appeared.
+            assert threading.active_count() <= before + 1
+            results = [x.join() for x in promises]
+            assert [x.stdout for x in results] == [
+                "{}\n".format(i) for i in range(100)
+            ]
+
+        def handle_exceptions_become_ThreadExceptions(self) -> None:
+            class Whoops(Exception):
+                pass
+
+            runner = Local(Context())
+            runner._handle_output_chunk = Mock(  # type: ignore[method-assign]
+                side_effect=Whoops
+            )
+            with raises(ThreadException) as info:
+                runner.run("seq 1 100000", io_backend="reactor")
+            assert info.value.exceptions[0].type is Whoops
+
+    class async_local:
+        def _arun(self, command: str, **kwargs: Any) -> Result:
+            return asyncio.run(Context().arun(command, **kwargs))
+
+        def captures_both_streams(self) -> None:
+            result = self._arun(
+                "echo out; echo err >&2; exit 2", hide=True, warn=True
+            )
+            assert result.stdout == "out\n"
+            assert result.stderr == "err\n"
+            assert result.exited == 2
+
+        def raises_UnexpectedExit(self) -> None:
+            with raises(UnexpectedExit) as info:
+                self._arun("echo boom >&2; exit 1", hide=True)
+            assert info.value.result.exited == 1
+            assert "boom" in str(info.value)
+
+        def enforces_timeouts(self) -> None:
+            start = time.time()
+            with raises(CommandTimedOut):
+                self._arun("sleep 5", hide=True, timeout=0.5)
+            assert time.time() - start < 3
+
+        def drives_watchers(self) -> None:
+            watcher = Responder(r"What's the password\?", "Rosebud\n")
+            result = self._arun(
+                'printf "What\'s the password? "; read x; echo $x',
+                watchers=[watcher],
+                hide=True,
+                timeout=5,
+            )
+            assert result.stdout.endswith("Rosebud\n")
+
+        def forwards_explicit_in_stream(self) -> None:
+            result = self._arun(
+                "cat", in_stream=io.StringIO("hi there\n"), hide=True
+            )
+            assert result.stdout == "hi there\n"
+
+        def stdin_errors_become_ThreadExceptions(self) -> None:
+            class Whoops(Exception):
+                pass
+
+            class Exploding(io.StringIO):
+                def read(self, size: Optional[int] = -1) -> str:
+                    raise Whoops
+
+            with raises(ThreadException) as info:
+                self._arun("cat", in_stream=Exploding(), hide=True)
+            assert info.value.exceptions[0].type is Whoops
+
+        def sudo_password_failures_become_AuthFailure(self, tmp_path) -> None:
+            # A stand-in sudo which rejects any password, forever.
+            fake = tmp_path / "sudo"
+            fake.write_text(
+                "#!/bin/sh\n"
+                "while true; do\n"
+                "  printf '[sudo] password: '; read x\n"
+                "  echo 'Sorry, try again.'\n"
+                "done\n"
+            )
+            fake.chmod(0o755)
+            path = "{}:{}".format(tmp_path, os.environ["PATH"])
+            with raises(AuthFailure):
+                asyncio.run(
+                    Context().asudo(
+                        "whoami", env={"PATH": path}, hide=True, timeout=5
+                    )
+                )
+
+        def many_commands_share_one_thread(self) -> None:
+            async def many() -> List[Result]:
+                c = Context()
+                commands = ["echo {}; sleep 0.5".format(i) for i in range(200)]
+                return await asyncio.gather(
+                    *[c.arun(x, hide=True) for x in commands]
+                )
+
+            before = threading.active_count()
+            start = time.time()
+            results = asyncio.run(many())
+            assert time.time() - start < 10
+            assert threading.active_count() <= before
+            assert [x.stdout for x in results] == [
+                "{}\n".format(i) for i in range(200)
+            ]
+
+        def cancelling_kills_the_subprocess(self) -> None:
+            async def cancel() -> Optional[int]:
+                runner = AsyncLocal(Context())
+                task = asyncio.ensure_future(runner.arun("sleep 10"))
+                await asyncio.sleep(0.5)
+                task.cancel()
+                with raises(asyncio.CancelledError):
+                    await task
+                await runner.process.wait()
+                return runner.process.returncode
+
+            assert asyncio.run(cancel()) == -9
@@ -1,12 +1,14 @@
 from importlib import metadata
 from typing import Any
 
+from .capture import NullBuffer, SpillBuffer, TailBuffer  # noqa
 from .collection import Collection  # noqa
 from .config import Config  # noqa
 from .context import Context, MockContext  # noqa
 from .exceptions import (  # noqa
     AmbiguousEnvVar,
     AuthFailure,
+    BatchFailure,
     CollectionNotFound,
     CommandTimedOut,
     Exit,
@@ -21,14 +23,35 @@ from .exceptions import (  # noqa
     UnpicklableConfigMember,
     WatcherError,
 )
-from .executor import Executor  # noqa
+from .executor import Executor, ParallelExecutor  # noqa
 from .loader import FilesystemLoader  # noqa
 from .parser import Argument, Parser, ParserContext, ParseResult  # noqa
+from .pool import PooledLocal, ShellPool  # noqa
 from .program import Program  # noqa
-from .runners import Failure, Local, Promise, Result, Runner  # noqa
+from .runners import (  # noqa
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    AsyncLocal,
+    Failure,
+    Local,
+    Promise,
+    Resources,
+    Result,
+    Runner,
+    as_completed,
+    wait,
+)
+from .session import SessionRunner, ShellSession  # noqa
+from .sinks import CoalescingWriter  # noqa
 from .tasks import Call, Task, call, task  # noqa
 from .terminals import pty_size  # noqa
-from .watchers import FailingResponder, Responder, StreamWatcher  # noqa
+from .watchers import (  # noqa
+    FailingResponder,
+    Responder,
+    StreamWatcher,
+    StreamWindow,
+)
 
 __version__ = metadata.version("invoke")
 
@@ -0,0 +1,310 @@
+"""
+Persistent caching of task return values, across ``invoke`` invocations.
+
+Tasks opting in via ``@task(cache=...)`` have their return values stored in a
+`TaskCache`, keyed by the task's identity and arguments (see `cache_key`).
+Later executions of the same call - including ones in other processes - are
+handed the stored value instead of running the task again.
+
+Two stores are provided: `DirectoryCache`, keeping one file per entry, and
+`SqliteCache`, keeping them all in one SQLite database. The ``tasks.cache``
+config tree selects between them (or a `TaskCache` subclass of your own) and
+sets their limits; see :ref:`caching-task-results`.
+
+.. warning::
+    Values are stored using `pickle`, so anybody able to write to the cache
+    is able to run code in the processes reading it - treat it like your
+    tasks file. Values which can't be pickled aren't cached.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+from .util import debug
+
+# Besides corrupt data, results may refer to code which has since changed.
+_UNPICKLING_ERRORS = (
+    OSError,
+    EOFError,
+    pickle.UnpicklingError,
+    AttributeError,
+    ImportError,
+)
+
+if TYPE_CHECKING:
+    from .context import Context
+    from .tasks import Call
+
+
+def cache_key(call: "Call", context: "Context") -> str:
+    """
+    Return the key under which ``call``'s result is cached.
+
+    Made up of the task's module and name, the call's arguments and - when
+    the task's ``cache`` is a function - that function's return value, given
+    the same ``context`` and arguments as the task itself. (E.g. a task
+    resolving dependency versions might return a lockfile's contents, to be
+    re-run whenever it changes.)
+
+    .. versionadded:: 3.1
+    """
+    task = call.task
+    extra = None
+    if callable(task.cache):
+        extra = task.cache(context, *call.args, **call.kwargs)
+    identity = "{}.{}".format(task.__module__, task.name)
+    kwargs = sorted(call.kwargs.items())
+    material = repr((identity, call.args, kwargs, extra))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TaskCache:
+    """
+    Base class for stores of cached task results.
+
+    Subclasses must implement `get`, `set` and `evict`, and may set
+    `default_path`. They're instantiated with the values of the
+    ``tasks.cache`` config settings of the same names.
+
+    .. versionadded:: 3.1
+    """
+
+    #: Where to store the cache when no ``path`` was configured, relative to
+    #: the tasks file's directory.
+    default_path = ".invoke-cache"
+
+    def __init__(
+        self,
+        path: str,
+        max_age: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        """
+        :param str path: Where to store cached results.
+
+        :param max_age:
+            How many seconds results are kept for; ``None`` means forever.
+
+        :param max_size:
+            How many bytes of (pickled) results to keep, at most; ``None``
+            means no limit. The oldest results are evicted first.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+
+    def get(self, key: str) -> Any:
+        """
+        Return the result cached under ``key``.
+
+        :raises KeyError: if there's none, or it's older than ``max_age``.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Cache ``value`` under ``key``, then `evict` as needed.
+
+        Values which can't be pickled are skipped.
+        """
+        raise NotImplementedError
+
+    def evict(self) -> None:
+        """
+        Remove results which are too old, or exceed ``max_size``.
+        """
+        raise NotImplementedError
+
+    def _dumps(self, key: str, value: Any) -> Optional[bytes]:
+        try:
+            return pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            debug("Not caching result for {}: {}".format(key, e))
+            return None
+
+    def _expired(self, timestamp: float) -> bool:
+        return self.max_age is not None and timestamp < (
+            time.time() - self.max_age
+        )
+
+    def _over_size(self, entries: List[Tuple[str, float, int]]) -> List[str]:
+        # Given (name, timestamp, size) entries, return those to drop -
+        # oldest first - to fit within max_size.
+        if self.max_size is None:
+            return []
+        total = sum(size for _, _, size in entries)
+        drop = []
+        for name, _, size in sorted(entries, key=lambda x: x[1]):
+            if total <= self.max_size:
+                break
+            drop.append(name)
+            total -= size
+        return drop
+
+
+class DirectoryCache(TaskCache):
+    """
+    A `TaskCache` keeping each result in a file of its own, in a directory.
+
+    Files' modification times serve as their results' ages.
+
+    .. versionadded:: 3.1
+    """
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + ".pickle")
+
+    def get(self, key: str) -> Any:
+        path = self._file(key)
+        try:
+            if self._expired(os.stat(path).st_mtime):
+                raise KeyError(key)
+            with open(path, "rb") as fd:
+                return pickle.load(fd)
+        except _UNPICKLING_ERRORS:
+            raise KeyError(key)
+
+    def set(self, key: str, value: Any) -> None:
+        data = self._dumps(key, value)
+        if data is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(key)
+        temporary = "{}.{}.{}.tmp".format(
+            path, os.getpid(), threading.get_ident()
+        )
+        with open(temporary, "wb") as fd:
+            fd.write(data)
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        try:
+            files = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return
+        for entry in files:
+            if not entry.name.endswith(".pickle"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self._expired(stat.st_mtime):
+                self._remove(entry.path)
+            else:
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        for path in self._over_size(entries):
+            self._remove(path)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Somebody else evicted it first
+            pass
+
+
+class SqliteCache(TaskCache):
+    """
+    A `TaskCache` keeping results in a SQLite database file.
+
+    .. versionadded:: 3.1
+    """
+
+    default_path = ".invoke-cache.sqlite3"
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # NOTE: a connection per operation, as they can't be shared between
+        # threads.
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        return connection
+
+    def get(self, key: str) -> Any:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or self._expired(row[1]):
+            raise KeyError(key)
+        try:
+            return pickle.loads(row[0])
+        except _UNPICKLING_ERRORS:
+            raise KeyError(key)
+
+    def set(self, key: str, value: Any) -> None:
+        data = self._dumps(key, value)
+        if data is None:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, data, time.time()),
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            if self.max_age is not None:
+                connection.execute(
+                    "DELETE FROM results WHERE created < ?",
+                    (time.time() - self.max_age,),
+                )
+            if self.max_size is not None:
+                entries = connection.execute(
+                    "SELECT key, created, length(value) FROM results"
+                ).fetchall()
+                for key in self._over_size(entries):
+                    connection.execute(
+                        "DELETE FROM results WHERE key = ?", (key,)
+                    )
+
+
+#: Names usable as the ``tasks.cache.backend`` setting.
+BACKENDS: Dict[str, Type[TaskCache]] = {
+    "directory": DirectoryCache,
+    "sqlite": SqliteCache,
+}
+
+
+def get_task_cache(settings: Any, root: str) -> Optional[TaskCache]:
+    """
+    Return the `TaskCache` described by ``settings``, or ``None``.
+
+    :param settings:
+        The ``tasks.cache`` config tree. Its ``backend`` is a key of
+        `BACKENDS` or a dotted path to a `TaskCache` subclass; ``None`` is
+        returned when ``enabled`` is false.
+
+    :param str root: The directory a relative ``path`` is relative to.
+
+    .. versionadded:: 3.1
+    """
+    if not settings.enabled:
+        return None
+    backend = settings.backend
+    klass = BACKENDS.get(backend)
+    if klass is None:
+        module_path, _, class_name = backend.rpartition(".")
+        klass = getattr(import_module(module_path), class_name)
+    path = settings.path or klass.default_path
+    return klass(
+        os.path.join(root, path),
+        max_age=settings.max_age,
+        max_size=settings.max_size,
+    )
@@ -0,0 +1,126 @@
+"""
+Bounded-memory alternatives to capturing subprocess output in a `bytearray`.
+
+By default, `.Runner` keeps every byte a subprocess writes to its stdout and
+stderr in memory, for the life of the command, so it can be handed to the
+final `.Result`. For commands with very large output (database dumps, verbose
+builds, etc) that may not be acceptable; the classes here, selected via the
+``capture`` and ``capture_limit`` options of `.Runner.run`, cap how much
+memory is used instead.
+"""
+
+import mmap
+import tempfile
+from typing import IO, Optional, Union
+
+
+class TailBuffer(bytearray):
+    """
+    A capture buffer which only retains the last ``limit`` bytes written.
+
+    Older data is discarded as new data arrives, making this a ring buffer
+    in effect; it is sufficient for `.Result.tail` (and thus `.UnexpectedExit`
+    error messages) to keep working, while using bounded memory.
+
+    Used when ``run(capture="tail")``.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        #: Maximum number of bytes retained.
+        self.limit = limit
+        #: Total number of bytes thrown away so far.
+        self.discarded = 0
+
+    def extend(self, data: bytes) -> None:  # type: ignore[override]
+        super().extend(data)
+        excess = len(self) - self.limit
+        if excess > 0:
+            # NOTE: CPython makes deleting from the front of a bytearray
+            # cheap (it just moves the start offset), so this doesn't copy
+            # the retained data around on every call.
+            del self[:excess]
+            self.discarded += excess
+
+
+class SpillBuffer:
+    """
+    A capture buffer which moves its data to a temporary file once it grows
+    beyond ``limit`` bytes.
+
+    Until then, data is kept in memory exactly as with a regular `bytearray`.
+    Once spilled, all data lives on disk and `finish` yields a read-only
+    `mmap.mmap` of it - so the operating system, rather than the Python heap,
+    decides how much of it is resident at any one time.
+
+    Used when ``run(capture="spill")``.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self, limit: int) -> None:
+        #: Number of bytes kept in memory before spilling to disk.
+        self.limit = limit
+        #: The temporary file holding our data, once we've spilled.
+        self.file: Optional[IO[bytes]] = None
+        self._memory = bytearray()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Whether data has been moved out of memory and into `file`.
+        """
+        return self.file is not None
+
+    def extend(self, data: bytes) -> None:
+        self._size += len(data)
+        if self.file is not None:
+            self.file.write(data)
+            return
+        self._memory.extend(data)
+        if len(self._memory) > self.limit:
+            self.file = tempfile.TemporaryFile(prefix="invoke-")
+            self.file.write(self._memory)
+            self._memory = bytearray()
+
+    def finish(self) -> Union[bytearray, mmap.mmap]:
+        """
+        Return the captured data, for handing to a `.Result`.
+
+        This is the in-memory `bytearray` if we never spilled, or a read-only
+        `mmap.mmap` of our temporary file otherwise. (The file itself is
+        closed - and, being temporary, removed - at this point; the mapping
+        remains valid until it is garbage collected.)
+        """
+        if self.file is None:
+            return self._memory
+        self.file.flush()
+        data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file.close()
+        return data
+
+
+class NullBuffer:
+    """
+    A capture buffer which discards everything written to it.
+
+    Used when ``run(capture=False)``.
+
+    .. versionadded:: 3.1
+    """
+
+    def __len__(self) -> int:
+        return 0
+
+    def extend(self, data: bytes) -> None:
+        pass
+
+
+#: Any of the objects `.Runner` may capture subprocess output into.
+CaptureBuffer = Union[bytearray, SpillBuffer, NullBuffer]
@@ -10,7 +10,7 @@ from typing import Any, Dict, Iterator, Optional, Tuple, Type, Union
 
 from .env import Environment
 from .exceptions import UnknownFileType, UnpicklableConfigMember
-from .runners import Local
+from .runners import AsyncLocal, Local
 from .terminals import WINDOWS
 from .util import debug, yaml
 
@@ -464,6 +464,12 @@ class Config(DataProxy):
             # - doing it at env var load time seems a bit silly given the
             # existing support for at-startup testing for INVOKE_DEBUG
             # 'debug': False,
+            # Settings for invoke.pool.PooledLocal's shared ShellPool.
+            "pool": {
+                "dispatch": "least_busy",
+                "max_commands": 1000,
+                "size": 4,
+            },
             # TODO: I feel like we want these to be more consistent re: default
             # values stored here vs 'stored' as logic where they are
             # referenced, there are probably some bits that are all "if None ->
@@ -471,6 +477,9 @@ class Config(DataProxy):
             # default to None?
             "run": {
                 "asynchronous": False,
+                "capture": True,
+                "capture_limit": 1048576,
+                "cwd": None,
                 "disown": False,
                 "dry": False,
                 "echo": False,
@@ -481,18 +490,22 @@ class Config(DataProxy):
                 "fallback": True,
                 "hide": None,
                 "in_stream": None,
+                "io_backend": "threads",
                 "out_stream": None,
                 "echo_format": "\033[1;37m{command}\033[0m",
                 "pty": False,
+                "read_chunk_max": 1048576,
+                "read_chunk_min": None,
                 "replace_env": False,
                 "shell": shell,
+                "spawn_backend": "direct",
                 "warn": False,
                 "watchers": [],
             },
             # This doesn't live inside the 'run' tree; otherwise it'd make it
             # somewhat harder to extend/override in Fabric 2 which has a split
             # local/remote runner situation.
-            "runners": {"local": Local},
+            "runners": {"async_local": AsyncLocal, "local": Local},
             "sudo": {
                 "password": None,
                 "prompt": "[sudo] password: ",
@@ -500,10 +513,19 @@ class Config(DataProxy):
             },
             "tasks": {
                 "auto_dash_names": True,
+                "cache": {
+                    "backend": "directory",
+                    "enabled": True,
+                    "max_age": None,
+                    "max_size": None,
+                    "path": None,
+                },
                 "collection_name": "tasks",
                 "dedupe": True,
                 "executor_class": None,
+                "fingerprint_file": ".invoke-fingerprints.json",
                 "ignore_unknown_help": False,
+                "max_workers": None,
                 "search_root": None,
             },
             "timeouts": {"command": None},
@@ -1,11 +1,20 @@
 import os
 import re
+import shlex
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
 from contextlib import contextmanager
 from itertools import cycle
 from os import PathLike
 from typing import (
     Any,
+    Dict,
     Generator,
+    Iterable,
     Iterator,
     List,
     Optional,
@@ -14,8 +23,14 @@ from typing import (
 from unittest.mock import Mock
 
 from .config import Config, DataProxy
-from .exceptions import AuthFailure, Failure, ResponseNotAccepted
-from .runners import Result, Runner
+from .exceptions import (
+    AuthFailure,
+    BatchFailure,
+    Failure,
+    ResponseNotAccepted,
+)
+from .runners import AsyncLocal, Result, Runner
+from .session import ShellSession
 from .watchers import FailingResponder
 
 
@@ -77,6 +92,7 @@ class Context(DataProxy):
             command_prefixes=[],
             command_cwds=[],
             remainder=remainder,
+            _session=None,
         )
 
     @property
@@ -105,7 +121,7 @@ class Context(DataProxy):
         # runtime.
         self._set(_config=value)
 
-    def run(self, command: str, **kwargs: Any) -> Result:
+    def run(self, command: Union[str, List[str]], **kwargs: Any) -> Result:
         """
         Execute a local shell command, honoring config options.
 
@@ -117,17 +133,144 @@ class Context(DataProxy):
         arguments.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Commands run within any active `session`, where possible.
         """
+        session = self._session
+        if session is not None and session.can_run(kwargs):
+            return session.run(command, **kwargs)
         runner = self.config.runners.local(self)
         return self._run(runner, command, **kwargs)
 
     # NOTE: broken out of run() to allow for runner class injection in
     # Fabric/etc, which needs to juggle multiple runner class types (local and
     # remote).
-    def _run(self, runner: "Runner", command: str, **kwargs: Any) -> Result:
-        command = self._prefix_commands(command)
+    def _run(
+        self, runner: "Runner", command: Union[str, List[str]], **kwargs: Any
+    ) -> Result:
+        command = self._prepare_command(command, kwargs)
         return runner.run(command, **kwargs)
 
+    async def arun(
+        self, command: Union[str, List[str]], **kwargs: Any
+    ) -> Result:
+        """
+        Execute a local shell command from within an `asyncio` event loop.
+
+        The coroutine counterpart to `run`: it instantiates the runner class
+        named by the ``runners.async_local`` config option (default:
+        `.AsyncLocal`) and awaits its ``arun`` method, which blocks neither
+        the event loop nor any other thread while ``command`` runs.
+
+        All `run` config options and keyword arguments are honored, with the
+        exceptions noted in `.AsyncLocal`'s docstring.
+
+        .. versionadded:: 3.1
+        """
+        runner = self.config.runners.async_local(self)
+        return await self._arun(runner, command, **kwargs)
+
+    # NOTE: this is for runner injection; see NOTE above _run().
+    async def _arun(
+        self,
+        runner: "AsyncLocal",
+        command: Union[str, List[str]],
+        **kwargs: Any,
+    ) -> Result:
+        command = self._prepare_command(command, kwargs)
+        return await runner.arun(command, **kwargs)
+
+    def run_many(
+        self,
+        commands: Iterable[str],
+        max_parallel: Optional[int] = None,
+        fail_fast: bool = False,
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> List[Result]:
+        """
+        Execute many independent shell commands, several at a time.
+
+        Each command is executed via `run` - so all of its config options
+        and keyword arguments (``kwargs``) apply, as do `cd` and `prefix` -
+        with up to ``max_parallel`` of them in flight at once.
+
+        .. note::
+            Unless an ``in_stream`` is given (or configured), commands run
+            this way do not read from our own stdin. The same ``watchers``
+            are handed to every command, so they must not be stateful.
+
+        :param commands: An iterable of command strings.
+
+        :param int max_parallel:
+            Maximum number of commands to execute at once. Default: the number
+            of CPUs on this system.
+
+        :param bool fail_fast:
+            Whether to stop starting new commands once one has failed.
+            Commands already running are always allowed to finish. Default:
+            ``False``.
+
+        :param bool ordered:
+            Whether to return results in the same order as ``commands``
+            (the default) or in the order in which the commands finished.
+
+        :returns:
+            A list of `.Result` objects, one per command.
+
+        :raises:
+            `.BatchFailure`, if any command failed (in the sense of `run`
+            raising a `.Failure`, so ``warn=True`` applies as usual). It holds
+            the `.Result` of every command which ran, and each `.Failure`.
+
+        .. versionadded:: 3.1
+        """
+        commands = list(commands)
+        # Many commands all reading our own stdin at once would be a mess.
+        if kwargs.get("in_stream") is None:
+            if self.config.run.in_stream is None:
+                kwargs["in_stream"] = False
+        queue = iter(enumerate(commands))
+        results: Dict[int, Result] = {}
+        failures = []
+        workers = max_parallel or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Only hand the pool as many commands as it can run right away,
+            # so nothing's left queued up when fail_fast says to stop.
+            running: Dict[Future, int] = {}
+            stopping = False
+            while True:
+                while not stopping and len(running) < workers:
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    future = pool.submit(self.run, item[1], **kwargs)
+                    running[future] = item[0]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Failure as failure:
+                        results[index] = failure.result
+                        failures.append(failure)
+                        stopping = fail_fast
+        if not ordered:
+            # NOTE: dicts keep insertion (here: completion) order.
+            finished = list(results.values())
+        else:
+            finished = [results[x] for x in sorted(results)]
+        if failures:
+            skipped = [
+                command
+                for index, command in enumerate(commands)
+                if index not in results
+            ]
+            raise BatchFailure(finished, failures, skipped)
+        return finished
+
     def sudo(self, command: str, **kwargs: Any) -> Result:
         """
         Execute a shell command via ``sudo`` with password auto-response.
@@ -202,6 +345,37 @@ class Context(DataProxy):
 
     # NOTE: this is for runner injection; see NOTE above _run().
     def _sudo(self, runner: "Runner", command: str, **kwargs: Any) -> Result:
+        cmd_str = self._sudo_command(command, kwargs)
+        try:
+            return runner.run(cmd_str, **kwargs)
+        except Failure as failure:
+            raise self._sudo_failure(failure)
+
+    async def asudo(self, command: str, **kwargs: Any) -> Result:
+        """
+        Execute a shell command via ``sudo`` from within an `asyncio` loop.
+
+        This is to `sudo` what `arun` is to `run`: identical behavior and
+        options, but a coroutine using the ``runners.async_local`` runner.
+
+        .. versionadded:: 3.1
+        """
+        runner = self.config.runners.async_local(self)
+        return await self._asudo(runner, command, **kwargs)
+
+    # NOTE: this is for runner injection; see NOTE above _run().
+    async def _asudo(
+        self, runner: "AsyncLocal", command: str, **kwargs: Any
+    ) -> Result:
+        cmd_str = self._sudo_command(command, kwargs)
+        try:
+            return await runner.arun(cmd_str, **kwargs)
+        except Failure as failure:
+            raise self._sudo_failure(failure)
+
+    def _sudo_command(self, command: str, kwargs: Dict[str, Any]) -> str:
+        # Build the full sudo command string for _sudo/_asudo, consuming
+        # sudo-specific kwargs & adding our password responder to 'watchers'.
         prompt = self.config.sudo.prompt
         password = kwargs.pop("password", self.config.sudo.password)
         user = kwargs.pop("user", self.config.sudo.user)
@@ -242,23 +416,23 @@ class Context(DataProxy):
         # want to clone it to avoid actually mutating the config.
         watchers = kwargs.pop("watchers", list(self.config.run.watchers))
         watchers.append(watcher)
-        try:
-            return runner.run(cmd_str, watchers=watchers, **kwargs)
-        except Failure as failure:
-            # Transmute failures driven by our FailingResponder, into auth
-            # failures - the command never even ran.
-            # TODO: wants to be a hook here for users that desire "override a
-            # bad config value for sudo.password" manual input
-            # NOTE: as noted in #294 comments, we MAY in future want to update
-            # this so run() is given ability to raise AuthFailure on its own.
-            # For now that has been judged unnecessary complexity.
-            if isinstance(failure.reason, ResponseNotAccepted):
-                # NOTE: not bothering with 'reason' here, it's pointless.
-                error = AuthFailure(result=failure.result, prompt=prompt)
-                raise error
-            # Reraise for any other error so it bubbles up normally.
-            else:
-                raise
+        kwargs["watchers"] = watchers
+        return cmd_str
+
+    def _sudo_failure(self, failure: Failure) -> Failure:
+        # Transmute failures driven by our FailingResponder, into auth
+        # failures - the command never even ran.
+        # TODO: wants to be a hook here for users that desire "override a
+        # bad config value for sudo.password" manual input
+        # NOTE: as noted in #294 comments, we MAY in future want to update
+        # this so run() is given ability to raise AuthFailure on its own.
+        # For now that has been judged unnecessary complexity.
+        if isinstance(failure.reason, ResponseNotAccepted):
+            # NOTE: not bothering with 'reason' here, it's pointless.
+            prompt = self.config.sudo.prompt
+            return AuthFailure(result=failure.result, prompt=prompt)
+        # Reraise for any other error so it bubbles up normally.
+        return failure
 
     # TODO: wonder if it makes sense to move this part of things inside Runner,
     # which would grow a `prefixes` and `cwd` init kwargs or similar. The less
@@ -277,6 +451,59 @@ class Context(DataProxy):
 
         return " && ".join(prefixes + [command])
 
+    def _prepare_command(
+        self, command: Union[str, List[str]], kwargs: Dict[str, Any]
+    ) -> Union[str, List[str]]:
+        """
+        Apply `cd` and `prefix` to ``command``, ready for `run` and friends.
+
+        Argument vectors bypass the shell, so `cd` becomes a ``cwd`` kwarg
+        for them instead. Prefixes, which only a shell can make sense of,
+        send them back to running the equivalent command string via a shell.
+        """
+        if not isinstance(command, (list, tuple)):
+            return self._prefix_commands(command)
+        if self.command_prefixes:
+            return self._prefix_commands(shlex.join(command))
+        if self.command_cwds:
+            path = os.path.join(*self._cwd_parts())
+            kwargs.setdefault("cwd", os.path.expanduser(path))
+        return command
+
+    @contextmanager
+    def session(self) -> Generator[ShellSession, None, None]:
+        """
+        Run nested `run` calls through a single, persistent shell.
+
+        Each `run` usually starts a new shell, which re-runs all `prefix`
+        commands before getting to the command at hand. Within a `session`,
+        one `.ShellSession` shell - having run the current prefixes (and
+        `cd`) just once - executes command after command in subshells of
+        itself, which is much faster for many short commands::
+
+            with c.prefix("workon myvenv"):
+                with c.session():
+                    for path in paths:
+                        c.run("test -f {}".format(path), warn=True)
+
+        Results, options and failures are as usual, with the exceptions noted
+        in `.ShellSession`'s docs: notably, commands with ``pty``,
+        ``asynchronous`` or ``disown`` set still run outside the session.
+        `sudo` does not use sessions either.
+
+        Yields the `.ShellSession`, whose shell exits when the block does.
+
+        .. versionadded:: 3.1
+        """
+        session = ShellSession(self)
+        previous = self._session
+        self._set(_session=session)
+        try:
+            yield session
+        finally:
+            self._set(_session=previous)
+            session.close()
+
     @contextmanager
     def prefix(self, command: str) -> Generator[None, None, None]:
         """
@@ -325,6 +552,11 @@ class Context(DataProxy):
 
         Contrived, but hopefully illustrative.
 
+        .. note::
+            Prefixes only mean anything to a shell, so commands given to `run`
+            as argument vectors (lists) fall back to being executed via one
+            when prefixed, as their `shlex.join`-ed equivalent.
+
         .. versionadded:: 1.0
         """
         self.command_prefixes.append(command)
@@ -346,15 +578,17 @@ class Context(DataProxy):
             # `cd` typically being shorthand for "go to user's $HOME".
             return ""
 
+        # TODO: see if there's a stronger "escape this path" function somewhere
+        # we can reuse. e.g., escaping tildes or slashes in filenames.
+        paths = [path.replace(" ", r"\ ") for path in self._cwd_parts()]
+        return str(os.path.join(*paths))
+
+    def _cwd_parts(self) -> List[str]:
         # get the index for the subset of paths starting with the last / or ~
         for i, path in reversed(list(enumerate(self.command_cwds))):
             if path.startswith("~") or path.startswith("/"):
                 break
-
-        # TODO: see if there's a stronger "escape this path" function somewhere
-        # we can reuse. e.g., escaping tildes or slashes in filenames.
-        paths = [path.replace(" ", r"\ ") for path in self.command_cwds[i:]]
-        return str(os.path.join(*paths))
+        return self.command_cwds[i:]
 
     @contextmanager
     def cd(self, path: Union[PathLike, str]) -> Generator[None, None, None]:
@@ -396,6 +630,11 @@ class Context(DataProxy):
             Space characters will be escaped automatically to make dealing with
             such directory names easier.
 
+        .. note::
+            Commands given to `run` as argument vectors (lists) are executed
+            without a shell, so instead of a ``cd`` prefix they receive the
+            resulting directory as their ``cwd`` option.
+
         .. versionadded:: 1.0
         .. versionchanged:: 1.5
             Explicitly cast the ``path`` argument (the only argument) to a
@@ -532,7 +771,13 @@ class MockContext(Context):
     # worth. Maybe in situations where Context grows a _lot_ of methods (e.g.
     # in Fabric 2; though Fabric could do its own sub-subclass in that case...)
 
-    def _yield_result(self, attname: str, command: str) -> Result:
+    def _yield_result(
+        self, attname: str, command: Union[str, List[str]]
+    ) -> Result:
+        # Argument vectors are looked up (and recorded) the same way runners
+        # display them.
+        if isinstance(command, (list, tuple)):
+            command = shlex.join(command)
         try:
             obj = getattr(self, attname)
             # Dicts need to try direct lookup or regex matching
@@ -562,13 +807,24 @@ class MockContext(Context):
             # raise_from(NotImplementedError(command), None)
             raise NotImplementedError(command)
 
-    def run(self, command: str, *args: Any, **kwargs: Any) -> Result:
+    def run(
+        self, command: Union[str, List[str]], *args: Any, **kwargs: Any
+    ) -> Result:
         # TODO: perform more convenience stuff associating args/kwargs with the
         # result? E.g. filling in .command, etc? Possibly useful for debugging
         # if one hits unexpected-order problems with what they passed in to
         # __init__.
         return self._yield_result("__run", command)
 
+    async def arun(
+        self, command: Union[str, List[str]], *args: Any, **kwargs: Any
+    ) -> Result:
+        # NOTE: results are given via the 'arun' kwarg, same as for 'run'.
+        return self._yield_result("__arun", command)
+
+    async def asudo(self, command: str, *args: Any, **kwargs: Any) -> Result:
+        return self._yield_result("__asudo", command)
+
     def sudo(self, command: str, *args: Any, **kwargs: Any) -> Result:
         # TODO: this completely nukes the top-level behavior of sudo(), which
         # could be good or bad, depending. Most of the time I think it's good.
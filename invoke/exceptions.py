@@ -12,7 +12,7 @@ from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from .parser import ParserContext
-    from .runners import Result
+    from .runners import Resources, Result
     from .util import ExceptionWrapper
 
 
@@ -53,6 +53,15 @@ class Failure(Exception):
         self.result = result
         self.reason = reason
 
+    @property
+    def resources(self) -> Optional["Resources"]:
+        """
+        Shorthand for ``result.resources``: what the failed command used.
+
+        .. versionadded:: 3.1
+        """
+        return self.result.resources
+
     def streams_for_display(self) -> Tuple[str, str]:
         """
         Return stdout/err streams as necessary for error display.
@@ -62,6 +71,8 @@ class Failure(Exception):
         - If a given stream was *not* hidden during execution, a placeholder is
           used instead, to avoid printing it twice.
         - Only the last 10 lines of stream text is included.
+        - Streams which were not captured at all (``capture=False``) are
+          noted as such.
         - PTY-driven execution will lack stderr, and a specific message to this
           effect is returned instead of a stderr dump.
 
@@ -70,8 +81,11 @@ class Failure(Exception):
         .. versionadded:: 1.3
         """
         already_printed = " already printed"
+        not_captured = " not captured"
         if "stdout" not in self.result.hide:
             stdout = already_printed
+        elif not self.result.captured:
+            stdout = not_captured
         else:
             stdout = self.result.tail("stdout")
         if self.result.pty:
@@ -79,6 +93,8 @@ class Failure(Exception):
         else:
             if "stderr" not in self.result.hide:
                 stderr = already_printed
+            elif not self.result.captured:
+                stderr = not_captured
             else:
                 stderr = self.result.tail("stderr")
         return stdout, stderr
@@ -188,6 +204,52 @@ class AuthFailure(Failure):
         return err.format(self.prompt)
 
 
+class BatchFailure(Exception):
+    """
+    One or more commands run via `.Context.run_many` failed.
+
+    Raised once the batch is done, instead of the individual `Failure`
+    exceptions, which are available in `failures`.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(
+        self,
+        results: List["Result"],
+        failures: List[Failure],
+        skipped: Optional[List[str]] = None,
+    ) -> None:
+        #: The `.Result` of every command which ran - including the failed
+        #: ones - in the same order `.Context.run_many` would have returned
+        #: them.
+        self.results = results
+        #: The `Failure` (typically `UnexpectedExit`) raised by each failed
+        #: command, in the order in which they failed.
+        self.failures = failures
+        #: Commands which were never started, because ``fail_fast`` was
+        #: given and an earlier command failed.
+        self.skipped = skipped or []
+
+    def __str__(self) -> str:
+        lines = [
+            "{} of {} commands failed:".format(
+                len(self.failures), len(self.results) + len(self.skipped)
+            ),
+            "",
+        ]
+        for failure in self.failures:
+            result = failure.result
+            reason = "exit code {}".format(result.exited)
+            if not isinstance(failure, UnexpectedExit):
+                reason = type(failure).__name__
+            lines.append("- {!r} ({})".format(result.command, reason))
+        if self.skipped:
+            skipped = "Skipped {} more.".format(len(self.skipped))
+            lines.extend(["", skipped])
+        return "\n".join(lines) + "\n"
+
+
 class ParseError(Exception):
     """
     An error arising from the parsing of command-line flags/arguments.
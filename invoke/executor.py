@@ -1,12 +1,39 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
-
+import heapq
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+from .cache import TaskCache, cache_key, get_task_cache
 from .config import Config
+from .fingerprints import (
+    FingerprintDatabase,
+    Fingerprints,
+    call_key,
+    fingerprint_files,
+)
 from .parser import ParserContext, ParseResult
 from .tasks import Call, Task
 from .util import debug
 
 if TYPE_CHECKING:
     from .collection import Collection
+    from .context import Context
     from .runners import Result
 
 
@@ -48,6 +75,11 @@ class Executor:
         self.collection = collection
         self.config = config if config is not None else Config()
         self.core = core if core is not None else ParseResult()
+        self._fingerprints: Optional[FingerprintDatabase] = None
+        self._cache: Optional[TaskCache] = None
+        self._collection_configs: Dict[Optional[str], Dict[str, Any]] = {}
+        self._collection_configs_lock = threading.Lock()
+        self._env_state: Optional[Tuple[Config, Any]] = None
 
     def execute(
         self, *tasks: Union[str, Tuple[str, Dict[str, Any]], ParserContext]
@@ -96,7 +128,13 @@ class Executor:
             task named ``setup``, executing ``build`` will result in a dict
             with two keys, one for ``build`` and one for ``setup``.
 
+            Tasks skipped for being :ref:`up to date <incremental-tasks>` are
+            not included.
+
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Skip tasks whose declared ``inputs`` and ``outputs`` are up to
+            date, and reuse cached results of tasks using ``cache``.
         """
         # Normalize input
         debug("Examining top level tasks {!r}".format([x for x in tasks]))
@@ -117,13 +155,20 @@ class Executor:
         # Dedupe across entire run now that we know about all calls in order
         calls = self.dedupe(expanded) if dedupe else expanded
         # Execute
+        self._fingerprints = self._fingerprint_database()
+        self._cache = self._task_cache()
         results = {}
         # TODO: maybe clone initial config here? Probably not necessary,
         # especially given Executor is not designed to execute() >1 time at the
         # moment...
         for call in calls:
-            autoprint = call in direct and call.autoprint
+            # NOTE: checking autoprint first spares most calls a linear scan.
+            autoprint = call.autoprint and call in direct
             debug("Executing {!r}".format(call))
+            current = self._fingerprint(call)
+            if current is not None and self._is_up_to_date(call, current):
+                debug("{!r} is up to date, skipping".format(call))
+                continue
             # Hand in reference to our config, which will preserve user
             # modifications across the lifetime of the session.
             config = self.config
@@ -131,16 +176,15 @@ class Executor:
             # (collection & shell env)
             # TODO: load_collection needs to be skipped if task is anonymous
             # (Fabric 2 or other subclassing libs only)
-            collection_config = self.collection.configuration(call.called_as)
-            config.load_collection(collection_config)
-            config.load_shell_env()
+            self._load_task_config(config, call)
             debug("Finished loading collection & shell env configs")
             # Get final context from the Call (which will know how to generate
             # an appropriate one; e.g. subclasses might use extra data from
             # being parameterized), handing in this config for use there.
             context = call.make_context(config, core_parse_result=self.core)
-            args = (context, *call.args)
-            result = call.task(*args, **call.kwargs)
+            result = self._call_task(call, context)
+            if current is not None:
+                self._record(call, current)
             if autoprint:
                 print(result)
             # TODO: handle the non-dedupe case / the same-task-different-args
@@ -148,6 +192,104 @@ class Executor:
             results[call.task] = result
         return results
 
+    def _load_task_config(self, config: Config, call: "Call") -> None:
+        # Load the collection & shell env config levels for 'call' into
+        # 'config' - skipping either if it'd come out the same as what's
+        # there already, as each means re-merging (and crawling) the config.
+        # NOTE: not threadsafe; see ParallelExecutor._call.
+        data = self._collection_config(call.called_as)
+        if data != config._collection:
+            config.load_collection(data)
+        # The env level depends solely on the environment and on which config
+        # keys exist, with which types (as they're used for typecasting.)
+        state = (os.environ.copy(), _shape(config._config))
+        last = self._env_state
+        if last is None or last[0] is not config or last[1] != state:
+            config.load_shell_env()
+            self._env_state = (config, state)
+
+    def _collection_config(self, called_as: Optional[str]) -> Dict[str, Any]:
+        # Memoized Collection.configuration(); safe to call from any thread.
+        with self._collection_configs_lock:
+            data = self._collection_configs.get(called_as)
+            if data is None:
+                data = self.collection.configuration(called_as)
+                self._collection_configs[called_as] = data
+            return data
+
+    def _fingerprint_database(self) -> Optional[FingerprintDatabase]:
+        try:
+            path = self.config.tasks.fingerprint_file
+        except AttributeError:
+            path = None
+        if path is None:
+            return None
+        return FingerprintDatabase(os.path.join(self._root(), path))
+
+    def _task_cache(self) -> Optional[TaskCache]:
+        try:
+            settings = self.config.tasks.cache
+        except AttributeError:
+            return None
+        return get_task_cache(settings, self._root())
+
+    def _call_task(self, call: "Call", context: "Context") -> Any:
+        # Call the task, or reuse its cached result if it has one.
+        cache = self._cache if call.task.cache else None
+        if cache is None:
+            return call.task(context, *call.args, **call.kwargs)
+        key = cache_key(call, context)
+        try:
+            result = cache.get(key)
+        except KeyError:
+            result = call.task(context, *call.args, **call.kwargs)
+            cache.set(key, result)
+        else:
+            debug("{!r}: using cached result".format(call))
+        return result
+
+    def _root(self) -> str:
+        # Where tasks' inputs & outputs are relative to: the project root.
+        return self.collection.loaded_from or os.getcwd()
+
+    def _fingerprint(self, call: "Call") -> Optional[Dict[str, Fingerprints]]:
+        # Current fingerprints of the call's inputs & outputs; or None if it
+        # declares neither, or up-to-date checks are disabled.
+        task = call.task
+        database = self._fingerprints
+        if database is None or not (task.inputs or task.outputs):
+            return None
+        last = database.get(call_key(call))
+        root = self._root()
+        return {
+            "inputs": fingerprint_files(task.inputs, root, last.get("inputs")),
+            "outputs": fingerprint_files(
+                task.outputs, root, last.get("outputs")
+            ),
+        }
+
+    def _is_up_to_date(
+        self, call: "Call", current: Dict[str, Fingerprints]
+    ) -> bool:
+        database = cast(FingerprintDatabase, self._fingerprints)
+        key = call_key(call)
+        if not database.is_up_to_date(key, **current):
+            return False
+        # Files may have been touched without changing; store their new
+        # modification times, so they needn't be hashed again next time.
+        if current != database.get(key):
+            database.set(key, **current)
+        return True
+
+    def _record(self, call: "Call", current: Dict[str, Fingerprints]) -> None:
+        # Store fingerprints after a successful run: inputs' from before it,
+        # so changes made during the run aren't missed; outputs' from after.
+        database = cast(FingerprintDatabase, self._fingerprints)
+        outputs = fingerprint_files(
+            call.task.outputs, self._root(), current["outputs"]
+        )
+        database.set(call_key(call), current["inputs"], outputs)
+
     def normalize(
         self,
         tasks: Tuple[
@@ -189,9 +331,17 @@ class Executor:
         .. versionadded:: 1.0
         """
         deduped = []
+        # An ordered set, in effect; calls with unhashable args can only be
+        # compared against the whole list.
+        seen = set()
         debug("Deduplicating tasks...")
         for call in calls:
-            if call not in deduped:
+            try:
+                duplicate = call in seen
+                seen.add(call)
+            except TypeError:
+                duplicate = call in deduped
+            if not duplicate:
                 debug("{!r}: no duplicates found, ok".format(call))
                 deduped.append(call)
             else:
@@ -210,7 +360,20 @@ class Executor:
         similar.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Each task's pre/post-tasks are only expanded once per call to this
+            method, however many times the task itself appears.
         """
+        return self._expand_calls(calls, {})
+
+    def _expand_calls(
+        self,
+        calls: List["Call"],
+        memo: Dict["Task", Tuple[List["Call"], List["Call"]]],
+    ) -> List["Call"]:
+        # 'memo' maps tasks to their expanded pre/post-task lists, as shared
+        # pre-tasks may otherwise be re-walked once per task depending on
+        # them.
         ret = []
         for call in calls:
             # Normalize to Call (this method is sometimes called with pre/post
@@ -226,7 +389,227 @@ class Executor:
             # TODO: we _probably_ don't even want the config in here anymore,
             # we want this to _just_ be about the recursion across pre/post
             # tasks or parameterization...?
-            ret.extend(self.expand_calls(call.pre))
+            if call.task not in memo:
+                memo[call.task] = (
+                    self._expand_calls(call.pre, memo),
+                    self._expand_calls(call.post, memo),
+                )
+            pre, post = memo[call.task]
+            ret.extend(pre)
             ret.append(call)
-            ret.extend(self.expand_calls(call.post))
+            ret.extend(post)
         return ret
+
+
+def _shape(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    # The keys of a (nested) config dict, plus its leaves' types.
+    return tuple(
+        (key, _shape(value) if isinstance(value, dict) else type(value))
+        for key, value in data.items()
+    )
+
+
+class _Node:
+    # One call in a ParallelExecutor's dependency graph. 'deps' are the
+    # indices of nodes which must finish first; 'done' those which must
+    # finish before the call counts as done itself (it plus its post-tasks).
+    def __init__(self, call: "Call", deps: Set[int]) -> None:
+        self.call = call
+        self.deps = deps
+        self.done: Set[int] = set()
+
+
+class ParallelExecutor(Executor):
+    """
+    An `.Executor` running independent tasks concurrently, in threads.
+
+    Instead of flattening pre- and post-tasks into one list, treats them as a
+    dependency graph, running each task as soon as everything it depends on
+    is done:
+
+    - a task's pre-tasks (and, recursively, theirs) must be done before it
+      runs; but pre-tasks listed together are independent of one another, and
+      may run at the same time;
+    - a task's post-tasks run after it, and must be done before anything
+      depending on the task runs;
+    - tasks given to `execute` directly (e.g. on the command line) run one
+      after another, as they would otherwise.
+
+    So, for instance, given ``release`` with pre-tasks ``build_docs`` and
+    ``build_wheel``, each of which has a pre-task ``setup``: ``setup`` runs
+    first, then both builds at once, then ``release``.
+
+    Up to ``tasks.max_workers`` tasks run at a time (default: ``None``,
+    meaning `~concurrent.futures.ThreadPoolExecutor`'s default.) With a value
+    of ``1``, tasks run in the same order as they would via `.Executor`.
+
+    Deduping (``tasks.dedupe``) works as usual: a task called more than once
+    with the same arguments runs once, and everything depending on any of
+    those calls waits for it.
+
+    .. note::
+        As tasks may run concurrently, each gets its own copy of the
+        executor's config, instead of sharing one; changes a task makes to its
+        context's config aren't seen by others.
+
+    If a task raises an exception, no further tasks are started; those
+    already running are waited for, and the exception re-raised.
+
+    .. versionadded:: 3.1
+    """
+
+    def execute(
+        self, *tasks: Union[str, Tuple[str, Dict[str, Any]], ParserContext]
+    ) -> Dict["Task", "Result"]:
+        """
+        Execute one or more ``tasks``, concurrently where possible.
+
+        Takes the same arguments, and returns the same thing, as
+        `.Executor.execute`.
+
+        .. versionadded:: 3.1
+        """
+        debug("Examining top level tasks {!r}".format([x for x in tasks]))
+        calls = self.normalize(tasks)
+        debug("Tasks (now Calls) with kwargs: {!r}".format(calls))
+        try:
+            dedupe = self.config.tasks.dedupe
+        except AttributeError:
+            dedupe = True
+        try:
+            max_workers = self.config.tasks.max_workers
+        except AttributeError:
+            max_workers = None
+        nodes = self.graph(calls, dedupe=dedupe)
+        self._fingerprints = self._fingerprint_database()
+        self._cache = self._task_cache()
+        results = self._run_graph(nodes, max_workers)
+        # Results & autoprinting in the order Executor would have gone with
+        ret = {}
+        for index, node in enumerate(nodes):
+            if index not in results:
+                # Up to date, so skipped
+                continue
+            result = results[index]
+            if node.call in calls and node.call.autoprint:
+                print(result)
+            ret[node.call.task] = result
+        return ret
+
+    def graph(self, calls: List["Call"], dedupe: bool = True) -> List[_Node]:
+        """
+        Turn ``calls`` and their pre/post-tasks into a dependency graph.
+
+        :returns:
+            A list of nodes, each with a ``call`` (a `.Call`) and ``deps`` (the
+            indices of the nodes it depends on). Nodes only ever depend on
+            earlier ones, and are in the order `.Executor` would run them.
+
+        .. versionadded:: 3.1
+        """
+        nodes: List[_Node] = []
+        # Node indices by call, for deduping
+        seen: Dict["Call", int] = {}
+
+        def visit(call: Union["Call", "Task"], after: Set[int]) -> Set[int]:
+            # Add call (and its pre/post-tasks) to the graph, all running
+            # after the nodes in 'after'. Returns the nodes which must finish
+            # for it to count as done.
+            if isinstance(call, Task):
+                call = Call(call)
+            debug("Expanding task-call {!r}".format(call))
+            if dedupe:
+                try:
+                    found = seen.get(call)
+                except TypeError:
+                    found = next(
+                        (i for i, x in enumerate(nodes) if x.call == call),
+                        None,
+                    )
+                if found is not None:
+                    debug("{!r}: found in graph already".format(call))
+                    # NOTE: 'done' is still empty if we're one of the node's
+                    # own post-tasks' pre-tasks.
+                    return nodes[found].done or {found}
+            deps = set(after)
+            for pre in call.pre:
+                deps |= visit(pre, after)
+            index = len(nodes)
+            nodes.append(_Node(call, deps))
+            try:
+                seen.setdefault(call, index)
+            except TypeError:
+                pass
+            done = {index}
+            for post in call.post:
+                done |= visit(post, {index})
+            nodes[index].done = done
+            return done
+
+        previous: Set[int] = set()
+        for call in calls:
+            previous = visit(call, previous)
+        return nodes
+
+    def _run_graph(
+        self, nodes: List[_Node], max_workers: Optional[int]
+    ) -> Dict[int, Any]:
+        waiting = {index: set(node.deps) for index, node in enumerate(nodes)}
+        dependents: Dict[int, List[int]] = {x: [] for x in waiting}
+        for index, node in enumerate(nodes):
+            for dep in node.deps:
+                dependents[dep].append(index)
+        # Lowest index first, so that a single worker runs the usual order.
+        ready = [index for index, deps in waiting.items() if not deps]
+        heapq.heapify(ready)
+        running: Dict[Future, int] = {}
+        results: Dict[int, Any] = {}
+        error: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while ready or running:
+                while ready and error is None:
+                    index = heapq.heappop(ready)
+                    call = nodes[index].call
+                    debug("Executing {!r}".format(call))
+                    future = pool.submit(self._call, call)
+                    running[future] = index
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        error = error or exception
+                        continue
+                    ran, result = future.result()
+                    if ran:
+                        results[index] = result
+                    for dependent in dependents[index]:
+                        waiting[dependent].discard(index)
+                        if not waiting[dependent]:
+                            heapq.heappush(ready, dependent)
+        if error is not None:
+            raise error
+        return results
+
+    def _call(self, call: "Call") -> Tuple[bool, Any]:
+        # Returns whether the call ran (vs. being up to date) & its result.
+        current = self._fingerprint(call)
+        if current is not None and self._is_up_to_date(call, current):
+            debug("{!r} is up to date, skipping".format(call))
+            return False, None
+        # Tasks may run concurrently, so each gets a config of its own -
+        # which, being brand new, always needs its shell env level loaded.
+        # (So _load_task_config's caching, which is not threadsafe anyways,
+        # is of no use here.)
+        config = self.config.clone()
+        data = self._collection_config(call.called_as)
+        if data != config._collection:
+            config.load_collection(data)
+        config.load_shell_env()
+        context = call.make_context(config, core_parse_result=self.core)
+        result = self._call_task(call, context)
+        if current is not None:
+            self._record(call, current)
+        return True, result
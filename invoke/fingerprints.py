@@ -0,0 +1,191 @@
+"""
+Up-to-date checks for tasks declaring the files they read and write.
+
+Tasks may name their ``inputs`` and ``outputs`` as lists of glob patterns
+(see `.task`). After such a task runs successfully, the executor records
+fingerprints of the matching files in a `FingerprintDatabase`; the next time
+around, if none of those files changed - and all output patterns still match
+something - the task is considered up to date, and skipped.
+
+Fingerprints are a file's modification time, size and SHA-256 digest. Files
+whose modification time and size are as recorded are assumed unchanged,
+without being read; only the rest get hashed, so merely touching a file
+doesn't cause a re-run.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .tasks import Call
+
+#: Format version of fingerprint database files; files of other versions are
+#: ignored (and overwritten.)
+VERSION = 1
+
+#: Fingerprints of the files matching a list of glob patterns: each pattern
+#: maps to a dict of matching file paths & their mtime, size and digest.
+Fingerprints = Dict[str, Dict[str, List[Any]]]
+
+
+def fingerprint_files(
+    patterns: Iterable[str],
+    root: str,
+    previous: Optional[Fingerprints] = None,
+) -> Fingerprints:
+    """
+    Fingerprint the files matching glob ``patterns``.
+
+    :param patterns:
+        Glob patterns, relative to ``root``; ``**`` matches any number of
+        directories. Directories matched by them are ignored.
+
+    :param str root: The directory patterns (and resulting paths) are relative
+        to.
+
+    :param previous:
+        Fingerprints from an earlier call, whose digests are reused for files
+        whose modification time and size are unchanged since.
+
+    .. versionadded:: 3.1
+    """
+    previous = previous or {}
+    fingerprints = {}
+    for pattern in patterns:
+        known = previous.get(pattern, {})
+        files = {}
+        matches = glob.glob(os.path.join(root, pattern), recursive=True)
+        for match in sorted(matches):
+            try:
+                stat = os.stat(match)
+            except OSError:
+                # Went away in the meantime
+                continue
+            if not os.path.isfile(match):
+                continue
+            path = os.path.relpath(match, root)
+            mtime, size = stat.st_mtime_ns, stat.st_size
+            old = known.get(path)
+            if old is not None and old[:2] == [mtime, size]:
+                digest = old[2]
+            else:
+                digest = _digest(match)
+            files[path] = [mtime, size, digest]
+        fingerprints[pattern] = files
+    return fingerprints
+
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _unchanged(current: Fingerprints, last: Fingerprints) -> bool:
+    # Equal but for modification times, which files may get without their
+    # contents changing.
+    if current.keys() != last.keys():
+        return False
+    for pattern, files in current.items():
+        old = last[pattern]
+        if files.keys() != old.keys():
+            return False
+        for path, (_, size, digest) in files.items():
+            if old[path][1:] != [size, digest]:
+                return False
+    return True
+
+
+def call_key(call: "Call") -> str:
+    """
+    Return a string identifying ``call`` in a `FingerprintDatabase`.
+
+    Made up of the task's module and name (like `.cache_key`, so same-named
+    tasks from different namespaces don't collide) and the call's
+    arguments; so, as with deduping, calls of the same task with different
+    arguments are tracked separately.
+
+    .. versionadded:: 3.1
+    """
+    task = call.task
+    kwargs = sorted(call.kwargs.items())
+    return "{}.{}{}".format(
+        task.__module__, task.name, repr((call.args, kwargs))
+    )
+
+
+class FingerprintDatabase:
+    """
+    A JSON file recording tasks' input and output file fingerprints.
+
+    The file is read upon first use, and rewritten (atomically) every time a
+    task's fingerprints are stored. Instances may be shared between threads.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param str path: The database file; need not exist yet.
+        """
+        #: Path to the database file.
+        self.path = path
+        self._lock = threading.Lock()
+        self._calls: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        # Callers must hold our lock.
+        if self._calls is None:
+            try:
+                with open(self.path) as fd:
+                    data = json.load(fd)
+                calls = data["calls"] if data.get("version") == VERSION else {}
+            except (OSError, ValueError, KeyError, AttributeError):
+                calls = {}
+            self._calls = calls
+        return self._calls
+
+    def get(self, key: str) -> Dict[str, Fingerprints]:
+        """
+        Return the ``"inputs"`` & ``"outputs"`` fingerprints stored for
+        ``key`` (or an empty dict, if there are none.)
+        """
+        with self._lock:
+            return self._load().get(key, {})
+
+    def set(
+        self, key: str, inputs: Fingerprints, outputs: Fingerprints
+    ) -> None:
+        """
+        Store input and output fingerprints for ``key``, saving the database.
+        """
+        with self._lock:
+            calls = self._load()
+            calls[key] = {"inputs": inputs, "outputs": outputs}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = "{}.{}.tmp".format(self.path, os.getpid())
+            with open(temporary, "w") as fd:
+                json.dump({"version": VERSION, "calls": calls}, fd)
+            os.replace(temporary, self.path)
+
+    def is_up_to_date(
+        self, key: str, inputs: Fingerprints, outputs: Fingerprints
+    ) -> bool:
+        """
+        Return whether current ``inputs`` and ``outputs`` fingerprints match
+        those stored for ``key``, and every output pattern matches a file.
+        """
+        last = self.get(key)
+        if not last or not all(outputs.values()):
+            return False
+        return _unchanged(inputs, last["inputs"]) and _unchanged(
+            outputs, last["outputs"]
+        )
@@ -0,0 +1,418 @@
+"""
+Spawning subprocesses via a small, separate "fork server" process.
+
+However it's done - ``fork``, ``vfork``, ``posix_spawn`` or a pty's
+``fork`` - starting a subprocess costs its parent time proportional to the
+size of its own address space, which adds up for long-lived Python processes
+holding gigabytes of memory. A `ForkServer` sidesteps that: it is a fresh,
+minimal Python interpreter, started once (and early), which spawns
+subprocesses on our behalf as asked over a Unix socket. The pipes for each
+subprocess' stdio are handed back over the socket (as ``SCM_RIGHTS``
+ancillary data), plus one more pipe through which the server reports the
+subprocess' exit status - it's the server's child, so not ours to wait on.
+
+Users don't typically interact with this module directly; instead, set the
+``run.spawn_backend`` config option (or `~.Runner.run` kwarg) to
+``"forkserver"``. The server does not support ``pty=True``, which keeps
+spawning locally.
+
+.. note::
+    The server side runs this very file as a standalone script, so this
+    module may only import from the standard library.
+"""
+
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+#: Whether this platform supports running a `ForkServer`.
+SUPPORTED = sys.platform != "win32" and hasattr(socket, "send_fds")
+
+# Resource usage fields passed on along with exit statuses.
+_RUSAGE_FIELDS = (
+    "ru_utime",
+    "ru_stime",
+    "ru_maxrss",
+    "ru_inblock",
+    "ru_oublock",
+)
+# Length prefix of each message; fds ride along with its first byte.
+_HEADER = struct.Struct("!I")
+# Upper bound on fds per message (stdin, stdout, stderr, status).
+_MAX_FDS = 4
+
+
+def _send(
+    sock: socket.socket, message: Dict[str, Any], fds: List[int]
+) -> None:
+    data = json.dumps(message).encode()
+    socket.send_fds(sock, [_HEADER.pack(len(data)) + data], fds)
+
+
+def _receive(sock: socket.socket) -> Tuple[Dict[str, Any], List[int]]:
+    data, fds, _, _ = socket.recv_fds(sock, 65536, _MAX_FDS)
+    if not data:
+        raise ConnectionError("Fork server connection closed")
+    start = _HEADER.size
+    while len(data) < start:
+        data += _recv_more(sock)
+    (size,) = _HEADER.unpack_from(data)
+    while len(data) < start + size:
+        data += _recv_more(sock)
+    return json.loads(data[start:]), fds
+
+
+def _recv_more(sock: socket.socket) -> bytes:
+    chunk = sock.recv(65536)
+    if not chunk:
+        raise ConnectionError("Fork server connection closed")
+    return chunk
+
+
+class ServedProcess:
+    """
+    A `subprocess.Popen`-alike for a subprocess spawned by a `ForkServer`.
+
+    Offers the subset of the `~subprocess.Popen` API which `.Local` uses:
+    ``pid``, ``stdin``, ``stdout``, ``stderr`` (the latter two being ``None``
+    when not piped), ``returncode`` and `poll`. Plus ``rusage``: once the
+    subprocess has exited, its resource usage as reported by the server's
+    `os.wait4` - an object with the ``ru_utime``, ``ru_stime``,
+    ``ru_maxrss``, ``ru_inblock`` and ``ru_oublock`` attributes of
+    `resource.struct_rusage` - or ``None`` if unavailable.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        stdin: int,
+        stdout: Optional[int],
+        stderr: Optional[int],
+        status_fd: int,
+    ) -> None:
+        self.pid = pid
+        self.stdin = open(stdin, "wb")
+        self.stdout = None if stdout is None else open(stdout, "rb")
+        self.stderr = None if stderr is None else open(stderr, "rb")
+        #: A file descriptor which becomes readable once the subprocess has
+        #: exited, i.e. once `poll` will no longer return ``None``.
+        self.status_fd = status_fd
+        os.set_blocking(status_fd, False)
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[SimpleNamespace] = None
+        self._status = b""
+        self._lock = threading.Lock()
+
+    def poll(self) -> Optional[int]:
+        """
+        Return the exit code if the subprocess has exited, else ``None``.
+
+        As with `~subprocess.Popen`, exit via signal N is reported as -N.
+
+        :raises:
+            `ChildProcessError`, if the fork server went away without
+            reporting the subprocess' exit status.
+        """
+        with self._lock:
+            while self.returncode is None:
+                try:
+                    chunk = os.read(self.status_fd, 64)
+                except BlockingIOError:
+                    return None
+                if not chunk:
+                    err = "Fork server quit without reporting on pid {}"
+                    raise ChildProcessError(err.format(self.pid))
+                self._status += chunk
+                if self._status.endswith(b"\n"):
+                    code, *usage = self._status.split()
+                    if usage:
+                        values = map(json.loads, usage)
+                        self.rusage = SimpleNamespace(
+                            **dict(zip(_RUSAGE_FIELDS, values))
+                        )
+                    self.returncode = int(code)
+            return self.returncode
+
+    def close(self) -> None:
+        """
+        Release the exit status pipe. Call once done with the subprocess.
+        """
+        with self._lock:
+            if self.status_fd != -1:
+                os.close(self.status_fd)
+                self.status_fd = -1
+
+
+class ForkServer:
+    """
+    Client for - and owner of - a fork server process.
+
+    The server is started on first use, or explicitly via `start`; it exits by
+    itself once we do (or call `stop`). Instances are threadsafe, handling one
+    spawn request at a time.
+
+    Most code wants the process-wide instance from `get_fork_server`.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self) -> None:
+        self.process: Optional[subprocess.Popen] = None
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the server process, if it isn't already running.
+        """
+        with self._lock:
+            self._start()
+
+    def stop(self) -> None:
+        """
+        Tell the server process to exit, and wait for it to do so.
+
+        Subprocesses it spawned keep running, but their exit status can no
+        longer be obtained.
+        """
+        with self._lock:
+            self._stop()
+
+    def _start(self) -> None:
+        if self._sock is not None:
+            return
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # NOTE: isolated mode (-I) keeps the server from importing
+            # anything beyond this file & the stdlib, e.g. via PYTHONSTARTUP.
+            self.process = subprocess.Popen(
+                [sys.executable, "-I", __file__, str(theirs.fileno())],
+                pass_fds=[theirs.fileno()],
+                stdin=subprocess.DEVNULL,
+            )
+        except BaseException:
+            ours.close()
+            raise
+        finally:
+            theirs.close()
+        self._sock = ours
+
+    def _stop(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self.process is not None:
+            self.process.wait()
+            self.process = None
+
+    def spawn(
+        self,
+        args: Union[str, List[str]],
+        shell: str,
+        env: Mapping[str, str],
+        cwd: Optional[str] = None,
+        stdout: int = subprocess.PIPE,
+        stderr: int = subprocess.PIPE,
+    ) -> ServedProcess:
+        """
+        Have the server start a subprocess, returning a `ServedProcess`.
+
+        :param args:
+            A command string, executed via ``shell``; or an argument vector,
+            executed directly.
+        :param str shell: The shell to use for command strings.
+        :param dict env: The subprocess' entire environment.
+        :param str cwd: The subprocess' working directory, if not ours.
+        :param int stdout:
+            `subprocess.PIPE` (the default), `subprocess.DEVNULL`, or a file
+            descriptor of ours to hand to the subprocess as-is.
+        :param int stderr: As with ``stdout``.
+
+        :raises:
+            `OSError` (e.g. `FileNotFoundError`), if the subprocess could not
+            be started; exactly as `subprocess.Popen` would.
+        """
+        request = dict(args=args, shell=shell, env=dict(env), cwd=cwd)
+        fds = []
+        for name, target in (("stdout", stdout), ("stderr", stderr)):
+            if target == subprocess.PIPE:
+                request[name] = "pipe"
+            elif target == subprocess.DEVNULL:
+                request[name] = "devnull"
+            else:
+                request[name] = "fd"
+                fds.append(target)
+        with self._lock:
+            try:
+                reply, received = self._request(request, fds)
+            except (ConnectionError, BrokenPipeError):
+                # Server died (or was killed); retry once with a new one.
+                self._stop()
+                reply, received = self._request(request, fds)
+        if "error" in reply:
+            raise OSError(*reply["error"])
+        stdin_fd = received.pop(0)
+        out_fd = received.pop(0) if reply["stdout"] else None
+        err_fd = received.pop(0) if reply["stderr"] else None
+        return ServedProcess(reply["pid"], stdin_fd, out_fd, err_fd, *received)
+
+    def _request(
+        self, request: Dict[str, Any], fds: List[int]
+    ) -> Tuple[Dict[str, Any], List[int]]:
+        self._start()
+        assert self._sock is not None
+        _send(self._sock, request, fds)
+        return _receive(self._sock)
+
+
+_fork_server: Optional[ForkServer] = None
+_fork_server_lock = threading.Lock()
+
+
+def get_fork_server() -> ForkServer:
+    """
+    Return the process-wide shared `ForkServer`, creating it if necessary.
+
+    .. versionadded:: 3.1
+    """
+    global _fork_server
+    with _fork_server_lock:
+        if _fork_server is None:
+            _fork_server = ForkServer()
+        return _fork_server
+
+
+def _forget_fork_server() -> None:
+    # Forked children share our socket to the server; letting both of us talk
+    # over it at once would interleave requests, so children start afresh.
+    global _fork_server, _fork_server_lock
+    _fork_server = None
+    _fork_server_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_fork_server)
+
+
+#
+# Server side
+#
+
+
+def _spawn(
+    sock: socket.socket,
+    request: Dict[str, Any],
+    fds: List[int],
+    children: Dict[int, Tuple[subprocess.Popen, int]],
+) -> None:
+    streams: Dict[str, Any] = {}
+    received = list(fds)
+    for name in ("stdout", "stderr"):
+        if request[name] == "pipe":
+            streams[name] = subprocess.PIPE
+        elif request[name] == "devnull":
+            streams[name] = subprocess.DEVNULL
+        else:
+            streams[name] = received.pop(0)
+    args = request["args"]
+    kwargs: Dict[str, Any] = dict(
+        env=request["env"], cwd=request["cwd"], stdin=subprocess.PIPE
+    )
+    if isinstance(args, str):
+        kwargs.update(shell=True, executable=request["shell"])
+    try:
+        process = subprocess.Popen(args, **streams, **kwargs)
+    except OSError as e:
+        _send(sock, {"error": [e.errno, e.strerror, e.filename]}, [])
+        return
+    finally:
+        # The child has its own copies by now.
+        for fd in fds:
+            os.close(fd)
+    status_r, status_w = os.pipe()
+    pipes = [x for x in (process.stdout, process.stderr) if x is not None]
+    reply = dict(
+        pid=process.pid,
+        stdout=process.stdout is not None,
+        stderr=process.stderr is not None,
+    )
+    assert process.stdin is not None
+    handed_over = [process.stdin.fileno()] + [x.fileno() for x in pipes]
+    _send(sock, reply, handed_over + [status_r])
+    for pipe in [process.stdin] + pipes:
+        pipe.close()
+    os.close(status_r)
+    children[process.pid] = (process, status_w)
+
+
+def _reap(children: Dict[int, Tuple[subprocess.Popen, int]]) -> None:
+    for pid, (process, status_w) in list(children.items()):
+        usage = []
+        if hasattr(os, "wait4"):
+            try:
+                reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+            except ChildProcessError:
+                reaped, status = pid, 0
+            if not reaped:
+                continue
+            process.returncode = os.waitstatus_to_exitcode(status)
+            usage = [repr(getattr(rusage, x)) for x in _RUSAGE_FIELDS]
+        elif process.poll() is None:
+            continue
+        line = " ".join([str(process.returncode)] + usage)
+        os.write(status_w, line.encode() + b"\n")
+        os.close(status_w)
+        del children[pid]
+
+
+def serve(fd: int) -> None:
+    """
+    Serve spawn requests arriving on socket ``fd``, until it is closed.
+
+    This is the fork server's main loop; `ForkServer` runs it in a new
+    interpreter.
+    """
+    sock = socket.socket(fileno=fd)
+    children: Dict[int, Tuple[subprocess.Popen, int]] = {}
+    # Wake up the select() below whenever a child exits.
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *args: None)
+    # Ctrl-C in our shared terminal reaches our children (and their client)
+    # directly; we just have to survive it. NOTE: a handler, rather than
+    # SIG_IGN, because children would inherit the latter.
+    signal.signal(signal.SIGINT, lambda *args: None)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fd == wake_r:
+                try:
+                    while os.read(wake_r, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            try:
+                request, fds = _receive(sock)
+            except ConnectionError:
+                return
+            _spawn(sock, request, fds, children)
+        _reap(children)
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -0,0 +1,299 @@
+"""
+A pool of persistent shells, shared by every `.Context.run` call.
+
+Where `.Context.session` keeps one shell around for the duration of a
+``with`` block, a `ShellPool` keeps several for the life of the process, and
+`PooledLocal` sends commands their way. Since it's a drop-in `.Local`
+replacement, enabling it is purely a matter of configuration - existing
+``c.run`` calls need no changes::
+
+    from invoke import Collection
+    from invoke.pool import PooledLocal
+
+    ns = Collection(...)
+    ns.configure({"runners": {"local": PooledLocal}})
+
+The ``pool`` config tree controls how many shells there are (``pool.size``),
+how they're picked for each command (``pool.dispatch``) and how many
+commands each runs before being replaced by a fresh one
+(``pool.max_commands``).
+"""
+
+import atexit
+import os
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from .context import Context
+from .runners import Local, Result, _env_cache, _environ_data
+from .session import ShellSession, _supports
+
+#: Valid values for the ``pool.dispatch`` setting.
+DISPATCHERS = ("least_busy", "round_robin")
+
+
+class _Worker:
+    # One of a pool's shells, plus bookkeeping. 'lock' (rather than the
+    # session's own) is held while running a command, as recycling swaps out
+    # the session itself.
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.session: Optional[ShellSession] = None
+        self.pending = 0
+        self.commands = 0
+        self.cwd = ""
+        self.environ: Dict[Any, Any] = {}
+
+
+class ShellPool:
+    """
+    A fixed number of persistent `.ShellSession` shells, to run commands in.
+
+    Each command goes to one shell - see `run` - which executes it in a
+    subshell of itself, as described in `.ShellSession`'s docs. Shells run one
+    command at a time; commands dispatched to a busy shell wait their turn.
+
+    A shell is *recycled* - made to exit, and replaced by a new one - after
+    ``max_commands`` commands, and whenever our process' working directory or
+    environment has changed since it started (it would otherwise run later
+    commands in the old directory, and re-export any changed variables for
+    every one of them).
+
+    Most code wants the process-wide instance `PooledLocal` uses, via
+    `get_shell_pool`.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        max_commands: Optional[int] = None,
+        dispatch: str = "least_busy",
+    ) -> None:
+        """
+        :param int size: How many shells to keep around.
+
+        :param int max_commands:
+            How many commands a shell may run before being recycled. ``None``
+            means no limit.
+
+        :param str dispatch:
+            How to pick each command's shell: ``"least_busy"`` for the one
+            with the fewest commands running or waiting (preferring idle
+            shells), or ``"round_robin"`` to take turns regardless.
+
+        :raises ValueError: if ``size`` or ``dispatch`` are invalid.
+        """
+        if size < 1:
+            raise ValueError(
+                "Pool size must be at least 1, not {}".format(size)
+            )
+        if dispatch not in DISPATCHERS:
+            err = "Pool dispatch must be one of {}, not {!r}"
+            raise ValueError(err.format(", ".join(DISPATCHERS), dispatch))
+        #: How many shells the pool has.
+        self.size = size
+        #: How many commands a shell runs before being recycled.
+        self.max_commands = max_commands
+        #: How commands are dispatched to shells.
+        self.dispatch = dispatch
+        self._workers = [_Worker() for _ in range(size)]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._started = False
+        self._env: Dict[str, Any] = {}
+        self._closed = False
+
+    def start(self, shell: str, env: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Start any idle shells which aren't running yet, using ``shell``.
+
+        `run` calls this the first time around, so that later commands need
+        not wait for their shell to start.
+
+        :param dict env:
+            Variables to start the shells with, on top of `os.environ`; say,
+            the ``run.env`` config setting. (Commands get their own
+            environments regardless; this saves re-exporting them each time.)
+        """
+        self._started = True
+        self._env = {} if env is None else env
+        for worker in self._workers:
+            # Busy workers are evidently running already.
+            if not worker.lock.acquire(blocking=False):
+                continue
+            try:
+                session = self._session_for(worker)
+                session.start(shell, _env_cache.get(self._env))
+            finally:
+                worker.lock.release()
+
+    def run(
+        self, context: Context, command: Union[str, List[str]], **kwargs: Any
+    ) -> Result:
+        """
+        Execute ``command`` in one of the pool's shells, returning a `.Result`.
+
+        Takes the same arguments as `.Runner.run`, plus the `.Context` whose
+        config applies (and whose ``run.shell`` the pool's shells start with,
+        the first time around). Unlike `.ShellSession.run`, ``command`` is
+        run as-is, without adding any of the context's `~.Context.cd` /
+        `~.Context.prefix` state (`.Context.run` has already done so - for
+        argument vectors, by way of the ``cwd`` option, which is honored like
+        any other.)
+
+        :raises ValueError: if the pool has been closed.
+        """
+        if not self._started:
+            config = context.config.run
+            env = {} if config.replace_env else dict(config.env)
+            self.start(config.shell, env)
+        worker = self._checkout()
+        try:
+            with worker.lock:
+                session = self._session_for(worker)
+                worker.commands += 1
+                runner = session.runner_class(context, session)
+                return runner.run(command, **kwargs)
+        finally:
+            with self._lock:
+                worker.pending -= 1
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            if self._closed:
+                raise ValueError("Can't run commands in a closed ShellPool!")
+            workers = self._workers
+            start = self._next
+            self._next = (start + 1) % self.size
+            worker = workers[start]
+            if self.dispatch == "least_busy":
+                # Starting from the round-robin position spreads ties out.
+                for index in range(1, self.size):
+                    candidate = workers[(start + index) % self.size]
+                    if candidate.pending < worker.pending:
+                        worker = candidate
+            worker.pending += 1
+            return worker
+
+    def _session_for(self, worker: _Worker) -> ShellSession:
+        # Return worker's session, recycling it first if need be. Callers
+        # must hold worker.lock.
+        session = worker.session
+        shell = None
+        if session is not None:
+            limit = self.max_commands
+            if (
+                (limit is not None and worker.commands >= limit)
+                or worker.cwd != os.getcwd()
+                or worker.environ != _environ_data()
+            ):
+                shell = session.shell
+                session.close()
+                session = None
+        if session is None:
+            # NOTE: a blank context, as commands arrive with their cd &
+            # prefix state already applied.
+            session = ShellSession(Context())
+            worker.session = session
+            worker.commands = 0
+            worker.cwd = os.getcwd()
+            worker.environ = dict(_environ_data())
+            # Recycled shells start right away, keeping the pool warm.
+            if shell is not None:
+                session.start(shell, _env_cache.get(self._env))
+        return session
+
+    def close(self) -> None:
+        """
+        Make all of the pool's shells exit.
+
+        Waits for running commands to finish first; `run` raises
+        `ValueError` from here on out.
+        """
+        with self._lock:
+            self._closed = True
+        for worker in self._workers:
+            with worker.lock:
+                if worker.session is not None:
+                    worker.session.close()
+                    worker.session = None
+
+
+_pool: Optional[ShellPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_shell_pool(
+    size: int = 4,
+    max_commands: Optional[int] = None,
+    dispatch: str = "least_busy",
+) -> ShellPool:
+    """
+    Return the process-wide shared `ShellPool`, creating it if necessary.
+
+    Takes the same arguments as `ShellPool`. If the shared pool was created
+    with different ones, it's closed and replaced.
+
+    .. versionadded:: 3.1
+    """
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        if pool is not None:
+            current = (pool.size, pool.max_commands, pool.dispatch)
+            if current != (size, max_commands, dispatch):
+                pool.close()
+                pool = None
+        if pool is None:
+            pool = _pool = ShellPool(size, max_commands, dispatch)
+        return pool
+
+
+def _close_shell_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def _forget_shell_pool() -> None:
+    # Forked children share our shells' pipes; they get their own pool.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+atexit.register(_close_shell_pool)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shell_pool)
+
+
+class PooledLocal(Local):
+    """
+    Execute commands via the process-wide `ShellPool`, where possible.
+
+    A drop-in replacement for `.Local`, meant for the ``runners.local``
+    config setting. Commands run in one of the shared pool's persistent
+    shells - configured by the ``pool`` config tree - instead of a new shell
+    apiece, which adds up for programs running many short commands.
+
+    Commands which shells can't run (see `.ShellSession`) - such as those
+    using ``pty`` - run as they would via `.Local` instead.
+
+    .. versionadded:: 3.1
+    """
+
+    def run(self, command: Union[str, List[str]], **kwargs: Any) -> Result:
+        config = self.context.config
+        if not _supports(kwargs, config.run):
+            return super().run(command, **kwargs)
+        settings = config.pool
+        pool = get_shell_pool(
+            size=settings.size,
+            max_commands=settings.max_commands,
+            dispatch=settings.dispatch,
+        )
+        return pool.run(self.context, command, **kwargs)
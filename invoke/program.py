@@ -16,9 +16,15 @@ from typing import (
     Type,
 )
 
-from . import Collection, Config, Executor, FilesystemLoader
+from . import Collection, Config, Executor, FilesystemLoader, forkserver
 from .completion.complete import complete, print_completion_script
-from .exceptions import CollectionNotFound, Exit, ParseError, UnexpectedExit
+from .exceptions import (
+    BatchFailure,
+    CollectionNotFound,
+    Exit,
+    ParseError,
+    UnexpectedExit,
+)
 from .parser import Argument, Parser, ParserContext
 from .terminals import pty_size
 from .util import debug, enable_logging, helpline
@@ -166,6 +172,12 @@ class Program:
                 names=("collection", "c"),
                 help="Specify collection name to load.",
             ),
+            Argument(
+                names=("no-cache",),
+                kind=bool,
+                default=False,
+                help="Ignore and do not update cached task results.",
+            ),
             Argument(
                 names=("no-dedupe",),
                 kind=bool,
@@ -332,6 +344,8 @@ class Program:
         tasks = {}
         if "no-dedupe" in self.args and self.args["no-dedupe"].value:
             tasks["dedupe"] = False
+        if "no-cache" in self.args and self.args["no-cache"].value:
+            tasks["cache"] = {"enabled": False}
         timeouts = {}
         command = self.args["command-timeout"].value
         if command:
@@ -377,6 +391,7 @@ class Program:
             # most config file locations (all but runtime.) Used to inform
             # loading & parsing behavior.
             self.create_config()
+            self.start_fork_server()
             # Parse the given ARGV with our CLI parsing machinery, resulting in
             # things like self.args (core args/flags), self.collection (the
             # loaded namespace, which may be affected by the core flags) and
@@ -393,10 +408,11 @@ class Program:
             # runtime config file contents and flag-derived overrides (e.g. for
             # run()'s echo, warn, etc options.)
             self.update_config()
+            self.start_fork_server()
             # Create an Executor, passing in the data resulting from the prior
             # steps, then tell it to execute the tasks.
             self.execute()
-        except (UnexpectedExit, Exit, ParseError) as e:
+        except (UnexpectedExit, BatchFailure, Exit, ParseError) as e:
             debug("Received a possibly-skippable exception: {!r}".format(e))
             # Print error messages from parser, runner, etc if necessary;
             # prevents messy traceback but still clues interactive user into
@@ -407,13 +423,15 @@ class Program:
                 print(e.message, file=sys.stderr)
             if isinstance(e, UnexpectedExit) and e.result.hide:
                 print(e, file=sys.stderr, end="")
+            if isinstance(e, BatchFailure):
+                print(e, file=sys.stderr, end="")
             # Terminate execution unless we were told not to.
             if exit:
                 if isinstance(e, UnexpectedExit):
                     code = e.result.exited
                 elif isinstance(e, Exit):
                     code = e.code
-                elif isinstance(e, ParseError):
+                elif isinstance(e, (ParseError, BatchFailure)):
                     code = 1
                 sys.exit(code)
             else:
@@ -421,6 +439,24 @@ class Program:
         except KeyboardInterrupt:
             sys.exit(1)  # Same behavior as Python itself outside of REPL
 
+    def start_fork_server(self) -> None:
+        """
+        Start the shared `.ForkServer`, if configured to spawn commands via it.
+
+        Called twice by `run`: as soon as the initial config exists - before
+        tasks modules get imported, growing this process - and again once the
+        project & runtime config files are loaded, in case only those select
+        the fork server. (Starting it is a no-op the second time around.)
+        Otherwise, it starts upon spawning its first subprocess.
+
+        .. versionadded:: 3.1
+        """
+        backend = self.config.run.spawn_backend
+        if backend != "forkserver" or not forkserver.SUPPORTED:
+            return
+        debug("Starting fork server")
+        forkserver.get_fork_server().start()
+
     def parse_core(self, argv: Optional[List[str]]) -> None:
         debug("argv given to Program.run: {!r}".format(argv))
         self.normalize_argv(argv)
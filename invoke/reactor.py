@@ -0,0 +1,329 @@
+"""
+Single-threaded, selector-driven I/O multiplexing for subprocess streams.
+
+By default, every `.Runner` spins up one worker thread per subprocess stream
+(stdout, stderr and stdin). That is simple and robust, but means many hundreds
+of concurrent ``asynchronous=True`` commands cost many hundreds of OS threads.
+The `Reactor` in this module instead services any number of file descriptors
+from one shared background thread, using the `selectors` module (so: epoll,
+kqueue or plain ``select`` depending on platform).
+
+Users don't typically interact with this module directly; instead, set the
+``run.io_backend`` config option (or `~.Runner.run` kwarg) to ``"reactor"``.
+"""
+
+import os
+import selectors
+import sys
+import threading
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+from .util import ExceptionWrapper, debug
+
+
+class ReactorHandle:
+    """
+    A thread-like handle on one file descriptor being serviced by a `Reactor`.
+
+    Instances mimic the parts of the `.ExceptionHandlingThread` API which
+    `.Runner` relies upon (``start``, ``join``, ``is_alive``, ``is_dead`` and
+    ``exception``), so they may be stored alongside (or instead of) real IO
+    worker threads.
+
+    The wrapped ``callback`` is called (on the reactor thread) every time
+    ``fd`` becomes readable, and must return ``True`` if it wishes to keep
+    being called, or ``False`` once it is done (typically on EOF). Exceptions
+    raised by the callback are captured for later reraising, exactly as with
+    `.ExceptionHandlingThread`.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(
+        self,
+        reactor: "Reactor",
+        fd: int,
+        callback: Callable[[], bool],
+        stop_event: Optional[threading.Event] = None,
+        close_fd: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """
+        :param reactor: The `Reactor` which will service this handle.
+        :param int fd: The file descriptor to watch for readability.
+        :param callback: The callable to run when ``fd`` is readable.
+        :param stop_event:
+            An optional `threading.Event`; if it is set when `join` is called,
+            the handle is cancelled instead of waiting for ``callback`` to
+            signal completion. (Useful for streams without a well-defined
+            "end", such as stdin.)
+        :param bool close_fd:
+            Whether the handle owns ``fd``, closing it once the reactor has
+            stopped watching it.
+        :param kwargs:
+            Display-oriented keyword arguments, stored as ``self.kwargs`` for
+            use in `.ThreadException` output. Should usually include
+            ``target``.
+        """
+        self.reactor = reactor
+        self.fd = fd
+        self.callback = callback
+        self.stop_event = stop_event
+        self.close_fd = close_fd
+        self.kwargs = kwargs
+        self.exc_info: Optional[
+            Union[
+                Tuple[Type[BaseException], BaseException, TracebackType],
+                Tuple[None, None, None],
+            ]
+        ] = None
+        #: Same as `.ExceptionHandlingThread.on_exception`; called once the
+        #: handle has finished, if its callback raised an exception.
+        self.on_exception: Optional[Callable[[], None]] = None
+        self._done = threading.Event()
+
+    def start(self) -> None:
+        self.reactor.register(self)
+
+    def service(self) -> bool:
+        """
+        Run our callback once, returning whether to keep watching ``fd``.
+
+        Only called from the reactor thread.
+        """
+        try:
+            return bool(self.callback())
+        except BaseException:
+            self.exc_info = sys.exc_info()
+            msg = "Encountered exception {!r} in reactor handle for {!r}"
+            debug(msg.format(self.exc_info[1], self))
+            return False
+
+    def finish(self) -> None:
+        """
+        Mark this handle as done. Called once ``fd`` is no longer watched.
+        """
+        # Only now is it safe to close an owned fd: closing it while still
+        # registered would leave a stale (and possibly reused) selector key.
+        if self.close_fd and not self._done.is_set():
+            try:
+                os.close(self.fd)
+            except OSError:
+                # E.g. a bad fd, which never got registered to begin with.
+                pass
+        self._done.set()
+        if self.exc_info is not None and self.on_exception is not None:
+            self.on_exception()
+
+    def cancel(self) -> None:
+        """
+        Stop watching ``fd``, blocking until the reactor has let go of it.
+        """
+        if not self._done.is_set():
+            self.reactor.unregister(self)
+            self._done.wait()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.cancel()
+        self._done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return not self._done.is_set()
+
+    def exception(self) -> Optional[ExceptionWrapper]:
+        if self.exc_info is None:
+            return None
+        return ExceptionWrapper(self.kwargs, *self.exc_info)
+
+    @property
+    def is_dead(self) -> bool:
+        return (not self.is_alive()) and self.exc_info is not None
+
+    def __repr__(self) -> str:
+        target = self.kwargs.get("target", None)
+        return str(getattr(target, "__name__", self.fd))
+
+
+class Reactor:
+    """
+    Service many file descriptors' reads from a single background thread.
+
+    Handles are (un)registered from arbitrary threads; those requests are
+    queued and applied by the reactor thread itself, which is woken via a
+    self-pipe, so the underlying selector is only ever touched by one thread.
+
+    .. warning::
+        Handle callbacks run serially on the reactor thread, so a callback
+        which blocks (e.g. writing into a full subprocess stdin pipe) will
+        delay servicing of every other handle until it returns.
+
+    .. versionadded:: 3.1
+    """
+
+    #: How often, in seconds, to call any callables given to `add_poller`.
+    poll_interval = 0.01
+
+    def __init__(self) -> None:
+        self.selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Any]] = []
+        self._handles: Dict[int, ReactorHandle] = {}
+        self._pollers: List[Callable[[], bool]] = []
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, handle: ReactorHandle) -> None:
+        """
+        Begin watching ``handle.fd``, starting the reactor thread if needed.
+        """
+        self._submit("register", handle)
+
+    def unregister(self, handle: ReactorHandle) -> None:
+        """
+        Stop watching ``handle.fd``; its ``finish`` is called once done.
+        """
+        if threading.current_thread() is self._thread:
+            self._remove(handle)
+        else:
+            self._submit("unregister", handle)
+
+    def add_poller(self, poller: Callable[[], bool]) -> None:
+        """
+        Call ``poller`` repeatedly - at least every `poll_interval` seconds -
+        until it returns ``True``.
+
+        For conditions lacking a file descriptor to watch, e.g. exit of a
+        subprocess on platforms without `os.pidfd_open`. Like handle
+        callbacks, pollers run on the reactor thread and must not block; any
+        exception they raise is logged and treated as if they returned True.
+        """
+        self._submit("poll", poller)
+
+    @property
+    def handle_count(self) -> int:
+        """
+        The number of file descriptors currently being watched.
+        """
+        return len(self._handles)
+
+    def _submit(self, action: str, item: Any) -> None:
+        with self._lock:
+            self._pending.append((action, item))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="invoke-reactor", daemon=True
+                )
+                self._thread.start()
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            # Pipe already full of wakeups; the reactor will notice anyways.
+            pass
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for action, handle in pending:
+            if action == "poll":
+                self._pollers.append(handle)
+            elif action == "register":
+                try:
+                    self.selector.register(
+                        handle.fd, selectors.EVENT_READ, handle
+                    )
+                except (KeyError, ValueError, OSError):
+                    # Bad or already-watched fd; surface it like any other
+                    # handle error instead of killing the reactor thread.
+                    handle.exc_info = sys.exc_info()
+                    handle.finish()
+                    continue
+                self._handles[handle.fd] = handle
+            else:
+                self._remove(handle)
+
+    def _remove(self, handle: ReactorHandle) -> None:
+        if self._handles.get(handle.fd) is handle:
+            del self._handles[handle.fd]
+            self.selector.unregister(handle.fd)
+        handle.finish()
+
+    def _poll(self) -> None:
+        remaining = []
+        for poller in self._pollers:
+            try:
+                finished = poller()
+            except BaseException as e:
+                msg = "Encountered exception {!r} in reactor poller {!r}"
+                debug(msg.format(e, poller))
+                finished = True
+            if not finished:
+                remaining.append(poller)
+        self._pollers = remaining
+
+    def _loop(self) -> None:
+        while True:
+            self._apply_pending()
+            if self._pollers:
+                self._poll()
+            timeout = self.poll_interval if self._pollers else None
+            for key, _ in self.selector.select(timeout):
+                if key.fd == self._wake_r:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                handle = cast(ReactorHandle, key.data)
+                # May have been removed by an earlier callback this round.
+                if self._handles.get(key.fd) is not handle:
+                    continue
+                if not handle.service():
+                    self._remove(handle)
+
+
+_reactor: Optional[Reactor] = None
+_reactor_lock = threading.Lock()
+
+
+def get_reactor() -> Reactor:
+    """
+    Return the process-wide shared `Reactor`, creating it if necessary.
+
+    .. versionadded:: 3.1
+    """
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = Reactor()
+        return _reactor
+
+
+def _forget_reactor() -> None:
+    # Forked children inherit our Reactor object but not its thread (or, in
+    # any meaningful sense, its registrations), so make them start afresh.
+    global _reactor, _reactor_lock
+    _reactor = None
+    _reactor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_reactor)
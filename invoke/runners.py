@@ -1,14 +1,31 @@
+import asyncio
+import codecs
 import errno
+import io
 import locale
+import mmap
 import os
+import select
+import shlex
+import shutil
 import signal
+import stat
 import struct
 import sys
 import threading
 import time
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    Future,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from contextlib import AbstractContextManager
-from subprocess import PIPE, Popen
-from types import TracebackType
+from functools import partial
+from subprocess import DEVNULL, PIPE, Popen
+from types import MappingProxyType, TracebackType
 from typing import (
     IO,
     TYPE_CHECKING,
@@ -16,10 +33,16 @@ from typing import (
     Callable,
     Dict,
     Generator,
+    Iterable,
     List,
+    Mapping,
+    NamedTuple,
     Optional,
+    Set,
     Tuple,
     Type,
+    Union,
+    cast,
 )
 
 # Import some platform-specific things at top level so they can be mocked for
@@ -37,6 +60,7 @@ try:
 except ImportError:
     termios = None  # type: ignore[assignment]
 
+from .capture import CaptureBuffer, NullBuffer, SpillBuffer, TailBuffer
 from .exceptions import (
     CommandTimedOut,
     Failure,
@@ -45,18 +69,28 @@ from .exceptions import (
     UnexpectedExit,
     WatcherError,
 )
+from . import forkserver
+from .forkserver import ServedProcess, get_fork_server
+from .reactor import ReactorHandle, get_reactor
+from .sinks import CoalescingWriter
 from .terminals import (
     WINDOWS,
     bytes_to_read,
     character_buffered,
     pty_size,
     ready_for_reading,
+    wait_for_reading,
+)
+from .util import (
+    ExceptionHandlingThread,
+    ExceptionWrapper,
+    has_fileno,
+    isatty,
 )
-from .util import ExceptionHandlingThread, has_fileno, isatty
+from .watchers import StreamWatcher, StreamWindow
 
 if TYPE_CHECKING:
     from .context import Context
-    from .watchers import StreamWatcher
 
 
 class Runner:
@@ -74,6 +108,9 @@ class Runner:
     using_pty: bool
     read_chunk_size = 1000
     input_sleep = 0.01
+    input_block_size = 65536
+    output_flush_interval = 0.05
+    output_flush_size = 65536
 
     def __init__(self, context: "Context") -> None:
         """
@@ -105,25 +142,66 @@ class Runner:
         # place. If I don't do this here, it goes 'class vars -> __init__
         # docstring -> instance vars' :( TODO: consider just merging class and
         # __init__ docstrings, though that's annoying too.
-        #: How many bytes (at maximum) to read per iteration of stream reads.
+        #: How many bytes to read per iteration of stream reads, initially.
+        #:
+        #: Reads grow from here - doubling while the subprocess keeps filling
+        #: them, up to the ``read_chunk_max`` option of `run` - and shrink
+        #: back when they come up short. The ``read_chunk_min`` option of
+        #: `run` overrides this value.
+        #:
+        #: .. versionchanged:: 3.1
+        #:     Became the starting point for adaptive read sizing, instead of a
+        #:     fixed size.
         self.read_chunk_size = self.__class__.read_chunk_size
         # Ditto re: declaring this in 2 places for doc reasons.
         #: How many seconds to sleep on each iteration of the stdin read loop
         #: and other otherwise-fast loops.
         self.input_sleep = self.__class__.input_sleep
+        #: How many bytes (at maximum) to forward per wakeup of the stdin
+        #: mirroring loop, when stdin is a non-terminal file descriptor (such
+        #: as a pipe or regular file).
+        self.input_block_size = self.__class__.input_block_size
+        #: Maximum number of seconds output replayed into a non-terminal
+        #: ``out_stream``/``err_stream`` may sit unflushed; see
+        #: `write_our_output`. ``0`` flushes every write.
+        self.output_flush_interval = self.__class__.output_flush_interval
+        #: Maximum number of characters of output replayed into a
+        #: non-terminal stream between flushes; see `write_our_output`.
+        self.output_flush_size = self.__class__.output_flush_size
         #: Whether pty fallback warning has been emitted.
         self.warned_about_pty_fallback = False
+        #: `time.monotonic` value from just before `start` was called, if it
+        #: has been.
+        #:
+        #: .. versionadded:: 3.1
+        self.start_time: Optional[float] = None
         #: A list of `.StreamWatcher` instances for use by `respond`. Is filled
         #: in at runtime by `run`.
         self.watchers: List["StreamWatcher"] = []
         # Optional timeout timer placeholder
         self._timer: Optional[threading.Timer] = None
+        # Per-stream StreamWindows for incremental watchers; see respond()
+        self._windows: Dict[int, StreamWindow] = {}
+        # Per-stream decoding state for captured output; see _decode_output()
+        self._output_state: Dict[int, Dict[str, Any]] = {}
+        # Flush-coalescing wrappers for non-terminal output streams (or None
+        # for terminals), keyed by stream id(); see write_our_output()
+        self._writers: Dict[int, Optional[CoalescingWriter]] = {}
+        # Write end of the pipe a blocking handle_stdin waits on alongside
+        # stdin itself, so _finish can wake it up; see _stdin_finished().
+        self._stdin_wakeup: Optional[int] = None
+        self._stdin_wakeup_lock = threading.Lock()
         # Async flags (initialized for 'finally' referencing in case something
         # goes REAL bad during options parsing)
         self._asynchronous = False
         self._disowned = False
+        #: The argument vector to execute, when `run` was given one instead
+        #: of a command string; ``None`` otherwise.
+        #:
+        #: .. versionadded:: 3.1
+        self.argv: Optional[List[str]] = None
 
-    def run(self, command: str, **kwargs: Any) -> "Result":
+    def run(self, command: Union[str, List[str]], **kwargs: Any) -> "Result":
         """
         Execute ``command``, returning an instance of `Result` once complete.
 
@@ -145,7 +223,22 @@ class Runner:
             the ``echo`` keyword, etc). The base default values are described
             in the parameter list below.
 
-        :param str command: The shell command to execute.
+        :param command:
+            The shell command to execute, as a string.
+
+            Alternately, a list of strings, used as-is as the argument vector
+            of the program to execute - without any shell getting involved,
+            so no quoting is needed (or performed), and there's no cost of
+            starting a shell. `Local` uses `os.posix_spawn` to do so where
+            the platform allows, which is far cheaper than forking a large
+            Python process. (Runners unable to execute an argument vector
+            directly, such as remote ones, run the equivalent
+            `shlex.join`-ed string via ``shell`` instead; that string is also
+            what gets echoed and stored as `Result.command`.) Programs which
+            can't be found raise `FileNotFoundError`.
+
+            .. versionchanged:: 3.1
+                Added support for argument vectors.
 
         :param bool asynchronous:
             When set to ``True`` (default ``False``), enables asynchronous
@@ -173,7 +266,58 @@ class Runner:
                   as a context manager - it will automatically ``join`` at the
                   exit of the context block.
 
+            Alternately, ``asynchronous="future"`` behaves the same, but
+            returns a `concurrent.futures.Future` (see `Promise.as_future`)
+            instead of a `Promise`.
+
             .. versionadded:: 1.4
+            .. versionchanged:: 3.1
+                Added the ``"future"`` option.
+
+        :param capture:
+            How to store subprocess output for the eventual `Result`. One of:
+
+            - ``True`` (the default): keep all of it in memory.
+            - ``"tail"``: keep only the last ``capture_limit`` bytes of each
+              stream in memory, discarding older output as new output arrives.
+              `Result.tail` - and thus the error messages of
+              `~invoke.exceptions.UnexpectedExit` - work as usual, but the
+              ``stdout``/``stderr`` attributes are truncated.
+            - ``"spill"``: keep up to ``capture_limit`` bytes of each stream in
+              memory, then move it to a temporary file which is memory-mapped
+              by the final `Result`; see `Result.raw`.
+            - ``False``: don't keep any of it. Useful when only the exit code
+              and live output matter. The `Result`'s ``stdout`` and
+              ``stderr`` will be empty (and its ``captured`` attribute
+              ``False``.)
+
+            This has no effect on display of output, or on ``watchers``.
+
+            .. note::
+                When ``capture=False``, no ``watchers`` are given, ``pty`` is
+                off and an output stream (``out_stream``/``err_stream``) is a
+                regular file or pipe (not a terminal), `Local` hands that file
+                descriptor straight to the subprocess instead of copying
+                output through a pipe - and hidden streams go to
+                ``/dev/null``. Output then arrives unencoded and exactly as
+                the subprocess wrote it.
+
+            .. versionadded:: 3.1
+
+        :param int capture_limit:
+            Number of bytes (per stream) retained or held in memory when
+            ``capture`` is ``"tail"`` or ``"spill"``, respectively. Default:
+            ``1048576`` (1 MiB).
+
+            .. versionadded:: 3.1
+
+        :param str cwd:
+            Directory in which to execute the command. Default: ``None``,
+            meaning our own working directory. Honored by `Local` and
+            `AsyncLocal`. (`.Context.cd` works differently for string
+            commands, prefixing them with a shell ``cd`` instead.)
+
+            .. versionadded:: 3.1
 
         :param bool disown:
             When set to ``True`` (default ``False``), returns immediately like
@@ -306,6 +450,21 @@ class Runner:
                 ``hide=True`` will also override ``echo=True`` if both are
                 given (either as kwargs or via config/CLI).
 
+        :param str io_backend:
+            Selects how subprocess streams are serviced while the command runs.
+            The default, ``"threads"``, uses one worker thread per stream (so
+            up to three per command). ``"reactor"`` instead hands the streams
+            to a single, process-wide `~invoke.reactor.Reactor` thread, keeping
+            the thread count flat no matter how many commands (typically
+            ``asynchronous=True`` ones) are in flight at once.
+
+            Whether this has any effect depends on the specific `Runner`
+            subclass; `Local` honors it on POSIX platforms. Interactive
+            (terminal) or non-fileno ``in_stream`` values are still mirrored
+            by a dedicated thread.
+
+            .. versionadded:: 3.1
+
         :param in_stream:
             A file-like stream object to used as the subprocess' standard
             input. If ``None`` (the default), ``sys.stdin`` will be used.
@@ -336,6 +495,23 @@ class Runner:
                 result attribute. ``err_stream`` and ``stderr`` will always be
                 empty when ``pty=True``.
 
+        :param int read_chunk_max:
+            Largest read, in bytes, made against the subprocess' output
+            streams. Reads start at ``read_chunk_min`` bytes and double each
+            time the subprocess fills one, up to this size, so large outputs
+            need far fewer (and cheaper) read calls; they shrink again when
+            reads come back short. Default: ``1048576`` (1 MiB). Setting it to
+            ``read_chunk_min`` turns adaptive sizing off.
+
+            .. versionadded:: 3.1
+
+        :param int read_chunk_min:
+            Smallest (and initial) read size, in bytes; see
+            ``read_chunk_max``. Default: ``None``, meaning
+            `Runner.read_chunk_size`.
+
+            .. versionadded:: 3.1
+
         :param bool replace_env:
             When ``True``, causes the subprocess to receive the dictionary
             given to ``env`` as its entire shell environment, instead of
@@ -346,6 +522,20 @@ class Runner:
             Which shell binary to use. Default: ``/bin/bash`` (on Unix;
             ``COMSPEC`` or ``cmd.exe`` on Windows.)
 
+        :param str spawn_backend:
+            Selects how the subprocess gets started. The default,
+            ``"direct"``, spawns it from this process. ``"forkserver"``
+            instead asks a small helper process - see `invoke.forkserver` -
+            to spawn it, which avoids the cost of forking a large Python
+            process (and of copying its page tables) for every command.
+
+            Whether this has any effect depends on the specific `Runner`
+            subclass; `Local` honors it on POSIX platforms, for ``pty=False``
+            only. `.Program` starts the helper early on when this is set in
+            its config, while the process is still small.
+
+            .. versionadded:: 3.1
+
         :param timeout:
             Cause the runner to submit an interrupt to the subprocess and raise
             `.CommandTimedOut`, if the command takes longer than ``timeout``
@@ -400,7 +590,11 @@ class Runner:
         .. versionadded:: 1.0
         """
         try:
-            return self._run_body(command, **kwargs)
+            result = self._run_body(command, **kwargs)
+            # NOTE: asynchronous="future" yields a Future instead (see above);
+            # being opt-in, it's left out of our annotation, sparing every
+            # other caller from narrowing the result.
+            return cast("Result", result)
         finally:
             if not (self._asynchronous or self._disowned):
                 self.stop()
@@ -408,12 +602,21 @@ class Runner:
     def echo(self, command: str) -> None:
         print(self.opts["echo_format"].format(command=command))
 
-    def _setup(self, command: str, kwargs: Any) -> None:
+    def _setup(self, command: Union[str, List[str]], kwargs: Any) -> str:
         """
         Prepare data on ``self`` so we're ready to start running.
+
+        Returns the command as a string, for display and for `start`.
         """
         # Normalize kwargs w/ config; sets self.opts, self.streams
         self._unify_kwargs_with_config(kwargs)
+        # Argument vectors are spelled out as equivalent shell commands for
+        # display & runners which can't use them, and kept around for those
+        # which can.
+        self.argv = None
+        if isinstance(command, (list, tuple)):
+            self.argv = list(command)
+            command = shlex.join(self.argv)
         # Environment setup
         self.env = self.generate_env(
             self.opts["env"], self.opts["replace_env"]
@@ -435,16 +638,20 @@ class Runner:
             hide=self.opts["hide"],
             encoding=self.encoding,
         )
+        return command
 
-    def _run_body(self, command: str, **kwargs: Any) -> "Result":
+    def _run_body(
+        self, command: Union[str, List[str]], **kwargs: Any
+    ) -> Union["Result", "Promise", "Future[Result]"]:
         # Prepare all the bits n bobs.
-        self._setup(command, kwargs)
+        command = self._setup(command, kwargs)
         # If dry-run, stop here.
         if self.opts["dry"]:
             return self.generate_result(
                 **dict(self.result_kwargs, stdout="", stderr="", exited=0)
             )
         # Start executing the actual command (runs in background)
+        self.start_time = time.monotonic()
         self.start(command, self.opts["shell"], self.env)
         # Update result data with anything only obtainable post-start.
         self.result_kwargs["pid"] = self.get_pid()
@@ -466,6 +673,9 @@ class Runner:
         for thread in self.threads.values():
             thread.start()
         # Wrap up or promise that we will, depending
+        if self._asynchronous == "future":
+            # NOTE: not a Result; see the 'asynchronous' docs in run().
+            return self.make_promise().as_future()
         return self.make_promise() if self._asynchronous else self._finish()
 
     def make_promise(self) -> "Promise":
@@ -497,6 +707,7 @@ class Runner:
         finally:
             # Inform stdin-mirroring worker to stop its eternal looping
             self.program_finished.set()
+            self._stdin_finished()
             # Join threads, storing inner exceptions, & set a timeout if
             # necessary. (Segregate WatcherErrors as they are "anticipated
             # errors" that want to show up at the end during creation of
@@ -512,6 +723,7 @@ class Runner:
                         watcher_errors.append(real)
                     else:
                         thread_exceptions.append(exception)
+            self._flush_output()
         # If any exceptions appeared inside the threads, raise them now as an
         # aggregate exception object.
         # NOTE: this is kept outside the 'finally' so that main-thread
@@ -519,6 +731,9 @@ class Runner:
         # likely to be Big Serious Problems.
         if thread_exceptions:
             raise ThreadException(thread_exceptions)
+        return self._result_or_raise(watcher_errors)
+
+    def _result_or_raise(self, watcher_errors: List[WatcherError]) -> "Result":
         # Collate stdout/err, calculate exited, and get final result obj
         result = self._collate_result(watcher_errors)
         # Any presence of WatcherError from the threads indicates a watcher was
@@ -564,6 +779,14 @@ class Runner:
         if self._asynchronous and self._disowned:
             err = "Cannot give both 'asynchronous' and 'disown' at the same time!"  # noqa
             raise ValueError(err)
+        async_values = (True, False, "future")
+        if self._asynchronous not in async_values:
+            err = "'asynchronous' got {!r} which is not in {!r}"
+            raise ValueError(err.format(self._asynchronous, async_values))
+        capture_values = (True, False, "tail", "spill")
+        if opts["capture"] not in capture_values:
+            err = "'capture' got {!r} which is not in {!r}"
+            raise ValueError(err.format(opts["capture"], capture_values))
         # If hide was True, turn off echoing
         if opts["hide"] is True:
             opts["echo"] = False
@@ -599,16 +822,8 @@ class Runner:
     def _collate_result(self, watcher_errors: List[WatcherError]) -> "Result":
         # At this point, we had enough success that we want to be returning or
         # raising detailed info about our execution; so we generate a Result.
-        stdout = "".join(self.stdout)
-        stderr = "".join(self.stderr)
-        if WINDOWS:
-            # "Universal newlines" - replace all standard forms of
-            # newline with \n. This is not technically Windows related
-            # (\r as newline is an old Mac convention) but we only apply
-            # the translation for Windows as that's the only platform
-            # it is likely to matter for these days.
-            stdout = stdout.replace("\r\n", "\n").replace("\r", "\n")
-            stderr = stderr.replace("\r\n", "\n").replace("\r", "\n")
+        # NOTE: the raw captured bytes are handed over as-is; Result only
+        # decodes them if & when its stdout/stderr are actually used.
         # Get return/exit code, unless there were WatcherErrors to handle.
         # NOTE: In that case, returncode() may block waiting on the process
         # (which may be waiting for user input). Since most WatcherError
@@ -619,7 +834,12 @@ class Runner:
         # generate_result()'s API in next major rev so we can tidy up.
         result = self.generate_result(
             **dict(
-                self.result_kwargs, stdout=stdout, stderr=stderr, exited=exited
+                self.result_kwargs,
+                stdout_bytes=_finish_capture(self.stdout),
+                stderr_bytes=_finish_capture(self.stderr),
+                captured=self.opts["capture"] is not False,
+                exited=exited,
+                resources=self.resources(),
             )
         )
         return result
@@ -642,15 +862,25 @@ class Runner:
 
     def create_io_threads(
         self,
-    ) -> Tuple[Dict[Callable, ExceptionHandlingThread], List[str], List[str]]:
+    ) -> Tuple[
+        Dict[Callable, ExceptionHandlingThread], CaptureBuffer, CaptureBuffer
+    ]:
         """
         Create and return a dictionary of IO thread worker objects.
 
         Caller is expected to handle persisting and/or starting the wrapped
         threads.
+
+        Also returned are the (initially empty) capture buffers for stdout and
+        stderr, into which the workers will store raw output; these are
+        `bytearray` objects, or one of their `invoke.capture` alternatives
+        depending on the ``capture`` option.
+
+        .. versionchanged:: 3.1
+            Capture buffers are now `bytearray` (or similar) objects instead
+            of lists of decoded strings.
         """
-        stdout: List[str] = []
-        stderr: List[str] = []
+        stdout, stderr = self._new_capture_buffers()
         # Set up IO thread parameters (format - body_func: {kwargs})
         thread_args: Dict[Callable, Any] = {
             self.handle_stdout: {
@@ -679,9 +909,35 @@ class Runner:
         threads = {}
         for target, kwargs in thread_args.items():
             t = ExceptionHandlingThread(target=target, kwargs=kwargs)
+            t.on_exception = self._io_worker_died
             threads[target] = t
         return threads, stdout, stderr
 
+    def _new_capture_buffers(self) -> Tuple[CaptureBuffer, CaptureBuffer]:
+        # Fresh stdout & stderr buffers, plus fresh watcher windows, decoders
+        # and writers to go with them (keyed by their id()s).
+        self._windows = {}
+        self._output_state = {}
+        self._writers = {}
+        return self._capture_buffer(), self._capture_buffer()
+
+    def _capture_buffer(self) -> CaptureBuffer:
+        # New, empty buffer for one stream, honoring the 'capture' option.
+        capture, limit = self.opts["capture"], self.opts["capture_limit"]
+        if capture == "tail":
+            return TailBuffer(limit)
+        if capture == "spill":
+            return SpillBuffer(limit)
+        if capture is False:
+            return NullBuffer()
+        return bytearray()
+
+    def _io_worker_died(self) -> None:
+        # Called from within IO workers which encountered an exception, just
+        # before they exit. Subclasses whose wait() blocks on something other
+        # than polling has_dead_threads can use this to wake up early.
+        pass
+
     def generate_result(self, **kwargs: Any) -> "Result":
         """
         Create & return a suitable `Result` instance from the given ``kwargs``.
@@ -714,6 +970,9 @@ class Runner:
             `read_chunk_size` bytes read from the subprocess' out/err stream.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Only called when overridden; by default, output is captured as
+            raw bytes and only decoded when needed.
         """
         # NOTE: Typically, reading from any stdout/err (local, remote or
         # otherwise) can be thought of as "read until you get nothing back".
@@ -721,10 +980,12 @@ class Runner:
         # process is done running" because sometimes that signal will appear
         # before we've actually read all the data in the stream (i.e.: a race
         # condition).
+        size = self._read_chunk_bounds()[0]
         while True:
-            data = reader(self.read_chunk_size)
+            data = reader(size)
             if not data:
                 break
+            size = self._next_read_chunk_size(size, len(data))
             yield self.decode(data)
 
     def write_our_output(self, stream: IO, string: str) -> None:
@@ -732,7 +993,10 @@ class Runner:
         Write ``string`` to ``stream``.
 
         Also calls ``.flush()`` on ``stream`` to ensure that real terminal
-        streams don't buffer.
+        streams don't buffer. Other streams (pipes, files and the like) are
+        flushed in batches instead - at least every `output_flush_interval`
+        seconds or `output_flush_size` characters, and once the command is
+        done - via a `.CoalescingWriter`.
 
         :param stream:
             A file-like stream object, mapping to the ``out_stream`` or
@@ -743,36 +1007,167 @@ class Runner:
         :returns: ``None``.
 
         .. versionadded:: 1.0
-        """
-        stream.write(string)
-        stream.flush()
+        .. versionchanged:: 3.1
+            Coalesce flushes of non-terminal streams.
+        """
+        key = id(stream)
+        if key not in self._writers:
+            writer = None
+            if not isatty(stream):
+                writer = CoalescingWriter(
+                    stream,
+                    interval=self.output_flush_interval,
+                    size=self.output_flush_size,
+                )
+            self._writers.setdefault(key, writer)
+        writer = self._writers[key]
+        if writer is None:
+            stream.write(string)
+            stream.flush()
+        else:
+            writer.write(string)
+
+    def _flush_output(self) -> None:
+        # Push out anything our coalescing writers are still sitting on.
+        for writer in list(self._writers.values()):
+            if writer is not None:
+                writer.flush()
 
     def _handle_output(
         self,
-        buffer_: List[str],
+        buffer_: CaptureBuffer,
         hide: bool,
         output: IO,
         reader: Callable,
     ) -> None:
-        # TODO: store un-decoded/raw bytes somewhere as well...
-        for data in self.read_proc_output(reader):
-            # Echo to local stdout if necessary
-            # TODO: should we rephrase this as "if you want to hide, give me a
-            # dummy output stream, e.g. something like /dev/null"? Otherwise, a
-            # combo of 'hide=stdout' + 'here is an explicit out_stream' means
-            # out_stream is never written to, and that seems...odd.
-            if not hide:
-                self.write_our_output(stream=output, string=data)
-            # Store in shared buffer so main thread can do things with the
-            # result after execution completes.
-            # NOTE: this is threadsafe insofar as no reading occurs until after
-            # the thread is join()'d.
-            buffer_.append(data)
-            # Run our specific buffer through the autoresponder framework
-            self.respond(buffer_)
+        # NOTE: like read_proc_output, but without decoding each chunk up
+        # front; see _handle_output_chunk. Subclasses overriding
+        # read_proc_output still get it called, at the cost of that.
+        if self._overrides("read_proc_output"):
+            for text in self.read_proc_output(reader):
+                self._handle_output_text(buffer_, hide, output, text)
+            return
+        size = self._read_chunk_bounds()[0]
+        while True:
+            data = reader(size)
+            if not data:
+                break
+            size = self._next_read_chunk_size(size, len(data))
+            self._handle_output_chunk(buffer_, hide, output, data)
+        self._handle_output_chunk(buffer_, hide, output, b"", final=True)
+
+    def _overrides(self, name: str) -> bool:
+        # Whether a subclass overrides the named public IO hook, which our
+        # fast paths (reading straight into byte buffers) would bypass.
+        return getattr(type(self), name) is not getattr(Runner, name)
+
+    def _read_chunk_bounds(self) -> Tuple[int, int]:
+        # Smallest (and initial) & largest sizes for reads of subprocess
+        # output, per the read_chunk_min/max options.
+        low = self.opts["read_chunk_min"] or self.read_chunk_size
+        return low, max(low, self.opts["read_chunk_max"])
+
+    def _next_read_chunk_size(self, size: int, received: int) -> int:
+        # Reads which come back full imply more data is waiting, so ask for
+        # more next time - fewer, bigger reads mean far less per-chunk
+        # overhead on large outputs. Reads which come back well short imply
+        # the subprocess is trickling, so back off again.
+        low, high = self._read_chunk_bounds()
+        if received >= size:
+            return min(size * 2, high)
+        if received < size // 2:
+            return max(size // 2, low)
+        return size
+
+    def _handle_output_chunk(
+        self,
+        buffer_: CaptureBuffer,
+        hide: bool,
+        output: IO,
+        data: bytes,
+        final: bool = False,
+    ) -> None:
+        # Subclasses decoding output themselves get exactly that captured.
+        if self._overrides("decode"):
+            text = self.decode(data) if data else ""
+            self._handle_output_text(buffer_, hide, output, text)
+            return
+        # Store raw bytes in shared buffer so main thread can do things with
+        # the result after execution completes.
+        # NOTE: this is threadsafe insofar as no reading occurs until after
+        # the thread is join()'d.
+        buffer_.extend(data)
+        # Nobody wants to see this output as text (yet), so skip decoding it
+        # entirely; Result will decode it later if asked.
+        if hide and not self.watchers:
+            return
+        text = self._decode_output(buffer_, data, final)
+        self._emit_output(buffer_, hide, output, text)
+
+    def _handle_output_text(
+        self, buffer_: CaptureBuffer, hide: bool, output: IO, text: str
+    ) -> None:
+        # Counterpart to _handle_output_chunk for output which has already
+        # been decoded (by an overridden read_proc_output or decode).
+        buffer_.extend(text.encode(self.encoding, "replace"))
+        self._emit_output(buffer_, hide, output, text)
+
+    def _emit_output(
+        self, buffer_: CaptureBuffer, hide: bool, output: IO, text: str
+    ) -> None:
+        if not text:
+            return
+        # Echo to local stdout if necessary
+        # TODO: should we rephrase this as "if you want to hide, give me a
+        # dummy output stream, e.g. something like /dev/null"? Otherwise, a
+        # combo of 'hide=stdout' + 'here is an explicit out_stream' means
+        # out_stream is never written to, and that seems...odd.
+        if not hide:
+            self.write_our_output(stream=output, string=text)
+        # Run decoded stream data through the autoresponder framework
+        if self.watchers:
+            state = self._output_state.setdefault(id(buffer_), {})
+            seen = state.setdefault("seen", [])
+            seen.append(text)
+            self.respond(seen)
+            # Only legacy watchers need to see the whole stream again later.
+            if all(x.lookback is not None for x in self.watchers):
+                del seen[:-1]
+
+    def _decode_output(
+        self, buffer_: CaptureBuffer, data: bytes, final: bool
+    ) -> str:
+        # Decode a chunk of the stream captured into buffer_. Decoding is
+        # incremental, so multibyte characters split across reads survive.
+        state = self._output_state.setdefault(id(buffer_), {})
+        if "decoder" not in state:
+            factory = codecs.getincrementaldecoder(self.encoding)
+            state["decoder"] = factory("replace")
+            state.setdefault("seen", [])
+        return state["decoder"].decode(data, final)
+
+    def _pump_output(
+        self,
+        buffer_: CaptureBuffer,
+        hide: bool,
+        output: IO,
+        reader: Callable,
+    ) -> bool:
+        # Single-read counterpart to _handle_output, for use by event-driven
+        # IO backends which call us whenever the stream is readable. Returns
+        # whether the stream is still open.
+        state = self._output_state.setdefault(id(buffer_), {})
+        size = state.get("size") or self._read_chunk_bounds()[0]
+        data = reader(size)
+        if not data:
+            self._handle_output_chunk(buffer_, hide, output, b"", final=True)
+            return False
+        state["size"] = self._next_read_chunk_size(size, len(data))
+        self._handle_output_chunk(buffer_, hide, output, data)
+        return True
 
     def handle_stdout(
-        self, buffer_: List[str], hide: bool, output: IO
+        self, buffer_: CaptureBuffer, hide: bool, output: IO
     ) -> None:
         """
         Read process' stdout, storing into a buffer & printing/parsing.
@@ -780,7 +1175,10 @@ class Runner:
         Intended for use as a thread target. Only terminates when all stdout
         from the subprocess has been read.
 
-        :param buffer_: The capture buffer shared with the main thread.
+        :param buffer_:
+            The capture buffer shared with the main thread; a `bytearray`
+            (or `invoke.capture` equivalent) which receives the raw,
+            undecoded output.
         :param bool hide: Whether or not to replay data into ``output``.
         :param output:
             Output stream (file-like object) to write data into when not
@@ -789,13 +1187,16 @@ class Runner:
         :returns: ``None``.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            ``buffer_`` is now a `bytearray`; output is only decoded when it
+            needs displaying or handing to watchers.
         """
         self._handle_output(
             buffer_, hide, output, reader=self.read_proc_stdout
         )
 
     def handle_stderr(
-        self, buffer_: List[str], hide: bool, output: IO
+        self, buffer_: CaptureBuffer, hide: bool, output: IO
     ) -> None:
         """
         Read process' stderr, storing into a buffer & printing/parsing.
@@ -870,6 +1271,17 @@ class Runner:
             semantics as `handle_stdout` are used - the stream is simply
             ``read()`` from until it returns an empty value.
 
+        Streams with a real file descriptor are (on non-Windows platforms)
+        waited upon with ``select``, alongside an internal pipe which is
+        written to once `program_finished` is set, so no time is spent
+        sleeping or polling. Every wakeup forwards all the data which is
+        available at that time (up to `input_block_size` bytes) in a single
+        write; buffered streams, and text streams over them, are read via
+        ``read1`` so as not to wait for more, while other file-like objects
+        with a file descriptor are read a character at a time. The rest are
+        read from a character at a time, pausing `input_sleep` seconds in
+        between.
+
         :param input_: Stream (file-like object) from which to read.
         :param output: Stream (file-like object) to which echoing may occur.
         :param bool echo: User override option for stdin-stdout echoing.
@@ -877,7 +1289,11 @@ class Runner:
         :returns: ``None``.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Wait on file descriptor-backed streams instead of polling them.
         """
+        if has_fileno(input_) and not WINDOWS:
+            return self._handle_stdin_blocking(input_, output, echo)
         # TODO: reinstate lock/whatever thread logic from fab v1 which prevents
         # reading from stdin while other parts of the code are prompting for
         # runtime passwords? (search for 'input_enabled')
@@ -915,6 +1331,107 @@ class Runner:
                 # Take a nap so we're not chewing CPU.
                 time.sleep(self.input_sleep)
 
+    def _handle_stdin_blocking(
+        self, input_: IO, output: IO, echo: Optional[bool]
+    ) -> None:
+        # Event-driven flavor of handle_stdin's loop: sleep in select() until
+        # either stdin has data, or _stdin_finished pokes our wakeup pipe.
+        state = dict(input_=input_, output=output, echo=echo, decoder=None)
+        read_fd, write_fd = os.pipe()
+        with self._stdin_wakeup_lock:
+            self._stdin_wakeup = write_fd
+        # The program may have finished before there was a pipe to poke.
+        if self.program_finished.is_set():
+            self._stdin_finished()
+        try:
+            with character_buffered(input_):
+                while True:
+                    if wait_for_reading(input_, read_fd):
+                        if not self._forward_stdin(state):
+                            break
+                    # Same dual all-done signal as the polling loop: the
+                    # program is done *and* stdin has nothing for us.
+                    elif self.program_finished.is_set():
+                        break
+        finally:
+            with self._stdin_wakeup_lock:
+                self._stdin_wakeup = None
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def _stdin_finished(self) -> None:
+        # Wake up a blocking handle_stdin, if any, now that program_finished
+        # is set.
+        with self._stdin_wakeup_lock:
+            if self._stdin_wakeup is not None:
+                os.write(self._stdin_wakeup, b"\0")
+
+    def _forward_stdin(self, state: Dict[str, Any]) -> bool:
+        # Forward one block of readable stdin to the subprocess, echoing it if
+        # necessary. Returns False once there's no point reading any further.
+        input_, output = state["input_"], state["output"]
+        data = self._read_stdin_block(input_, state)
+        if data:
+            self.write_proc_stdin(data)
+            if state["echo"] is None:
+                state["echo"] = self.should_echo_stdin(input_, output)
+            if state["echo"]:
+                self.write_our_output(stream=output, string=data)
+            return True
+        # Partial multibyte character, or similar; keep watching.
+        if data is None:
+            return True
+        # EOF; no more stdin is coming, so let the subprocess know.
+        if not self.using_pty:
+            self.close_proc_stdin()
+        return False
+
+    def _read_stdin_block(
+        self, input_: IO, state: Dict[str, Any]
+    ) -> Optional[str]:
+        # Read everything currently available from a readable input_. Returns
+        # text, the empty string on EOF, or None if nothing useful was read.
+        try:
+            data = self._read_available(input_)
+        except OSError as e:
+            # See read_our_stdin re: nohup; treat it as EOF.
+            if e.errno != errno.EBADF:
+                raise
+            return ""
+        if not isinstance(data, bytes):
+            return data
+        if not data:
+            return ""
+        # Blocks may well end partway through a multibyte character, so
+        # decode incrementally instead of via self.decode().
+        if state["decoder"] is None:
+            factory = codecs.getincrementaldecoder(self.encoding)
+            state["decoder"] = factory("replace")
+        return state["decoder"].decode(data) or None
+
+    def _read_available(self, input_: IO) -> Union[bytes, str]:
+        # Read up to input_block_size bytes from input_, without blocking
+        # for more than a single underlying read: plain read()s of buffered
+        # streams would wait until the whole block filled up. read1() also
+        # hands over whatever Python has already buffered first.
+        size = self.input_block_size
+        if isatty(input_):
+            return input_.read(bytes_to_read(input_))
+        if isinstance(input_, io.RawIOBase):
+            return input_.read(size)
+        if isinstance(input_, io.BufferedIOBase):
+            return input_.read1(size)
+        # Text streams over a binary one (e.g. sys.stdin, or files opened in
+        # text mode): read the latter, and decode blocks ourselves.
+        buffer = getattr(input_, "buffer", None)
+        if isinstance(buffer, io.BufferedIOBase):
+            return buffer.read1(size)
+        # Other file-like objects; those with a file descriptor may block
+        # until 'size' characters arrive, so are read one at a time.
+        if has_fileno(input_):
+            return input_.read(bytes_to_read(input_))
+        return input_.read(size)
+
     def should_echo_stdin(self, input_: IO, output: IO) -> bool:
         """
         Determine whether data read from ``input_`` should echo to ``output``.
@@ -937,28 +1454,56 @@ class Runner:
         from the ``watchers`` kwarg of `run` - see :doc:`/concepts/watchers`
         for a conceptual overview.
 
+        Incremental watchers (those with a non-``None``
+        `~.StreamWatcher.lookback`) are handed a per-stream `.StreamWindow`
+        holding only the newest chunk (``buffer_[-1]``) plus bounded lookback;
+        all others receive the entire stream contents, as before.
+
         :param buffer:
-            The capture buffer for this thread's particular IO stream.
+            A list of the decoded chunks read so far from this thread's
+            particular IO stream. (When no legacy watchers are in use, chunks
+            older than the newest one are discarded.)
 
         :returns: ``None``.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Added support for incremental watchers.
         """
-        # Join buffer contents into a single string; without this,
-        # StreamWatcher subclasses can't do things like iteratively scan for
-        # pattern matches.
-        # NOTE: using string.join should be "efficient enough" for now, re:
-        # speed and memory use. Should that become false, consider using
-        # StringIO or cStringIO (tho the latter doesn't do Unicode well?) which
-        # is apparently even more efficient.
-        stream = "".join(buffer_)
+        if not self.watchers:
+            return
+        stream = None
+        window = None
         for watcher in self.watchers:
-            for response in watcher.submit(stream):
+            if watcher.lookback is None:
+                # Join buffer contents into a single string; legacy
+                # StreamWatchers need it to do things like iteratively scan
+                # for pattern matches.
+                if stream is None:
+                    stream = "".join(buffer_)
+                responses = watcher.submit(stream)
+            else:
+                if window is None:
+                    window = self._window_for(buffer_)
+                responses = watcher.submit_window(window)
+            for response in responses:
                 self.write_proc_stdin(response)
 
+    def _window_for(self, buffer_: List[str]) -> StreamWindow:
+        # Obtain this stream's rolling window, updated with the newest chunk.
+        # Windows are sized to suit the hungriest incremental watcher.
+        window = self._windows.get(id(buffer_))
+        if window is None:
+            size = max(
+                x.lookback for x in self.watchers if x.lookback is not None
+            )
+            window = self._windows[id(buffer_)] = StreamWindow(size)
+        window.append(buffer_[-1])
+        return window
+
     def generate_env(
         self, env: Dict[str, Any], replace_env: bool
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         """
         Return a suitable environment dict based on user input & behavior.
 
@@ -967,11 +1512,15 @@ class Runner:
             Whether ``env`` updates, or is used in place of, the value of
             `os.environ`.
 
-        :returns: A dictionary of shell environment vars.
+        :returns: A mapping of shell environment vars.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            When not replacing, the result is cached (and shared between
+            runners) until `os.environ` or ``env`` change, and so is a
+            read-only `types.MappingProxyType`.
         """
-        return env if replace_env else dict(os.environ, **env)
+        return env if replace_env else _env_cache.get(env)
 
     def should_use_pty(self, pty: bool, fallback: bool) -> bool:
         """
@@ -1039,6 +1588,9 @@ class Runner:
         Decode some ``data`` bytes, returning Unicode.
 
         .. versionadded:: 1.0
+        .. versionchanged:: 3.1
+            Only called for subprocess output when overridden; by default,
+            output is decoded incrementally, and only when needed.
         """
         # NOTE: yes, this is a 1-liner. The point is to make it much harder to
         # forget to use 'replace' when decoding :)
@@ -1061,7 +1613,31 @@ class Runner:
         """
         raise NotImplementedError
 
-    def start(self, command: str, shell: str, env: Dict[str, Any]) -> None:
+    def watch_exit(self, callback: Callable[[], None]) -> None:
+        """
+        Arrange for ``callback`` to be called once the subprocess has exited.
+
+        Used by `Promise` to notice command completion without anybody having
+        to `join` it. ``callback`` is called from a background thread (and
+        must not block); it does not imply that IO workers have finished.
+
+        The default implementation has the shared `.Reactor` check
+        `process_is_finished` on a short interval, which is fine as long as
+        doing so from another thread is safe. Subclasses may override this to
+        use something better suited to their kind of subprocess.
+
+        .. versionadded:: 3.1
+        """
+
+        def poller() -> bool:
+            if not self.process_is_finished:
+                return False
+            callback()
+            return True
+
+        get_reactor().add_poller(poller)
+
+    def start(self, command: str, shell: str, env: Mapping[str, Any]) -> None:
         """
         Initiate execution of ``command`` (via ``shell``, with ``env``).
 
@@ -1183,6 +1759,23 @@ class Runner:
         """
         raise NotImplementedError
 
+    def resources(self) -> Optional["Resources"]:
+        """
+        Return the resources used by the (finished) subprocess, if known.
+
+        Called once the subprocess has exited, to fill in `.Result.resources`.
+        The default implementation only knows about wall clock time, since
+        `start` was called; subclasses able to tell more (such as `.Local`)
+        override this.
+
+        :returns: A `Resources`, or ``None`` if nothing is known.
+
+        .. versionadded:: 3.1
+        """
+        if self.start_time is None:
+            return None
+        return Resources(wall_time=time.monotonic() - self.start_time)
+
     def stop(self) -> None:
         """
         Perform final cleanup, if necessary.
@@ -1252,6 +1845,13 @@ class Local(Runner):
         super().__init__(context)
         # Bookkeeping var for pty use case
         self.status = 0
+        # Self-pipe used to wake up wait() when an IO worker dies; only
+        # created (and guarded by the lock) while wait() is blocking.
+        self._wakeup_lock = threading.Lock()
+        self._wakeup: Optional[Tuple[int, int]] = None
+        # Resource usage of the reaped subprocess, per os.wait4.
+        self._rusage: Any = None
+        self._reap_lock = threading.Lock()
 
     def should_use_pty(self, pty: bool = False, fallback: bool = True) -> bool:
         use_pty = False
@@ -1266,6 +1866,75 @@ class Local(Runner):
                 use_pty = False
         return use_pty
 
+    def create_io_threads(
+        self,
+    ) -> Tuple[Dict[Callable, Any], CaptureBuffer, CaptureBuffer]:
+        threads, stdout, stderr = super().create_io_threads()
+        # Streams handed straight to the subprocess (see start()) have no
+        # pipe for us to read from, so need no worker.
+        if not self.using_pty:
+            for target, pipe in (
+                (self.handle_stdout, self.process.stdout),
+                (self.handle_stderr, self.process.stderr),
+            ):
+                if pipe is None:
+                    del threads[target]
+        if self.opts["io_backend"] != "reactor" or WINDOWS:
+            return threads, stdout, stderr
+        # Swap out (not-yet-started) worker threads for handles serviced by
+        # the shared reactor thread, wherever we have a selectable fd.
+        reactor = get_reactor()
+        for target, thread in list(threads.items()):
+            kwargs = thread.kwargs["kwargs"]
+            if target == self.handle_stdin:
+                input_ = kwargs["input_"]
+                # Terminal stdin wants character buffering for the life of
+                # the command, which is easiest left to a regular thread; and
+                # only pipes & sockets are reliably pollable (regular files,
+                # /dev/null and friends are not, under epoll).
+                if (
+                    not has_fileno(input_)
+                    or isatty(input_)
+                    or not _is_pollable(input_.fileno())
+                ):
+                    continue
+                fd = input_.fileno()
+                callback = partial(
+                    self._forward_stdin, dict(kwargs, decoder=None)
+                )
+                stop_event = self.program_finished
+            else:
+                # Overridden read_proc_output wants to drive its own reads.
+                if self._overrides("read_proc_output"):
+                    continue
+                reader = self.read_proc_stdout
+                if target == self.handle_stderr:
+                    reader = self.read_proc_stderr
+                fd = self._proc_output_fileno(reader)
+                callback = partial(self._pump_output, reader=reader, **kwargs)
+                stop_event = None
+            handle = ReactorHandle(
+                reactor,
+                fd,
+                callback,
+                stop_event=stop_event,
+                target=target,
+                kwargs=kwargs,
+            )
+            handle.on_exception = self._io_worker_died
+            threads[target] = handle
+        return threads, stdout, stderr
+
+    def _proc_output_fileno(self, reader: Callable) -> int:
+        if self.using_pty:
+            return self.parent_fd
+        stream = self.process.stdout
+        if reader == self.read_proc_stderr:
+            stream = self.process.stderr
+        # Non-pty subprocesses always have PIPEs for both of these.
+        assert stream is not None
+        return stream.fileno()
+
     def read_proc_stdout(self, num_bytes: int) -> Optional[bytes]:
         # Obtain useful read-some-bytes function
         if self.using_pty:
@@ -1332,7 +2001,7 @@ class Local(Runner):
                 "Unable to close missing subprocess or stdin!"
             )
 
-    def start(self, command: str, shell: str, env: Dict[str, Any]) -> None:
+    def start(self, command: str, shell: str, env: Mapping[str, Any]) -> None:
         if self.using_pty:
             if pty is None:  # Encountered ImportError
                 err = "You indicated pty=True, but your platform doesn't support the 'pty' module!"  # noqa
@@ -1358,21 +2027,185 @@ class Local(Runner):
                 # behavior.
                 # NOTE: stdlib subprocess (actually its posix flavor, which is
                 # written in C) uses either execve or execv, depending.
-                os.execvpe(shell, [shell, "-c", command], env)
+                argv = self.argv or [shell, "-c", command]
+                try:
+                    if self.opts["cwd"]:
+                        os.chdir(self.opts["cwd"])
+                    os.execvpe(argv[0], argv, env)
+                # Never return into a copy of our own program; fail like a
+                # shell would instead.
+                except OSError as e:
+                    msg = "{}: {}\n".format(argv[0], e.strerror)
+                    os.write(2, msg.encode())
+                    os._exit(127)
         else:
-            self.process = Popen(
-                command,
-                shell=True,
-                executable=shell,
+            out = self._passthrough_target("out")
+            err = self._passthrough_target("err")
+            streams = dict(
                 env=env,
-                stdout=PIPE,
-                stderr=PIPE,
+                cwd=self.opts["cwd"],
+                stdout=PIPE if out is None else out,
+                stderr=PIPE if err is None else err,
                 stdin=PIPE,
             )
+            if self._use_fork_server():
+                self.process = get_fork_server().spawn(
+                    self.argv or command,
+                    shell=shell,
+                    env=env,
+                    cwd=self.opts["cwd"],
+                    stdout=streams["stdout"],
+                    stderr=streams["stderr"],
+                )
+            elif self.argv is not None:
+                self.process = self._spawn(self.argv, **streams)
+            else:
+                self.process = Popen(
+                    command, shell=True, executable=shell, **streams
+                )
+
+    def _use_fork_server(self) -> bool:
+        backend = self.opts["spawn_backend"]
+        return backend == "forkserver" and forkserver.SUPPORTED
+
+    def _spawn(self, argv: List[str], **kwargs: Any) -> Popen:
+        # Execute an argument vector directly. Given an absolute program path,
+        # no cwd and no fds to close, subprocess uses os.posix_spawn() (where
+        # available), sparing us the cost of forking - i.e. of copying the
+        # page tables of - our own, possibly large, process. Leaving fds open
+        # is safe enough: Python creates them non-inheritable (PEP 446).
+        path = kwargs["env"].get("PATH", os.defpath)
+        executable = argv[0]
+        if kwargs["cwd"] is None:
+            executable = shutil.which(executable, path=path) or executable
+        return Popen(argv, executable=executable, close_fds=False, **kwargs)
+
+    def _passthrough_target(self, name: str) -> Optional[int]:
+        # When nothing of ours needs to see a non-pty output stream's data -
+        # it's neither captured nor watched - hand the subprocess our own
+        # stream's file descriptor (or /dev/null, if hidden) instead of a pipe
+        # which IO workers would just copy from. Returns None otherwise.
+        if self.opts["capture"] is not False or self.watchers:
+            return None
+        key = "stdout" if name == "out" else "stderr"
+        if key in self.opts["hide"]:
+            return DEVNULL
+        stream = self.streams[name]
+        # Only files and pipes: a terminal would change how the subprocess
+        # behaves (colors, buffering, paging) compared to a pipe.
+        if not has_fileno(stream) or isatty(stream):
+            return None
+        # Anything still sitting in Python-level buffers must land first.
+        stream.flush()
+        return stream.fileno()
 
     def get_pid(self) -> int:
         return self.pid if self.using_pty else self.process.pid
 
+    def wait(self) -> None:
+        """
+        Block until the subprocess exits or an IO worker dies.
+
+        Where the platform allows it (currently: Linux, via
+        `os.pidfd_open`), this blocks on the kernel's own notification of
+        subprocess exit - plus a self-pipe written to by dying IO workers -
+        instead of waking up every `input_sleep` seconds to check. Elsewhere,
+        it falls back to the polling behavior of `.Runner.wait`.
+
+        .. versionchanged:: 3.1
+            Added the event-driven (non-polling) implementation.
+        """
+        # NOTE: checking this first also ensures the child has not yet been
+        # reaped when we go looking for it by PID below.
+        if self.process_is_finished or self.has_dead_threads:
+            return
+        pidfd = self._open_pidfd()
+        if pidfd is None:
+            return super().wait()
+        wake_r, wake_w = os.pipe()
+        with self._wakeup_lock:
+            self._wakeup = (wake_r, wake_w)
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            poller.register(wake_r, select.POLLIN)
+            # Re-check after the pipe exists, in case a worker died between
+            # our first check and now (and so had nobody to wake up).
+            while not (self.process_is_finished or self.has_dead_threads):
+                ready = [fd for fd, _ in poller.poll()]
+                if wake_r in ready:
+                    # Dying workers signal us just *before* exiting; wait for
+                    # them to finish doing so, so has_dead_threads agrees.
+                    for thread in self.threads.values():
+                        if thread.exc_info is not None:
+                            thread.join()
+        finally:
+            with self._wakeup_lock:
+                self._wakeup = None
+            for fd in (pidfd, wake_r, wake_w):
+                os.close(fd)
+
+    def _open_pidfd(self) -> Optional[int]:
+        # Fork server children are not ours to wait on, and may well exit
+        # (per a pidfd) before the server has passed on their exit status;
+        # so wait on the latter instead.
+        process = getattr(self, "process", None)
+        if isinstance(process, ServedProcess):
+            return os.dup(process.status_fd)
+        try:
+            return os.pidfd_open(self.get_pid())
+        # No pidfd support (non-Linux, old kernel or old Python) or no such
+        # process.
+        except (AttributeError, OSError):
+            return None
+
+    def watch_exit(self, callback: Callable[[], None]) -> None:
+        """
+        Like `.Runner.watch_exit`, but without ever reaping the subprocess.
+
+        Where possible, the shared `.Reactor` watches a pidfd for the
+        subprocess, so no polling happens at all. Elsewhere, it polls with
+        ``WNOWAIT``, leaving the exit status for `wait` to collect.
+
+        .. versionadded:: 3.1
+        """
+        pidfd = self._open_pidfd()
+        if pidfd is not None:
+
+            def exited() -> bool:
+                callback()
+                return False
+
+            # NOTE: the reactor closes the pidfd once it's unregistered.
+            handle = ReactorHandle(get_reactor(), pidfd, exited, close_fd=True)
+            handle.start()
+        elif hasattr(os, "waitid"):
+
+            def poller() -> bool:
+                if not self._has_exited():
+                    return False
+                callback()
+                return True
+
+            get_reactor().add_poller(poller)
+        else:
+            # No way to peek without reaping (i.e. Windows), but also no pty
+            # support there, and Popen.poll is threadsafe.
+            super().watch_exit(callback)
+
+    def _has_exited(self) -> bool:
+        flags = os.WEXITED | os.WNOHANG | os.WNOWAIT
+        try:
+            return os.waitid(os.P_PID, self.get_pid(), flags) is not None
+        # Somebody already reaped it.
+        except ChildProcessError:
+            return True
+
+    def _io_worker_died(self) -> None:
+        with self._wakeup_lock:
+            if self._wakeup is not None:
+                os.write(self._wakeup[1], b"\0")
+
     def kill(self) -> None:
         try:
             os.kill(self.get_pid(), signal.SIGKILL)
@@ -1391,10 +2224,54 @@ class Local(Runner):
             # so...
             # NOTE: It does appear to be totally blocking on Windows, so our
             # issue #351 may be totally unsolvable there. Unclear.
-            pid_val, self.status = os.waitpid(self.pid, os.WNOHANG)
+            # NOTE: os.wait4 rather than os.waitpid, as with _poll, so
+            # resources() knows what the subprocess used.
+            pid_val, self.status, rusage = os.wait4(self.pid, os.WNOHANG)
+            if pid_val != 0:
+                self._rusage = rusage
             return pid_val != 0
         else:
-            return self.process.poll() is not None
+            return self._poll() is not None
+
+    def _poll(self) -> Optional[int]:
+        # Popen.poll, but reaping via os.wait4 where possible, which also
+        # tells us the subprocess' resource usage.
+        process = self.process
+        if isinstance(process, ServedProcess):
+            code = process.poll()
+            if code is not None:
+                self._rusage = process.rusage
+            return code
+        if process.returncode is not None or not hasattr(os, "wait4"):
+            return process.poll()
+        with self._reap_lock:
+            if process.returncode is None:
+                try:
+                    pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+                # Somebody else reaped it; let Popen sort that out.
+                except ChildProcessError:
+                    return process.poll()
+                if pid != 0:
+                    process.returncode = os.waitstatus_to_exitcode(status)
+                    self._rusage = rusage
+        return process.returncode
+
+    def resources(self) -> Optional["Resources"]:
+        resources = super().resources()
+        rusage = self._rusage
+        if resources is None or rusage is None:
+            return resources
+        # NOTE: Linux & most BSDs count ru_maxrss in kilobytes; macOS, bytes.
+        max_rss = rusage.ru_maxrss
+        if sys.platform != "darwin":
+            max_rss *= 1024
+        return resources._replace(
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss=max_rss,
+            block_input=rusage.ru_inblock,
+            block_output=rusage.ru_oublock,
+        )
 
     def returncode(self) -> Optional[int]:
         if self.using_pty:
@@ -1419,9 +2296,16 @@ class Local(Runner):
 
     def stop(self) -> None:
         super().stop()
+        # Make sure the reactor has let go of any of our fds (e.g. ones whose
+        # join timed out) before they get closed out from under it.
+        for handle in getattr(self, "threads", {}).values():
+            if isinstance(handle, ReactorHandle):
+                handle.cancel()
         # If we opened a PTY for child communications, make sure to close() it,
         # otherwise long-running Invoke-using processes exhaust their file
         # descriptors eventually.
+        if isinstance(getattr(self, "process", None), ServedProcess):
+            self.process.close()
         if self.using_pty:
             try:
                 os.close(self.parent_fd)
@@ -1431,6 +2315,349 @@ class Local(Runner):
                 pass
 
 
+class AsyncLocal(Runner):
+    """
+    Execute a command on the local system from an `asyncio` event loop.
+
+    `Local` blocks the calling thread until its subprocess exits, servicing
+    the subprocess' streams with worker threads as it goes. `AsyncLocal`
+    instead starts subprocesses via `asyncio.create_subprocess_shell` and
+    services their streams with tasks on the running event loop, so its
+    `arun` coroutine blocks nothing at all; many thousands of commands may be
+    in flight at once on a single thread.
+
+    Otherwise, `arun` behaves like `.Runner.run`: it honors the same keyword
+    arguments and ``run.*`` config settings, drives ``watchers``, enforces
+    ``timeout``, and returns a `Result` or raises `.UnexpectedExit` (and
+    friends) under the same circumstances. The exceptions are:
+
+    - ``pty=True`` is not supported; a warning is printed and the command runs
+      without a pseudoterminal, as `Local` does when it has no terminal.
+    - ``asynchronous`` and ``disown`` make no sense for a coroutine, and raise
+      ``ValueError``; use the likes of `asyncio.create_task` instead.
+    - ``in_stream`` defaults to ``False`` - our own stdin is only mirrored to
+      the subprocess when given explicitly.
+    - ``io_backend`` has no effect.
+
+    Most users will want `.Context.arun` or `.Context.asudo`, which use the
+    runner class named by the ``runners.async_local`` config setting (this
+    class, by default.)
+
+    .. versionadded:: 3.1
+    """
+
+    process: "asyncio.subprocess.Process"
+
+    def __init__(self, context: "Context") -> None:
+        super().__init__(context)
+        # Event loop timer enforcing the 'timeout' option; see start_timer()
+        self._timeout_handle: Optional[asyncio.TimerHandle] = None
+        self._timed_out = False
+
+    def run(self, command: Union[str, List[str]], **kwargs: Any) -> "Result":
+        """
+        Execute ``command`` to completion on a new event loop.
+
+        A synchronous convenience wrapper around `arun`, for use outside of
+        any running event loop.
+        """
+        return asyncio.run(self.arun(command, **kwargs))
+
+    async def arun(
+        self, command: Union[str, List[str]], **kwargs: Any
+    ) -> "Result":
+        """
+        Execute ``command``, without blocking the running event loop.
+
+        Takes the same arguments as `.Runner.run` (with the caveats noted in
+        the class docstring), and returns or raises the same things.
+
+        Cancelling the calling task kills the subprocess.
+        """
+        try:
+            return await self._arun_body(command, **kwargs)
+        finally:
+            self.stop()
+
+    async def _arun_body(
+        self, command: Union[str, List[str]], **kwargs: Any
+    ) -> "Result":
+        # Like _run_body, but awaiting instead of spinning up IO threads.
+        command = self._setup(command, kwargs)
+        if self.opts["dry"]:
+            return self.generate_result(
+                **dict(self.result_kwargs, stdout="", stderr="", exited=0)
+            )
+        self.start_time = time.monotonic()
+        await self.astart(command, self.opts["shell"], self.env)
+        self.result_kwargs["pid"] = self.get_pid()
+        self.start_timer(self.opts["timeout"])
+        self.stdout, self.stderr = self._new_capture_buffers()
+        outputs = [
+            asyncio.ensure_future(self._ahandle_output(self.stdout, "out")),
+            asyncio.ensure_future(self._ahandle_output(self.stderr, "err")),
+        ]
+        stdin = None
+        if self.streams["in"]:
+            stdin = asyncio.ensure_future(
+                self._ahandle_stdin(
+                    input_=self.streams["in"],
+                    output=self.streams["out"],
+                    echo=self.opts["echo_stdin"],
+                )
+            )
+        try:
+            # Stdin may never hit EOF, so it only counts towards being done
+            # when it fails.
+            pending = set(filter(None, outputs + [stdin]))
+            while not all(x.done() for x in outputs):
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # An IO handler died (e.g. a watcher gave up); don't leave
+                # the subprocess behind, waiting on IO that won't come.
+                if any(x.exception() for x in done):
+                    self.kill()
+                    await asyncio.wait(outputs)
+                    break
+            await self.process.wait()
+        finally:
+            for task in filter(None, outputs + [stdin]):
+                task.cancel()
+            if stdin is not None:
+                await asyncio.wait([stdin])
+            self._flush_output()
+        # Same treatment as the exceptions of Local's IO threads; see
+        # _finish().
+        watcher_errors = []
+        task_exceptions = []
+        for task in filter(None, outputs + [stdin]):
+            if task.cancelled():
+                continue
+            exception = task.exception()
+            if isinstance(exception, WatcherError):
+                watcher_errors.append(exception)
+            elif exception is not None:
+                task_exceptions.append(
+                    ExceptionWrapper(
+                        {"target": task.get_coro()},
+                        type(exception),
+                        exception,
+                        exception.__traceback__,
+                    )
+                )
+        if task_exceptions:
+            raise ThreadException(task_exceptions)
+        return self._result_or_raise(watcher_errors)
+
+    async def _ahandle_output(self, buffer_: CaptureBuffer, name: str) -> None:
+        # Like _handle_output, for the "out" or "err" stream, but awaiting
+        # reads.
+        reader = self.process.stdout if name == "out" else self.process.stderr
+        # Our subprocesses always have PIPEs for both of these.
+        assert reader is not None
+        hide = "std{}".format(name) in self.opts["hide"]
+        output = self.streams[name]
+        size = self._read_chunk_bounds()[0]
+        while True:
+            data = await reader.read(size)
+            if not data:
+                break
+            size = self._next_read_chunk_size(size, len(data))
+            self._handle_output_chunk(buffer_, hide, output, data)
+            if self.watchers:
+                await self._adrain()
+        self._handle_output_chunk(buffer_, hide, output, b"", final=True)
+
+    async def _ahandle_stdin(
+        self, input_: IO, output: IO, echo: Optional[bool]
+    ) -> None:
+        # Like handle_stdin: forward input_ to the subprocess until EOF (or
+        # until cancelled, once the subprocess is done.)
+        # Every block written is drained before reading the next, so a
+        # subprocess which reads slowly holds us up, rather than having its
+        # input pile up within the pipe transport.
+        state = dict(input_=input_, output=output, echo=echo, decoder=None)
+        fd = input_.fileno() if has_fileno(input_) and not WINDOWS else None
+        if fd is not None and (isatty(input_) or _is_pollable(fd)):
+            with character_buffered(input_):
+                while True:
+                    await self._areadable(fd)
+                    if not self._forward_stdin(state):
+                        return
+                    await self._adrain()
+        # Regular files, file-like objects and the like never block, but
+        # may be large; draining lets the rest of the loop run in between
+        # blocks.
+        while self._forward_stdin(state):
+            await self._adrain()
+            await asyncio.sleep(0)
+
+    async def _areadable(self, fd: int) -> None:
+        # Wait until fd is readable, without blocking the loop.
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def wake() -> None:
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_reader(fd, wake)
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+
+    async def _adrain(self) -> None:
+        # Wait for the subprocess' stdin pipe to take whatever we've written
+        # to it so far.
+        stdin = self.process.stdin
+        if stdin is None or stdin.is_closing():
+            return
+        try:
+            await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The subprocess stopped reading; like _write_proc_stdin, there's
+            # nothing to be done about that.
+            pass
+
+    def should_use_pty(self, pty: bool = False, fallback: bool = True) -> bool:
+        if pty and not self.warned_about_pty_fallback:
+            err = "WARNING: AsyncLocal does not support pty=True; falling back to non-pty execution!\n"  # noqa
+            sys.stderr.write(err)
+            self.warned_about_pty_fallback = True
+        return False
+
+    def _unify_kwargs_with_config(self, kwargs: Any) -> None:
+        # Only mirror our own stdin when explicitly asked to; a loop full of
+        # subprocesses all reading it would be a mess.
+        if kwargs.get("in_stream") is None:
+            if self.context.config.run.in_stream is None:
+                kwargs["in_stream"] = False
+        super()._unify_kwargs_with_config(kwargs)
+        if self._asynchronous or self._disowned:
+            err = "AsyncLocal.arun() is already asynchronous; 'asynchronous' and 'disown' are not supported!"  # noqa
+            raise ValueError(err)
+
+    async def astart(
+        self, command: str, shell: str, env: Mapping[str, Any]
+    ) -> None:
+        """
+        Start ``command`` (via ``shell``, with ``env``) as a subprocess.
+
+        The coroutine counterpart to `.Runner.start`.
+
+        .. versionchanged:: 3.1
+            Executes `argv` directly, when set, and honors ``cwd``.
+        """
+        streams = dict(
+            env=env, cwd=self.opts["cwd"], stdin=PIPE, stdout=PIPE, stderr=PIPE
+        )
+        if self.argv is not None:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.argv, **streams
+            )
+        else:
+            self.process = await asyncio.create_subprocess_shell(
+                command, executable=shell, **streams
+            )
+
+    def start_timer(self, timeout: int) -> None:
+        if timeout is not None:
+            loop = asyncio.get_running_loop()
+            self._timeout_handle = loop.call_later(timeout, self._time_out)
+
+    def _time_out(self) -> None:
+        self._timed_out = True
+        self.kill()
+
+    @property
+    def timed_out(self) -> bool:
+        return self._timed_out
+
+    def _write_proc_stdin(self, data: bytes) -> None:
+        # NOTE: this buffers within the pipe transport, rather than blocking
+        # the loop (see _adrain); writes to a pipe closed by the subprocess
+        # are dropped.
+        if getattr(self, "process", None) and self.process.stdin:
+            self.process.stdin.write(data)
+        else:
+            raise SubprocessPipeError(
+                "Unable to write to missing subprocess or stdin!"
+            )
+
+    def close_proc_stdin(self) -> None:
+        if getattr(self, "process", None) and self.process.stdin:
+            self.process.stdin.close()
+        else:
+            raise SubprocessPipeError(
+                "Unable to close missing subprocess or stdin!"
+            )
+
+    def get_pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def process_is_finished(self) -> bool:
+        return self.process.returncode is not None
+
+    def returncode(self) -> Optional[int]:
+        return self.process.returncode
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+        except ProcessLookupError:
+            # Already dead; see Local.kill.
+            pass
+
+    def stop(self) -> None:
+        super().stop()
+        if self._timeout_handle is not None:
+            self._timeout_handle.cancel()
+        # Whatever happened (including cancellation of the calling task),
+        # don't leave the subprocess running unattended.
+        process = getattr(self, "process", None)
+        if process is not None and process.returncode is None:
+            self.kill()
+
+
+class Resources(NamedTuple):
+    """
+    Resources used by a finished subprocess, as found in `Result.resources`.
+
+    Everything but ``wall_time`` is only known for some subprocesses - namely
+    those run by `Local` on POSIX systems (per `os.wait4`) - and ``None``
+    otherwise. Usage includes that of any of the subprocess' own children
+    which it waited for.
+
+    .. versionadded:: 3.1
+    """
+
+    #: Seconds elapsed between starting the subprocess and collecting its
+    #: results.
+    wall_time: float
+    #: Seconds of CPU time spent in user mode.
+    user_time: Optional[float] = None
+    #: Seconds of CPU time spent in kernel mode.
+    system_time: Optional[float] = None
+    #: Peak resident set size, in bytes.
+    max_rss: Optional[int] = None
+    #: Number of times the filesystem had to perform input.
+    block_input: Optional[int] = None
+    #: Number of times the filesystem had to perform output.
+    block_output: Optional[int] = None
+
+    @property
+    def cpu_time(self) -> Optional[float]:
+        """
+        Total CPU time (user plus system) in seconds, if known.
+        """
+        if self.user_time is None or self.system_time is None:
+            return None
+        return self.user_time + self.system_time
+
+
 class Result:
     """
     A container for information about the result of a command execution.
@@ -1438,13 +2665,39 @@ class Result:
     All params are exposed as attributes of the same name and type.
 
     :param str stdout:
-        The subprocess' standard output.
+        The subprocess' standard output; empty if it was not captured (see
+        ``captured``.)
+
+        When the `Result` was created with ``stdout_bytes``, this is decoded
+        (using ``encoding``) from those bytes on first access, and cached.
 
     :param str stderr:
         Same as ``stdout`` but containing standard error (unless the process
         was invoked via a pty, in which case it will be empty; see
         `.Runner.run`.)
 
+    :param bytes stdout_bytes:
+        The subprocess' standard output, as raw (undecoded) bytes. May be any
+        bytes-like object, such as a `bytearray` or (for spilled output; see
+        the ``capture`` option of `.Runner.run`) a read-only `mmap.mmap`. If
+        not given, this is generated by encoding ``stdout`` on first access.
+
+        .. versionadded:: 3.1
+
+    :param bytes stderr_bytes:
+        Same as ``stdout_bytes``, but for standard error.
+
+        .. versionadded:: 3.1
+
+    :param bool captured:
+        Whether the subprocess' output was captured at all (see the
+        ``capture`` option of `.Runner.run`). When ``False``, ``stdout``,
+        ``stderr`` and their ``_bytes`` counterparts are all empty; this
+        attribute is what distinguishes "not captured" from "printed
+        nothing".
+
+        .. versionadded:: 3.1
+
     :param str encoding:
         The string encoding used by the local shell environment.
 
@@ -1456,7 +2709,9 @@ class Result:
 
     :param dict env:
         The shell environment used for execution. (Default is the empty dict,
-        ``{}``, not ``None`` as displayed in the signature.)
+        ``{}``, not ``None`` as displayed in the signature.) This is the very
+        mapping the runner used, which other results may share; so when built
+        from `os.environ`, it's read-only (see `.Runner.generate_env`).
 
     :param int exited:
         An integer representing the subprocess' exit/return code.
@@ -1496,6 +2751,13 @@ class Result:
 
         .. versionadded:: 3.0
 
+    :param resources:
+        A `Resources` describing what the subprocess used - CPU time, memory
+        and so forth - or ``None`` if unknown (e.g. for dry runs, or
+        disowned/incomplete subprocesses).
+
+        .. versionadded:: 3.1
+
     .. note::
         `Result` objects' truth evaluation is equivalent to their `.ok`
         attribute's value. Therefore, quick-and-dirty expressions like the
@@ -1520,15 +2782,30 @@ class Result:
         encoding: Optional[str] = None,
         command: str = "",
         shell: str = "",
-        env: Optional[Dict[str, Any]] = None,
+        env: Optional[Mapping[str, Any]] = None,
         exited: int = 0,
         pty: bool = False,
         hide: Tuple[str, ...] = tuple(),
         pid: Optional[int] = None,
         disowned: bool = False,
+        stdout_bytes: Optional[Union[bytes, bytearray, mmap.mmap]] = None,
+        stderr_bytes: Optional[Union[bytes, bytearray, mmap.mmap]] = None,
+        captured: bool = True,
+        resources: Optional["Resources"] = None,
     ):
-        self.stdout = stdout
-        self.stderr = stderr
+        # Text is only decoded from bytes (or vice versa) on demand; see the
+        # stdout/stderr properties. Uncaptured output is empty in both forms.
+        self.captured = captured
+        self._stdout: Optional[str] = None
+        self._stderr: Optional[str] = None
+        self._stdout_bytes = self._stderr_bytes = None
+        if captured:
+            if stdout or stdout_bytes is None:
+                self._stdout = stdout
+            if stderr or stderr_bytes is None:
+                self._stderr = stderr
+            self._stdout_bytes = stdout_bytes
+            self._stderr_bytes = stderr_bytes
         if encoding is None:
             encoding = default_encoding()
         self.encoding = encoding
@@ -1540,6 +2817,57 @@ class Result:
         self.hide = hide
         self.pid = pid
         self.disowned = disowned
+        self.resources = resources
+
+    @property
+    def stdout(self) -> str:
+        if self._stdout is None and self._stdout_bytes is not None:
+            self._stdout = self._decode(self._stdout_bytes)
+        return self._stdout or ""
+
+    @stdout.setter
+    def stdout(self, value: str) -> None:
+        self._stdout = value
+        self._stdout_bytes = None
+
+    @property
+    def stderr(self) -> str:
+        if self._stderr is None and self._stderr_bytes is not None:
+            self._stderr = self._decode(self._stderr_bytes)
+        return self._stderr or ""
+
+    @stderr.setter
+    def stderr(self, value: str) -> None:
+        self._stderr = value
+        self._stderr_bytes = None
+
+    @property
+    def stdout_bytes(self) -> Union[bytes, bytearray, mmap.mmap]:
+        if self._stdout_bytes is None:
+            if self._stdout is None:
+                return b""
+            self._stdout_bytes = self._stdout.encode(self.encoding, "replace")
+        return self._stdout_bytes
+
+    @property
+    def stderr_bytes(self) -> Union[bytes, bytearray, mmap.mmap]:
+        if self._stderr_bytes is None:
+            if self._stderr is None:
+                return b""
+            self._stderr_bytes = self._stderr.encode(self.encoding, "replace")
+        return self._stderr_bytes
+
+    def _decode(self, data: Union[bytes, bytearray, mmap.mmap]) -> str:
+        # NOTE: str() accepts any buffer, e.g. mmaps, which lack .decode()
+        text = str(data, self.encoding, "replace")
+        if WINDOWS:
+            # "Universal newlines" - replace all standard forms of
+            # newline with \n. This is not technically Windows related
+            # (\r as newline is an old Mac convention) but we only apply
+            # the translation for Windows as that's the only platform
+            # it is likely to matter for these days.
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
 
     @property
     def return_code(self) -> int:
@@ -1560,6 +2888,9 @@ class Result:
             desc = "Command was not fully executed due to watcher error."
         ret = [desc]
         for x in ("stdout", "stderr"):
+            if not self.captured:
+                ret.append("({} not captured)".format(x))
+                continue
             val = getattr(self, x)
             ret.append(
                 f"""=== {x} ===
@@ -1608,11 +2939,56 @@ class Result:
             Number of lines to preserve.
 
         .. versionadded:: 1.3
+        .. versionchanged:: 3.1
+            Only decodes the end of not-yet-decoded output, however large.
         """
         # TODO: preserve alternate line endings? Mehhhh
         # NOTE: no trailing \n preservation; easier for below display if
         # normalized
-        return "\n\n" + "\n".join(getattr(self, stream).splitlines()[-count:])
+        text = getattr(self, "_{}".format(stream), None)
+        data = getattr(self, "_{}_bytes".format(stream), None)
+        # NOTE: seeking newlines bytewise needs an ASCII-compatible encoding.
+        ascii_newline = "\n".encode(self.encoding, "replace") == b"\n"
+        if text is None and data is not None and ascii_newline:
+            text = self._decode(self._tail_bytes(data, count))
+        if text is None:
+            text = getattr(self, stream)
+        return "\n\n" + "\n".join(text.splitlines()[-count:])
+
+    def _tail_bytes(
+        self, data: Union[bytes, bytearray, mmap.mmap], count: int
+    ) -> Union[bytes, bytearray, mmap.mmap]:
+        # Just enough of the end of data to hold its last count lines: more
+        # than count newlines means its first (likely partial) line is never
+        # among them. Grows geometrically, so huge lines stay cheap to find.
+        size = 4096
+        while size < len(data):
+            chunk = data[-size:]
+            if chunk.count(b"\n") > count:
+                return chunk
+            size *= 4
+        return data
+
+    def raw(self, stream: str) -> IO[bytes]:
+        """
+        Return a binary file-like object reading the raw data of ``stream``.
+
+        When output was spilled to disk (see the ``capture`` option of
+        `.Runner.run`) this is the read-only `mmap.mmap` holding it, rewound
+        to the start, so arbitrarily large output may be read (or searched,
+        sliced etc) without loading it all into memory. Otherwise it is an
+        `io.BytesIO` over the captured bytes.
+
+        :param str stream:
+            Name of some captured stream attribute, eg ``"stdout"``.
+
+        .. versionadded:: 3.1
+        """
+        data = getattr(self, "{}_bytes".format(stream))
+        if isinstance(data, mmap.mmap):
+            data.seek(0)
+            return data  # type: ignore[return-value]
+        return io.BytesIO(data)
 
 
 class Promise(Result, AbstractContextManager):
@@ -1623,6 +2999,9 @@ class Promise(Result, AbstractContextManager):
     context managers, which will automatically call `join` when the block
     exits. In such cases, the context manager yields ``self``.
 
+    To wait on many promises at once - e.g. for whichever finishes first -
+    see `wait` and `as_completed`.
+
     `Promise` also exposes copies of many `Result` attributes, specifically
     those that derive from `~Runner.run` kwargs and not the result of command
     execution. For example, ``command`` is replicated here, but ``stdout`` is
@@ -1648,6 +3027,65 @@ class Promise(Result, AbstractContextManager):
         # TODO: consider proxying vs copying, but prob wait for refactor
         for key, value in self.runner.result_kwargs.items():
             setattr(self, key, value)
+        self._exited = threading.Event()
+        self._join_lock = threading.Lock()
+        self._outcome: Optional[
+            Tuple[Optional[Result], Optional[Exception]]
+        ] = None
+        self._future: Optional["Future[Result]"] = None
+        self.runner.watch_exit(self._runner_exited)
+
+    def _runner_exited(self) -> None:
+        with _completion:
+            self._exited.set()
+            _completion.notify_all()
+            if self._future is not None:
+                _get_finisher().submit(self._resolve_future)
+
+    def _resolve_future(self) -> None:
+        assert self._future is not None
+        try:
+            result = self.join()
+        except Exception as e:
+            self._future.set_exception(e)
+        else:
+            self._future.set_result(result)
+
+    def as_future(self) -> "Future[Result]":
+        """
+        Return a `concurrent.futures.Future` for the outcome of `join`.
+
+        The future resolves to the `Result` `join` would return, or raises the
+        exception it would raise - so it may be handed to anything speaking
+        `concurrent.futures`, or awaited via `asyncio.wrap_future`. It is
+        already running, so may not be cancelled.
+
+        No thread is dedicated to joining each command: subprocess exit is
+        noticed the same way `wait` notices it, after which the (typically
+        brief) `join` runs on a small thread pool shared by all promises.
+
+        Repeated calls return the same future.
+
+        .. versionadded:: 3.1
+        """
+        with _completion:
+            if self._future is None:
+                self._future = Future()
+                self._future.set_running_or_notify_cancel()
+                if self._exited.is_set():
+                    _get_finisher().submit(self._resolve_future)
+            return self._future
+
+    def done(self) -> bool:
+        """
+        Return whether the subprocess has exited, without blocking.
+
+        Once this is ``True``, `join` only has to wait for any output still in
+        flight to be drained.
+
+        .. versionadded:: 3.1
+        """
+        return self._exited.is_set()
 
     def join(self) -> Result:
         """
@@ -1665,11 +3103,24 @@ class Promise(Result, AbstractContextManager):
 
         See `~Runner.run` docs, or those of the relevant classes, for further
         details.
+
+        .. versionchanged:: 3.1
+            May be called more than once (including from multiple threads), in
+            which case every call returns or raises the same outcome.
         """
-        try:
-            return self.runner._finish()
-        finally:
-            self.runner.stop()
+        with self._join_lock:
+            if self._outcome is None:
+                try:
+                    self._outcome = (self.runner._finish(), None)
+                except Exception as e:
+                    self._outcome = (None, e)
+                finally:
+                    self.runner.stop()
+        result, exception = self._outcome
+        if exception is not None:
+            raise exception
+        assert result is not None
+        return result
 
     def __enter__(self) -> "Promise":
         return self
@@ -1686,6 +3137,138 @@ class Promise(Result, AbstractContextManager):
         return f"<Promise cmd={self.command!r}>"
 
 
+#: Notified whenever any `Promise`'s subprocess exits. Shared, so that waiting
+#: on many promises at once needs neither many threads nor polling.
+_completion = threading.Condition()
+
+
+_finisher: Optional[ThreadPoolExecutor] = None
+_finisher_lock = threading.Lock()
+
+
+def _get_finisher() -> ThreadPoolExecutor:
+    # Joins exited promises on behalf of Promise.as_future.
+    global _finisher
+    with _finisher_lock:
+        if _finisher is None:
+            _finisher = ThreadPoolExecutor(thread_name_prefix="invoke-join")
+        return _finisher
+
+
+def _forget_finisher() -> None:
+    # As with the reactor: forked children don't inherit the pool's threads.
+    global _finisher, _finisher_lock
+    _finisher = None
+    _finisher_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_finisher)
+
+
+def _failed(promise: Promise) -> bool:
+    try:
+        promise.join()
+    except Exception:
+        return True
+    return False
+
+
+def wait(
+    promises: Iterable[Promise],
+    timeout: Optional[float] = None,
+    return_when: str = ALL_COMPLETED,
+) -> Tuple[Set[Promise], Set[Promise]]:
+    """
+    Wait for some or all of ``promises`` to finish, without joining them.
+
+    Mirrors `concurrent.futures.wait`, returning a 2-tuple of sets: the
+    promises whose subprocess has exited ("done"), and all the others.
+
+    :param promises: An iterable of `Promise` objects.
+
+    :param float timeout:
+        Maximum number of seconds to wait; if it elapses, whatever has
+        finished so far is returned. Default: no limit.
+
+    :param str return_when:
+        When to return:
+
+        - ``FIRST_COMPLETED``: as soon as any promise is done;
+        - ``FIRST_EXCEPTION``: as soon as any promise is done and its `.join
+          <Promise.join>` raises an exception, e.g. because its command
+          failed. (Done promises are joined to find that out.) If none does,
+          this is the same as ``ALL_COMPLETED``.
+        - ``ALL_COMPLETED`` (the default): once every promise is done.
+
+        These are the same constants as in `concurrent.futures` (and are
+        importable from ``invoke`` as well).
+
+    .. versionadded:: 3.1
+    """
+    promises = set(promises)
+    if return_when not in (FIRST_COMPLETED, FIRST_EXCEPTION, ALL_COMPLETED):
+        raise ValueError("Unknown return_when {!r}".format(return_when))
+    deadline = None if timeout is None else time.monotonic() + timeout
+    checked: Set[Promise] = set()
+    while True:
+        with _completion:
+            done = {x for x in promises if x.done()}
+            while not (done - checked or done == promises):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return done, promises - done
+                _completion.wait(remaining)
+                done = {x for x in promises if x.done()}
+        if return_when == FIRST_COMPLETED or done == promises:
+            return done, promises - done
+        if return_when == FIRST_EXCEPTION:
+            # Joining happens outside the lock; it's not instant.
+            if any(_failed(x) for x in done - checked):
+                return done, promises - done
+        checked = done
+
+
+def as_completed(
+    promises: Iterable[Promise], timeout: Optional[float] = None
+) -> Generator[Promise, None, None]:
+    """
+    Yield each of ``promises`` as its subprocess exits.
+
+    Mirrors `concurrent.futures.as_completed`; promises which are already done
+    are yielded first. Nothing is joined on your behalf, so call `.join
+    <Promise.join>` on each yielded promise to obtain its `Result` (or the
+    exception describing its failure).
+
+    :param promises: An iterable of `Promise` objects.
+
+    :param float timeout:
+        Maximum number of seconds, from the initial call, to wait for all
+        promises to finish. Default: no limit.
+
+    :raises:
+        `concurrent.futures.TimeoutError`, if ``timeout`` elapses before every
+        promise has finished.
+
+    .. versionadded:: 3.1
+    """
+    pending = set(promises)
+    total = len(pending)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while pending:
+        done, pending = wait(
+            pending,
+            timeout=None if deadline is None else deadline - time.monotonic(),
+            return_when=FIRST_COMPLETED,
+        )
+        if not done:
+            err = "{} (of {}) promises are still running"
+            raise FuturesTimeoutError(err.format(len(pending), total))
+        yield from done
+
+
 def normalize_hide(
     val: Any,
     out_stream: Optional[str] = None,
@@ -1714,6 +3297,65 @@ def normalize_hide(
     return tuple(hide)
 
 
+def _finish_capture(
+    buffer_: CaptureBuffer,
+) -> Optional[Union[bytearray, mmap.mmap]]:
+    # Turn a capture buffer into something a Result can hold on to.
+    if isinstance(buffer_, SpillBuffer):
+        return buffer_.finish()
+    if isinstance(buffer_, NullBuffer):
+        return None
+    return buffer_
+
+
+class _EnvCache:
+    # The os.environ-based child environment Runner.generate_env last built,
+    # kept until os.environ, or the overlay given, change. Copying os.environ
+    # means decoding every variable anew - a lot of work with large
+    # environments & many commands - while checking its raw data for changes
+    # is cheap, as is applying an overlay to the cached copy. 'version'
+    # counts changes to os.environ.
+    def __init__(self) -> None:
+        self.version = 0
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[Any, Any]] = None
+        self._base: Dict[str, str] = {}
+        self._overlay: Optional[Dict[str, Any]] = None
+        self._env: Mapping[str, Any] = MappingProxyType({})
+
+    def get(self, overlay: Dict[str, Any]) -> Mapping[str, Any]:
+        # NOTE: handed out read-only, as it's shared by every runner (and
+        # Result) until the next change.
+        data = _environ_data()
+        with self._lock:
+            if data != self._data:
+                self._base = dict(os.environ)
+                self._data = dict(data)
+                self._overlay = None
+                self.version += 1
+            if overlay != self._overlay:
+                env = self._base
+                if overlay:
+                    env = dict(self._base, **overlay)
+                self._env = MappingProxyType(env)
+                self._overlay = dict(overlay)
+            return self._env
+
+
+def _environ_data() -> Mapping:
+    # os.environ's raw, undecoded data, for cheap change checks. NOTE: that's
+    # a CPython detail; elsewhere, os.environ itself will do.
+    return getattr(os.environ, "_data", os.environ)
+
+
+_env_cache = _EnvCache()
+
+
+def _is_pollable(fd: int) -> bool:
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
 def default_encoding() -> str:
     """
     Obtain apparent interpreter-local default text encoding.
@@ -0,0 +1,509 @@
+"""
+Running many commands through one long-lived shell.
+
+Every `.Local` command pays for starting a fresh shell - ``bash -c ...`` -
+plus re-running any `.Context.prefix` commands (and ``cd``-ing into any
+`.Context.cd` directory) first. That's negligible for a handful of commands,
+but adds up for tasks issuing hundreds of tiny ones. A `ShellSession` instead
+keeps a single shell process around, which runs each command in a forked
+subshell of itself - no new shell to start, and prefixes already applied.
+
+Typically used via `.Context.session`::
+
+    with c.session():
+        for path in paths:
+            c.run("test -f {}".format(path), warn=True)
+"""
+
+import os
+import re
+import secrets
+import shlex
+import shutil
+import signal
+import tempfile
+import threading
+from subprocess import PIPE, Popen
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .runners import Result, Runner
+from .terminals import WINDOWS
+
+if TYPE_CHECKING:
+    from .context import Context
+
+# Runs in the session shell, reading one line per command from stdin: each a
+# call to __invoke_run with a unique marker, the path to a FIFO to use as the
+# command's stdin, and the command itself. The command runs in a subshell, so
+# it cannot alter session state (cwd, variables) for later ones. The marker
+# (plus "+") acknowledges that the subshell opened its stdin; it then
+# delimits the command's output on both streams, and carries its exit code.
+# NOTE: POSIX sh only, as the shell in question may be dash, zsh etc.
+_FUNCTIONS = """\
+__invoke_nl='
+'
+__invoke_run() {
+    (exec < "$2"; printf '%s+\\n' "$1"; eval "$3")
+    __invoke_status=$?
+    printf '%s %d\\n' "$1" "$__invoke_status"
+    printf '%s\\n' "$1" >&2
+}
+"""
+_READ_LOOP = """\
+while IFS= read -r __invoke_line; do eval "$__invoke_line"; done
+"""
+
+# Names a shell can export or unset.
+_ENV_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote(value: str) -> str:
+    # shlex.quote, but never emitting literal newlines, as the session shell
+    # reads one command per line.
+    return shlex.quote(value).replace("\n", "'\"$__invoke_nl\"'")
+
+
+def _join_cwds(cwds: List[str]) -> str:
+    # Like Context.cwd, for just these directories: the last absolute (or
+    # home-relative) one and what follows it, else all of them, relative to
+    # wherever the shell already is.
+    for index in range(len(cwds) - 1, -1, -1):
+        if cwds[index].startswith(("~", "/")):
+            cwds = cwds[index:]
+            break
+    paths = [path.replace(" ", r"\ ") for path in cwds]
+    return os.path.join(*paths) if paths else ""
+
+
+def _supports(kwargs: Dict[str, Any], config: Any) -> bool:
+    # Whether a command with these run() kwargs & 'run' config can execute
+    # in a session shell at all.
+    if WINDOWS:
+        return False
+    for key in ("pty", "asynchronous", "disown"):
+        value = kwargs.get(key)
+        if value if value is not None else config[key]:
+            return False
+    return True
+
+
+class SessionRunner(Runner):
+    """
+    Execute a single command within a `ShellSession`'s shell.
+
+    Created by `ShellSession.run` for each command, instead of `.Local`. Its
+    "subprocess" is the command's subshell: output is read from the session
+    shell's pipes up to the command's marker, and stdin is forwarded via a
+    per-command FIFO.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self, context: "Context", session: "ShellSession") -> None:
+        super().__init__(context)
+        #: The `ShellSession` to execute commands within.
+        self.session = session
+        self.marker = b""
+        self.exited: Optional[int] = None
+        self._stdin: Optional[int] = None
+        self._stdout = self._stderr = -1
+        self._streams: Dict[int, bytearray] = {}
+        self._done = threading.Event()
+        self._stdin_opened = threading.Event()
+
+    def start(self, command: str, shell: str, env: Mapping[str, Any]) -> None:
+        # The session shell has its own working directory; commands wanting
+        # another (via the 'cwd' option) change into it within their
+        # subshell, as Local would have the subprocess start out there.
+        if self.opts["cwd"]:
+            command = "cd {} && {}".format(_quote(self.opts["cwd"]), command)
+        self.session.start(shell, env)
+        process = self.session.process
+        assert process is not None
+        assert process.stdout is not None and process.stderr is not None
+        self._stdout = process.stdout.fileno()
+        self._stderr = process.stderr.fileno()
+        self._streams = {self._stdout: bytearray(), self._stderr: bytearray()}
+        # Without an in_stream nothing would ever close the command's stdin,
+        # so it gets none at all.
+        marker, self._stdin = self.session.submit(
+            command, env, self.encoding, stdin=bool(self.streams["in"])
+        )
+        self.marker = marker.encode()
+
+    def _read(self, fd: int, num_bytes: int) -> bytes:
+        # Return output up to this command's marker, holding back anything
+        # which might be the start of it; b"" once the marker is seen.
+        if fd not in self._streams:
+            return b""
+        buffer = self._streams[fd]
+        while True:
+            index = buffer.find(self.marker)
+            if index != -1:
+                if index == 0:
+                    if self._found_marker(fd, buffer):
+                        return b""
+                    continue
+                data = bytes(buffer[:index])
+                del buffer[:index]
+                return data
+            keep = len(self.marker) - 1
+            while keep and not self.marker.startswith(buffer[-keep:]):
+                keep -= 1
+            if len(buffer) > keep:
+                size = min(len(buffer) - keep, num_bytes)
+                data = bytes(buffer[:size])
+                del buffer[:size]
+                return data
+            chunk = os.read(fd, num_bytes)
+            if not chunk:
+                # Session shell exited (or was killed) before our marker
+                # showed up.
+                self._finish_stream(fd)
+                return bytes(buffer)
+            buffer += chunk
+
+    def _found_marker(self, fd: int, buffer: bytearray) -> bool:
+        # Handle the marker line at the start of buffer, returning whether it
+        # ended the stream. Marker lines end with "+" (stdin was opened), the
+        # exit status (stdout) or nothing (stderr).
+        while b"\n" not in buffer:
+            chunk = os.read(fd, 64)
+            if not chunk:
+                break
+            buffer += chunk
+        line, _, _ = bytes(buffer).partition(b"\n")
+        start = len(self.marker)
+        status = line[start:].strip()
+        if status == b"+":
+            del buffer[: len(line) + 1]
+            self._stdin_opened.set()
+            return False
+        if status:
+            self.exited = int(status)
+        self._finish_stream(fd)
+        return True
+
+    def _finish_stream(self, fd: int) -> None:
+        del self._streams[fd]
+        if not self._streams:
+            self._done.set()
+
+    def read_proc_stdout(self, num_bytes: int) -> Optional[bytes]:
+        return self._read(self._stdout, num_bytes)
+
+    def read_proc_stderr(self, num_bytes: int) -> Optional[bytes]:
+        return self._read(self._stderr, num_bytes)
+
+    def _write_proc_stdin(self, data: bytes) -> None:
+        if self._stdin is None:
+            return
+        try:
+            os.write(self._stdin, data)
+        except OSError:
+            pass
+
+    def close_proc_stdin(self) -> None:
+        # A FIFO's reader blocks opening it until there's a writer, so make
+        # sure the command has its end before we go away.
+        while not self._stdin_opened.wait(self.input_sleep):
+            if self._done.is_set():
+                break
+        self._close_stdin()
+
+    def _close_stdin(self) -> None:
+        if self._stdin is not None:
+            os.close(self._stdin)
+            self._stdin = None
+
+    def wait(self) -> None:
+        # Like Runner.wait, but woken up as soon as output is done instead of
+        # polling for it.
+        while not (self.process_is_finished or self.has_dead_threads):
+            self._done.wait(self.input_sleep)
+
+    @property
+    def process_is_finished(self) -> bool:
+        return self._done.is_set()
+
+    def returncode(self) -> Optional[int]:
+        if self.exited is None:
+            # No exit status means the session shell itself went away.
+            return self.session.reap()
+        return self.exited
+
+    def send_interrupt(self, interrupt: "KeyboardInterrupt") -> None:
+        # The session shell runs in its own process group, out of reach of
+        # terminal-generated signals; so send them ourselves. (Being
+        # non-interactive, the session shell exits too.)
+        self.session.kill(signal.SIGINT)
+
+    def kill(self) -> None:
+        self.session.kill()
+
+    def stop(self) -> None:
+        super().stop()
+        self._close_stdin()
+        # Anything left unread (say, because an IO thread blew up) would be
+        # taken for the next command's output; so start over instead.
+        if self._streams:
+            self.session.kill()
+
+
+class ShellSession:
+    """
+    A single, persistent shell, which `run` executes commands through.
+
+    Commands behave as they would via `.Context.run` - returning `.Result`
+    objects, honoring ``run.*`` config options & keyword arguments - except:
+
+    - they run one at a time, each in a subshell of the session shell (so
+      e.g. ``cd`` or ``export`` in one command don't affect the next);
+    - `.Context.prefix` and `.Context.cd` in effect when the session started
+      are applied just once, to the session shell itself;
+    - ``pty``, ``asynchronous`` and ``disown`` are unsupported. `can_run`
+      says no to such commands, as it does for commands whose context has
+      since left the session's `~.Context.cd` / `~.Context.prefix` blocks.
+
+    The shell starts along with the first command and is restarted whenever
+    it has exited, or was killed (e.g. due to a ``timeout``). If it exits
+    while setting up - say, because a prefix failed - the command at hand
+    fails with the shell's output and exit code instead.
+
+    Instances are context managers; exiting them (or calling `close`) makes
+    the shell exit. Most code wants `.Context.session` rather than
+    instantiating this class directly.
+
+    .. versionadded:: 3.1
+    """
+
+    #: The `.Runner` subclass used for each command.
+    runner_class = SessionRunner
+
+    def __init__(self, context: "Context") -> None:
+        """
+        :param context:
+            The `.Context` whose config, `~.Context.prefix` and `~.Context.cd`
+            state the session starts out with.
+        """
+        #: The `.Context` given to `__init__`.
+        self.context = context
+        #: The `subprocess.Popen` for the session shell, if running.
+        self.process: Optional[Popen] = None
+        #: The shell binary running the session, if any.
+        self.shell: Optional[str] = None
+        #: The environment the session shell was started with.
+        self.env: Mapping[str, Any] = {}
+        #: ``context.command_prefixes``, as of session start.
+        self.prefixes = list(context.command_prefixes)
+        #: ``context.command_cwds``, as of session start.
+        self.cwds = list(context.command_cwds)
+        self._tempdir: Optional[str] = None
+        self._fifo: Optional[str] = None
+        self._count = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> "ShellSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def can_run(self, kwargs: Dict[str, Any]) -> bool:
+        """
+        Return whether `run` can execute a command given ``kwargs``.
+
+        Checks that the session is open, that no unsupported options are
+        enabled (via ``kwargs`` or config), and that our context's
+        `~.Context.prefix` / `~.Context.cd` state still extends the
+        session's.
+        """
+        if self._closed or not _supports(kwargs, self.context.config.run):
+            return False
+        prefixes = self.context.command_prefixes
+        cwds = self.context.command_cwds
+        return (
+            prefixes[: len(self.prefixes)] == self.prefixes
+            and cwds[: len(self.cwds)] == self.cwds
+        )
+
+    def run(self, command: Union[str, List[str]], **kwargs: Any) -> Result:
+        """
+        Execute ``command`` in the session shell, returning a `.Result`.
+
+        Takes the same arguments as `.Runner.run` (including ``cwd``, which
+        the command's subshell changes into first); argument vectors are run
+        as their `shlex.join` equivalent. Prefixes (and ``cd`` directories)
+        added to our context since the session started still apply, per
+        command.
+
+        Callers are expected to check `can_run` first.
+        """
+        if isinstance(command, (list, tuple)):
+            command = shlex.join(command)
+        # Whatever was added to our context since the session started.
+        new_prefixes, new_cwds = len(self.prefixes), len(self.cwds)
+        prefixes = self.context.command_prefixes[new_prefixes:]
+        cwd = _join_cwds(self.context.command_cwds[new_cwds:])
+        if cwd:
+            prefixes = ["cd {}".format(cwd)] + prefixes
+        command = " && ".join(prefixes + [command])
+        with self._lock:
+            return self.runner_class(self.context, self).run(command, **kwargs)
+
+    def start(self, shell: str, env: Mapping[str, Any]) -> None:
+        """
+        Start the session shell, unless it's already running.
+
+        Called by `SessionRunner` for each command, with its ``shell`` and
+        ``env``. Once started, the shell keeps its environment; `submit`
+        takes care of any differences, per command.
+        """
+        if self.process is not None:
+            if self.process.poll() is None and self.shell == shell:
+                return
+            self.kill()
+            self.reap()
+        if self._tempdir is None:
+            self._tempdir = tempfile.mkdtemp(prefix="invoke-session-")
+        script = _FUNCTIONS
+        setup = list(self.prefixes)
+        if self.cwds:
+            setup.insert(0, "cd {}".format(_join_cwds(self.cwds)))
+        if setup:
+            script += "{} || exit $?\n".format(" && ".join(setup))
+        script += _READ_LOOP
+        # NOTE: a new session (and so process group) lets kill() take out
+        # the shell and whatever it's running in one go.
+        self.process = Popen(
+            [shell, "-c", script],
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=PIPE,
+            env={key: str(value) for key, value in env.items()},
+            start_new_session=True,
+        )
+        self.shell = shell
+        self.env = env
+
+    def submit(
+        self,
+        command: str,
+        env: Mapping[str, Any],
+        encoding: str,
+        stdin: bool = True,
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Hand ``command`` to the (running) session shell for execution.
+
+        :param str command: The command to execute.
+        :param dict env: The environment to execute it with.
+        :param str encoding: How to encode the command for the shell.
+        :param bool stdin:
+            Whether to feed the command's stdin; if ``False``, it reads from
+            ``/dev/null`` instead.
+
+        :returns:
+            The marker which will delimit the command's output, and a file
+            descriptor feeding the command's stdin (or ``None``).
+        """
+        assert self.process is not None and self.process.stdin is not None
+        assert self._tempdir is not None
+        self._count += 1
+        marker = "__invoke_{}_{}".format(secrets.token_hex(8), self._count)
+        changes = []
+        # Runners usually share one (cached) environment dict, unless it or
+        # its sources changed.
+        if env is not self.env:
+            changes += [
+                "export {}={}".format(key, _quote(str(value)))
+                for key, value in env.items()
+                if self.env.get(key) != value and _ENV_NAME.match(key)
+            ]
+            changes += [
+                "unset {}".format(key)
+                for key in self.env
+                if key not in env and _ENV_NAME.match(key)
+            ]
+        # Commands run one at a time, so the previous one's FIFO is done for.
+        if self._fifo is not None:
+            os.unlink(self._fifo)
+            self._fifo = None
+        fifo, fd = os.devnull, None
+        if stdin:
+            fifo = os.path.join(self._tempdir, "stdin-{}".format(self._count))
+            os.mkfifo(fifo, 0o600)
+            self._fifo = fifo
+            # NOTE: opening read-write, rather than write-only, keeps us from
+            # blocking until the command opens its end (Linux & the BSDs
+            # allow this for FIFOs). The command sees EOF once we close it.
+            fd = os.open(fifo, os.O_RDWR)
+        line = "__invoke_run {} {} {}\n".format(
+            marker, _quote(fifo), _quote("; ".join(changes + [command]))
+        )
+        try:
+            os.write(self.process.stdin.fileno(), line.encode(encoding))
+        # The shell already exited; runners find out soon enough.
+        except BrokenPipeError:
+            pass
+        return marker, fd
+
+    def kill(self, sig: int = signal.SIGKILL) -> None:
+        """
+        Send ``sig`` (default: ``SIGKILL``) to the session shell and anything
+        it's running.
+        """
+        if self.process is not None and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self) -> Optional[int]:
+        """
+        Wait for an exiting session shell, returning its exit code.
+
+        Returns ``None`` if there's no session shell.
+        """
+        process, self.process = self.process, None
+        if process is None:
+            return None
+        code = process.wait()
+        for pipe in (process.stdin, process.stdout, process.stderr):
+            try:
+                pipe.close()  # type: ignore[union-attr]
+            except BrokenPipeError:
+                pass
+        return code
+
+    def close(self) -> None:
+        """
+        Make the session shell exit, and clean up after it.
+
+        `can_run` returns ``False`` from here on out.
+        """
+        self._closed = True
+        if self.process is not None:
+            # EOF on its stdin ends the session shell's read loop.
+            try:
+                self.process.stdin.close()  # type: ignore[union-attr]
+            except BrokenPipeError:
+                pass
+            try:
+                self.process.wait(timeout=1)
+            except Exception:
+                self.kill()
+            self.reap()
+        if self._tempdir is not None:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = self._fifo = None
@@ -0,0 +1,143 @@
+"""
+Output sinks, through which `.Runner` replays subprocess output.
+
+Terminals want every chunk of output flushed the moment it arrives, so users
+see it immediately. Pipes and files (e.g. the captured stdout of a CI job)
+don't - and flushing them once per chunk costs one system call per chunk,
+which adds up quickly for chatty commands. `CoalescingWriter` batches those
+flushes up instead, within firm time and size bounds.
+"""
+
+import os
+import threading
+import time
+from typing import IO, Dict, Optional
+
+
+class CoalescingWriter:
+    """
+    Wraps an output stream, flushing it in batches rather than per write.
+
+    Every `write` is handed straight to the wrapped stream, but the stream is
+    only flushed once at least ``size`` characters are pending, or at least
+    ``interval`` seconds have passed since the last flush. Pending output is
+    also flushed on schedule when no further writes arrive, by a single
+    background thread shared by all instances. Output arriving after a quiet
+    spell is flushed immediately.
+
+    Instances are threadsafe. Call `flush` once done writing, to push out
+    anything still pending.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(
+        self, stream: IO, interval: float = 0.05, size: int = 65536
+    ) -> None:
+        """
+        :param stream: The file-like object to write to.
+        :param float interval:
+            Maximum number of seconds written data may sit unflushed.
+        :param int size:
+            Maximum number of characters which may be pending at once.
+        """
+        self.stream = stream
+        self.interval = interval
+        self.size = size
+        #: Number of characters written since the last flush.
+        self.pending = 0
+        self._last_flush = time.monotonic()
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def write(self, string: str) -> None:
+        with self._lock:
+            self.stream.write(string)
+            self.pending += len(string)
+            elapsed = time.monotonic() - self._last_flush
+            if self.pending >= self.size or elapsed >= self.interval:
+                self._flush()
+            elif not self._scheduled:
+                self._scheduled = True
+                _get_flusher().schedule(self, self._last_flush + self.interval)
+
+    def flush(self) -> None:
+        """
+        Flush the wrapped stream, if anything has been written since last time.
+        """
+        with self._lock:
+            if self.pending:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._scheduled:
+            _get_flusher().cancel(self)
+            self._scheduled = False
+        self.stream.flush()
+        self.pending = 0
+        self._last_flush = time.monotonic()
+
+
+class _Flusher:
+    # Flushes CoalescingWriters whose pending output is due, from a single
+    # background thread (started on first use) which sleeps until the
+    # earliest deadline. Writers are flushed without our lock held, as they
+    # call into us while holding their own.
+
+    def __init__(self) -> None:
+        self._due: Dict[CoalescingWriter, float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, writer: CoalescingWriter, deadline: float) -> None:
+        with self._condition:
+            self._due[writer] = deadline
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="invoke-flusher", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, writer: CoalescingWriter) -> None:
+        with self._condition:
+            self._due.pop(writer, None)
+
+    def _loop(self) -> None:
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = [w for w, when in self._due.items() if when <= now]
+                for writer in due:
+                    del self._due[writer]
+                if not due:
+                    timeout = None
+                    if self._due:
+                        timeout = min(self._due.values()) - now
+                    self._condition.wait(timeout)
+                    continue
+            for writer in due:
+                writer.flush()
+
+
+_flusher: Optional[_Flusher] = None
+_flusher_lock = threading.Lock()
+
+
+def _get_flusher() -> _Flusher:
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = _Flusher()
+        return _flusher
+
+
+def _forget_flusher() -> None:
+    # As with the reactor: forked children don't inherit our thread.
+    global _flusher, _flusher_lock
+    _flusher = None
+    _flusher_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_flusher)
@@ -48,6 +48,8 @@ class Task(Generic[T]):
     most intents and purposes.
 
     .. versionadded:: 1.0
+    .. versionchanged:: 3.1
+        Added the ``inputs``, ``outputs`` and ``cache`` attributes.
     """
 
     # TODO: store these kwarg defaults central, refer to those values both here
@@ -72,6 +74,9 @@ class Task(Generic[T]):
         autoprint: bool = False,
         iterable: Optional[Iterable[str]] = None,
         incrementable: Optional[Iterable[str]] = None,
+        inputs: Optional[Iterable[str]] = None,
+        outputs: Optional[Iterable[str]] = None,
+        cache: Union[bool, Callable] = False,
     ) -> None:
         # Real callable
         self.body = body
@@ -99,6 +104,11 @@ class Task(Generic[T]):
         self.times_called = 0
         # Whether to print return value post-execution
         self.autoprint = autoprint
+        # Files read & written, for up-to-date checks
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        # Whether (& how) to cache return values across invocations
+        self.cache = cache
 
     @property
     def name(self) -> str:
@@ -330,6 +340,15 @@ def task(*args: Any, **kwargs: Any) -> Callable:
     * ``autoprint``: Boolean determining whether to automatically print this
       task's return value to standard output when invoked directly via the CLI.
       Defaults to False.
+    * ``inputs``, ``outputs``: Lists of glob patterns (relative to the tasks
+      file's directory) naming the files the task reads and writes. When
+      given, the task is skipped if those files are unchanged since its last
+      successful run; see :ref:`incremental-tasks`.
+    * ``cache``: Whether to cache the task's return value across
+      invocations, reusing it whenever the task is called with the same
+      arguments. May also be a function taking the same arguments as the
+      task, whose return value becomes part of the cache key. Defaults to
+      False. See :ref:`caching-task-results`.
     * ``klass``: Class to instantiate/return. Defaults to `.Task`.
 
     If any non-keyword arguments are given, they are taken as the value of the
@@ -339,6 +358,8 @@ def task(*args: Any, **kwargs: Any) -> Callable:
     .. versionadded:: 1.0
     .. versionchanged:: 1.1
         Added the ``klass`` keyword argument.
+    .. versionchanged:: 3.1
+        Added the ``inputs``, ``outputs`` and ``cache`` keyword arguments.
     """
     klass: Type[Task] = kwargs.pop("klass", Task)
     # @task -- no options were (probably) given.
@@ -428,6 +449,30 @@ class Call:
                 return False
         return True
 
+    def __hash__(self) -> int:
+        return hash(self.fingerprint())
+
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """
+        Return a hashable value identifying this call, for deduping.
+
+        Calls which compare equal have equal fingerprints; so, like equality,
+        the fingerprint ignores ``called_as``.
+
+        .. note::
+            Calls whose ``args`` or ``kwargs`` include unhashable values (such
+            as lists) have unhashable fingerprints; hashing them, or the
+            calls themselves, raises `TypeError`.
+
+        .. versionadded:: 3.1
+        """
+        # NOTE: not hash(self.task), which disagrees with Task.__eq__ for
+        # tasks wrapping distinct functions sharing the same code.
+        task = self.task
+        body = getattr(task.body, "__code__", task.body)
+        kwargs = tuple(sorted(self.kwargs.items()))
+        return (task.name, body, self.args, kwargs)
+
     def make_context(
         self,
         config: "Config",
@@ -8,7 +8,7 @@ logic-flow interruptions.
 """
 
 from contextlib import contextmanager
-from typing import Generator, IO, Optional, Tuple
+from typing import Any, Generator, IO, List, Optional, Tuple
 import os
 import select
 import sys
@@ -224,6 +224,30 @@ def ready_for_reading(input_: IO) -> bool:
         return bool(reads and reads[0] is input_)
 
 
+def wait_for_reading(input_: IO, wakeup_fd: int) -> bool:
+    """
+    Block until ``input_`` is ready for reading, or ``wakeup_fd`` is.
+
+    Unlike `ready_for_reading`, this does not poll; it sleeps in ``select``
+    until there is something to do. Writing to ``wakeup_fd`` (typically the
+    write end of a pipe whose read end is given here) cuts the wait short.
+
+    Only usable on non-Windows platforms, with streams passing `has_fileno`.
+
+    :param input_: Input stream object (file-like).
+    :param int wakeup_fd: A file descriptor whose readability ends the wait.
+
+    :returns:
+        ``True`` if ``input_`` is readable, ``False`` if only ``wakeup_fd``
+        is (or the wait was otherwise interrupted.)
+
+    .. versionadded:: 3.1
+    """
+    watched: List[Any] = [input_, wakeup_fd]
+    reads, _, _ = select.select(watched, [], [])
+    return any(x is input_ for x in reads)
+
+
 def bytes_to_read(input_: IO) -> int:
     """
     Query stream ``input_`` to see how many bytes may be readable.
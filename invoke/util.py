@@ -1,7 +1,17 @@
 from collections import namedtuple
 from contextlib import contextmanager
 from types import TracebackType
-from typing import Any, Generator, List, IO, Optional, Tuple, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    List,
+    IO,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 import io
 import logging
 import os
@@ -176,6 +186,11 @@ class ExceptionHandlingThread(threading.Thread):
         self.daemon = True
         # Track exceptions raised in run()
         self.kwargs = kwargs
+        #: An optional callable (taking no arguments) which is called from
+        #: within the thread, just before it exits, if an exception was
+        #: raised. Useful for waking up a parent blocked on something other
+        #: than this thread.
+        self.on_exception: Optional[Callable[[], None]] = None
         # TODO: legacy cruft that needs to be removed
         self.exc_info: Optional[
             Union[
@@ -206,7 +221,7 @@ class ExceptionHandlingThread(threading.Thread):
                 # and let it continue acting like a normal thread (meh)
                 # - assume the run/sudo/etc case will use a queue inside its
                 # worker body, orthogonal to how exception handling works
-                self._run()  # type: ignore
+                self._run()
             else:
                 super().run()
         except BaseException:
@@ -221,6 +236,8 @@ class ExceptionHandlingThread(threading.Thread):
             if "target" in self.kwargs:
                 name = self.kwargs["target"].__name__
             debug(msg.format(self.exc_info[1], name))  # noqa
+            if self.on_exception is not None:
+                self.on_exception()
 
     def exception(self) -> Optional["ExceptionWrapper"]:
         """
@@ -1,10 +1,85 @@
 import re
 import threading
-from typing import Generator, Iterable
+from typing import Any, Dict, Generator, Iterable, List, Optional, Union
 
 from .exceptions import ResponseNotAccepted
 
 
+class StreamWindow:
+    """
+    A bounded, rolling view of the most recent data seen on one stream.
+
+    `.Runner` keeps one of these per watched subprocess stream, appending each
+    newly decoded chunk, and hands it to incremental `.StreamWatcher` objects
+    (see `StreamWatcher.submit_window`). Watchers thus only ever look at the
+    newest chunk plus at most ``size`` characters of lookback, instead of at
+    the entire stream so far.
+
+    Offsets (`start`, `end`, `chunk_start`) are absolute positions within the
+    stream as a whole, so watchers can remember "where they were" across
+    calls even though older data has been discarded.
+
+    .. versionadded:: 3.1
+    """
+
+    def __init__(self, size: int) -> None:
+        #: Maximum number of characters retained from before the newest chunk.
+        self.size = size
+        #: Lookback data plus the newest chunk.
+        self.text = ""
+        #: Absolute stream offset of the first character in `text`.
+        self.start = 0
+        #: Absolute stream offset of the first character of the newest chunk.
+        self.chunk_start = 0
+        self._state: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def end(self) -> int:
+        """
+        Absolute stream offset just past the last character seen.
+        """
+        return self.start + len(self.text)
+
+    @property
+    def chunk(self) -> str:
+        """
+        The most recently appended chunk of data.
+        """
+        offset = self.chunk_start - self.start
+        return self.text[offset:]
+
+    def append(self, chunk: str) -> None:
+        """
+        Add ``chunk`` to the window, discarding data beyond the lookback size.
+        """
+        size = self.size
+        lookback = self.text[-size:] if size else ""
+        end = self.end
+        self.start = end - len(lookback)
+        self.chunk_start = end
+        self.text = lookback + chunk
+
+    def since(self, offset: int) -> str:
+        """
+        Return retained text from absolute ``offset`` onwards.
+
+        If ``offset`` has already scrolled out of the window, everything
+        retained is returned instead.
+        """
+        relative = max(offset - self.start, 0)
+        return self.text[relative:]
+
+    def state_for(self, watcher: "StreamWatcher") -> Dict[str, Any]:
+        """
+        Return a scratch dict private to ``watcher``, for this stream only.
+
+        Storing per-stream bookkeeping here (instead of on the watcher itself)
+        means a single watcher instance works correctly no matter which thread
+        services which stream, and starts fresh for every command.
+        """
+        return self._state.setdefault(id(watcher), {})
+
+
 class StreamWatcher(threading.local):
     """
     A class whose subclasses may act on seen stream data from subprocesses.
@@ -32,9 +107,31 @@ class StreamWatcher(threading.local):
         be used to 'watch' both subprocess stdout and stderr in separate
         threads.
 
+    Subclasses may instead (or additionally) implement the incremental
+    `submit_window` API, by setting `lookback` to an integer. Such watchers
+    are only shown each newly read chunk plus a bounded amount of preceding
+    data, which keeps watching very large outputs cheap; `submit` then only
+    needs to exist for backwards compatibility.
+
     .. versionadded:: 1.0
+    .. versionchanged:: 3.1
+        Added `lookback` and `submit_window`.
     """
 
+    #: How many characters of already-seen data `submit_window` needs to see
+    #: alongside each new chunk (i.e. roughly the longest expected match.)
+    #: ``None`` (the default) means this watcher only implements `submit`, and
+    #: must be given the full stream contents on every call.
+    lookback: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Subclasses which customize only the full-stream API (e.g. older
+        # Responder subclasses overriding submit()) must keep receiving the
+        # full stream, or their overrides would silently stop being called.
+        if "submit" in vars(cls) and "submit_window" not in vars(cls):
+            cls.lookback = None
+
     def submit(self, stream: str) -> Iterable[str]:
         """
         Act on ``stream`` data, potentially returning responses.
@@ -49,6 +146,23 @@ class StreamWatcher(threading.local):
         """
         raise NotImplementedError
 
+    def submit_window(self, window: StreamWindow) -> Iterable[str]:
+        """
+        Act on newly seen stream data, potentially returning responses.
+
+        Only called when `lookback` is not ``None``.
+
+        :param window:
+            A `StreamWindow` whose ``chunk`` is the newly read data, preceded
+            by at least `lookback` characters of earlier data (when available).
+
+        :returns:
+            An iterable of ``str`` (which may be empty).
+
+        .. versionadded:: 3.1
+        """
+        raise NotImplementedError
+
 
 class Responder(StreamWatcher):
     """
@@ -56,9 +170,19 @@ class Responder(StreamWatcher):
 
     Commonly used to implement password auto-responds for things like ``sudo``.
 
+    .. note::
+        Matches are sought incrementally (see `.StreamWatcher.submit_window`),
+        so a single match may span at most `lookback` characters of output
+        preceding the chunk in which it completes. Raise `lookback` (on an
+        instance or subclass) if you expect unusually long matches.
+
     .. versionadded:: 1.0
+    .. versionchanged:: 3.1
+        Patterns are now precompiled, and scanned incrementally.
     """
 
+    lookback = 4096
+
     def __init__(self, pattern: str, response: str) -> None:
         r"""
         Imprint this `Responder` with necessary parameters.
@@ -71,13 +195,13 @@ class Responder(StreamWatcher):
             The string to submit to the subprocess' stdin when ``pattern`` is
             detected.
         """
-        # TODO: precompile the keys into regex objects
         self.pattern = pattern
+        self.regex = _compile(pattern)
         self.response = response
         self.index = 0
 
     def pattern_matches(
-        self, stream: str, pattern: str, index_attr: str
+        self, stream: str, pattern: Union[str, "re.Pattern"], index_attr: str
     ) -> Iterable[str]:
         """
         Generic "search for pattern in stream, using index" behavior.
@@ -86,7 +210,7 @@ class Responder(StreamWatcher):
         concurrently.
 
         :param str stream: The same data passed to ``submit``.
-        :param str pattern: The pattern to search for.
+        :param pattern: The pattern (string or compiled regex) to search for.
         :param str index_attr: The name of the index attribute to use.
         :returns: An iterable of string matches.
 
@@ -98,17 +222,44 @@ class Responder(StreamWatcher):
         index = getattr(self, index_attr)
         new = stream[index:]
         # Search, across lines if necessary
-        matches = re.findall(pattern, new, re.S)
+        matches = _compile(pattern).findall(new)
         # Update seek index if we've matched
         if matches:
             setattr(self, index_attr, index + len(new))
         return matches
 
+    def window_matches(
+        self,
+        window: StreamWindow,
+        pattern: Union[str, "re.Pattern"],
+        index_attr: str,
+    ) -> List[str]:
+        """
+        Incremental equivalent of `pattern_matches`, for use with windows.
+
+        The "seek index" is kept per stream, inside ``window``, under the name
+        ``index_attr``; it has the same meaning as in `pattern_matches`, and
+        is mirrored onto the attribute of that name, as before.
+
+        .. versionadded:: 3.1
+        """
+        state = window.state_for(self)
+        new = window.since(state.get(index_attr, 0))
+        matches = _compile(pattern).findall(new)
+        if matches:
+            state[index_attr] = window.end
+            setattr(self, index_attr, window.end)
+        return matches
+
     def submit(self, stream: str) -> Generator[str, None, None]:
         # Iterate over findall() response in case >1 match occurred.
-        for _ in self.pattern_matches(stream, self.pattern, "index"):
+        for _ in self.pattern_matches(stream, self.regex, "index"):
             yield self.response
 
+    def submit_window(self, window: StreamWindow) -> List[str]:
+        matches = self.window_matches(window, self.regex, "index")
+        return [self.response for _ in matches]
+
 
 class FailingResponder(Responder):
     """
@@ -124,6 +275,7 @@ class FailingResponder(Responder):
     def __init__(self, pattern: str, response: str, sentinel: str) -> None:
         super().__init__(pattern, response)
         self.sentinel = sentinel
+        self.sentinel_regex = _compile(sentinel)
         self.failure_index = 0
         self.tried = False
 
@@ -131,7 +283,19 @@ class FailingResponder(Responder):
         # Behave like regular Responder initially
         response = super().submit(stream)
         # Also check stream for our failure sentinel
-        failed = self.pattern_matches(stream, self.sentinel, "failure_index")
+        failed = self.pattern_matches(
+            stream, self.sentinel_regex, "failure_index"
+        )
+        return self._check(response, failed)
+
+    def submit_window(self, window: StreamWindow) -> List[str]:
+        response = super().submit_window(window)
+        failed = self.window_matches(
+            window, self.sentinel_regex, "failure_index"
+        )
+        return self._check(response, failed)
+
+    def _check(self, response: Any, failed: Iterable[str]) -> Any:
         # Error out if we seem to have failed after a previous response.
         if self.tried and failed:
             err = 'Auto-response to r"{}" failed with {!r}!'.format(
@@ -143,3 +307,10 @@ class FailingResponder(Responder):
             self.tried = True
         # Again, behave regularly by default.
         return response
+
+
+def _compile(pattern: Union[str, "re.Pattern"]) -> "re.Pattern":
+    # Patterns are always searched across lines; compiled ones are used as-is.
+    if isinstance(pattern, str):
+        return re.compile(pattern, re.S)
+    return pattern
@@ -1,4 +1,5 @@
 import os
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -8,7 +9,7 @@ from invocations.packaging import release, vendorize
 from invocations.pytest import coverage as coverage_
 from invocations.pytest import test as test_
 
-from invoke import Collection, Context, Exit, task
+from invoke import Collection, Context, Exit, Local, task
 
 
 @task
@@ -104,6 +105,25 @@ def regression(c: Context, jobs: int = 8) -> None:
     c.run(cmd.format(jobs))
 
 
+@task
+def benchmark(c: Context, megabytes: int = 256) -> None:
+    """
+    Compare subprocess output throughput with fixed vs adaptive read sizes.
+
+    :param int megabytes: How much output the benchmark command generates.
+    """
+    cmd = "head -c {}M /dev/zero".format(megabytes)
+    fixed = Local.read_chunk_size
+    # NOTE: capture="tail" keeps memory use flat while still making run()
+    # read (rather than hand off) the output; read_chunk_max=None means
+    # "whatever the config says", i.e. adaptive sizing.
+    for label, maximum in (("fixed", fixed), ("adaptive", None)):
+        start = time.perf_counter()
+        c.run(cmd, hide=True, capture="tail", read_chunk_max=maximum)
+        elapsed = time.perf_counter() - start
+        print("{:>8}: {:.1f} MiB/s".format(label, megabytes / elapsed))
+
+
 # TODO: hoist up into invocations.checks once proven/needed elsewhere
 @task
 def typecheck(c: Context, opts: str = "") -> None:
@@ -131,6 +151,7 @@ def typecheck(c: Context, opts: str = "") -> None:
 
 ns = Collection(
     # Local
+    benchmark,
     integration,
     regression,
     test,
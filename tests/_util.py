@@ -211,7 +211,11 @@ def mock_pty(
             # We don't really need to care about waiting since not truly
             # forking/etc, so here we just return a nonzero "pid" + sentinel
             # wait-status value (used in some tests about WIFEXITED etc)
-            os.waitpid.return_value = None, Mock(name="exitstatus")
+            os.wait4.return_value = (
+                None,
+                Mock(name="exitstatus"),
+                Mock(name="rusage", ru_maxrss=0),
+            )
             # Either or both of these may get called, depending...
             os.WEXITSTATUS.return_value = exit
             os.WTERMSIG.return_value = exit
@@ -250,7 +254,7 @@ def mock_pty(
             assert ioctl.call_args_list[0][0][1] == termios.TIOCGWINSZ
             assert ioctl.call_args_list[1][0][1] == termios.TIOCSWINSZ
             if not skip_asserts:
-                for name in ("execvpe", "waitpid"):
+                for name in ("execvpe", "wait4"):
                     assert getattr(os, name).called
                 # Ensure at least one of the exit status getters was called
                 assert os.WEXITSTATUS.called or os.WTERMSIG.called
@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import Mock, patch
+
+import pytest
+
+from invoke import Call, Config, Context, Task
+from invoke.cache import (
+    DirectoryCache,
+    SqliteCache,
+    TaskCache,
+    cache_key,
+    get_task_cache,
+)
+
+
+class cache_key_:
+    def setup_method(self):
+        self.task = Task(lambda c, x=0: None, name="mytask")
+        self.c = Context()
+
+    def _key(self, *args, **kwargs):
+        return cache_key(Call(self.task, args=args, kwargs=kwargs), self.c)
+
+    def is_stable(self):
+        assert self._key(1, x=2) == self._key(1, x=2)
+
+    def varies_with_arguments(self):
+        keys = {self._key(), self._key(1), self._key(x=1)}
+        assert len(keys) == 3
+
+    def varies_with_task_name(self):
+        other = Task(self.task.body, name="other")
+        assert cache_key(Call(other), self.c) != self._key()
+
+    def ignores_called_as(self):
+        call = Call(self.task, called_as="alias")
+        assert cache_key(call, self.c) == self._key()
+
+    def includes_key_function_result(self):
+        key_func = Mock(return_value="v1")
+        self.task.cache = key_func
+        first = self._key(1, x=2)
+        key_func.assert_called_once_with(self.c, 1, x=2)
+        assert self._key(1, x=2) == first
+        key_func.return_value = "v2"
+        assert self._key(1, x=2) != first
+
+
+class TaskCache_:
+    def methods_are_abstract(self):
+        cache = TaskCache("nope")
+        for method, args in (("get", ["k"]), ("set", ["k", 1]), ("evict", [])):
+            with pytest.raises(NotImplementedError):
+                getattr(cache, method)(*args)
+
+
+# Same behavior expected of both stores; subclasses just pick which.
+class _Store:
+    _class = DirectoryCache
+
+    def _cache(self, tmp_path, **kwargs):
+        return self._class(str(tmp_path / "cache"), **kwargs)
+
+    def missing_keys_raise_KeyError(self, tmp_path):
+        with pytest.raises(KeyError):
+            self._cache(tmp_path).get("nope")
+
+    def stores_values_across_instances(self, tmp_path):
+        self._cache(tmp_path).set("key", {"version": [1, 2]})
+        assert self._cache(tmp_path).get("key") == {"version": [1, 2]}
+
+    def overwrites_values(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("key", 1)
+        cache.set("key", 2)
+        assert cache.get("key") == 2
+
+    def stores_None(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("key", None)
+        assert cache.get("key") is None
+
+    def skips_unpicklable_values(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("key", threading.Lock())
+        with pytest.raises(KeyError):
+            cache.get("key")
+
+    def expired_values_are_misses(self, tmp_path):
+        cache = self._cache(tmp_path, max_age=60)
+        cache.set("key", 1)
+        with pytest.raises(KeyError):
+            with _later(61):
+                cache.get("key")
+
+    def evicts_expired_values(self, tmp_path):
+        cache = self._cache(tmp_path, max_age=60)
+        cache.set("old", 1)
+        with _later(61):
+            cache.set("new", 2)
+        cache.max_age = None
+        with pytest.raises(KeyError):
+            cache.get("old")
+        assert cache.get("new") == 2
+
+    def evicts_oldest_values_beyond_max_size(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("old", "x" * 100)
+        with _later(1):
+            cache.set("middle", "y" * 100)
+        cache.max_size = 250
+        with _later(2):
+            cache.set("new", "z" * 100)
+        with pytest.raises(KeyError):
+            cache.get("old")
+        assert cache.get("middle") == "y" * 100
+        assert cache.get("new") == "z" * 100
+
+
+@contextmanager
+def _later(seconds):
+    # Pretend time has passed, for caches & the files they write.
+    now = time.time() + seconds
+    real_replace = os.replace
+
+    def replace(src, dst):
+        real_replace(src, dst)
+        os.utime(dst, (now, now))
+
+    with patch("invoke.cache.time.time", return_value=now):
+        with patch("invoke.cache.os.replace", side_effect=replace):
+            yield
+
+
+class DirectoryCache_(_Store):
+    def keeps_a_file_per_value(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("one", 1)
+        cache.set("two", 2)
+        files = sorted(os.listdir(cache.path))
+        assert files == ["one.pickle", "two.pickle"]
+
+    def corrupt_files_are_misses(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("key", 1)
+        with open(os.path.join(cache.path, "key.pickle"), "wb") as fd:
+            fd.write(b"garbage")
+        with pytest.raises(KeyError):
+            cache.get("key")
+
+
+class SqliteCache_(_Store):
+    _class = SqliteCache
+
+    def keeps_values_in_one_file(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("one", 1)
+        cache.set("two", 2)
+        assert os.path.isfile(cache.path)
+
+
+class get_task_cache_:
+    def _settings(self, **kwargs):
+        return Config(overrides={"tasks": {"cache": kwargs}}).tasks.cache
+
+    def returns_None_when_disabled(self):
+        assert get_task_cache(self._settings(enabled=False), "/") is None
+
+    def defaults_to_a_DirectoryCache_in_root(self):
+        cache = get_task_cache(self._settings(), "/root")
+        assert isinstance(cache, DirectoryCache)
+        assert cache.path == os.path.join("/root", ".invoke-cache")
+
+    def selects_backends_by_name(self):
+        cache = get_task_cache(self._settings(backend="sqlite"), "/root")
+        assert isinstance(cache, SqliteCache)
+        assert cache.path == os.path.join("/root", ".invoke-cache.sqlite3")
+
+    def selects_backends_by_dotted_path(self):
+        settings = self._settings(backend="invoke.cache.SqliteCache")
+        assert isinstance(get_task_cache(settings, "/"), SqliteCache)
+
+    def honors_path_and_limits(self):
+        settings = self._settings(path="/tmp/cache", max_age=5, max_size=10)
+        cache = get_task_cache(settings, "/root")
+        assert cache.path == "/tmp/cache"
+        assert (cache.max_age, cache.max_size) == (5, 10)
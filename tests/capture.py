@@ -0,0 +1,60 @@
+import mmap
+
+from invoke.capture import NullBuffer, SpillBuffer, TailBuffer
+
+
+class TailBuffer_:
+    def is_a_bytearray(self):
+        assert isinstance(TailBuffer(10), bytearray)
+
+    def keeps_everything_under_the_limit(self):
+        buf = TailBuffer(10)
+        buf.extend(b"12345")
+        buf.extend(b"678")
+        assert buf == b"12345678"
+        assert buf.discarded == 0
+
+    def keeps_only_the_last_limit_bytes(self):
+        buf = TailBuffer(4)
+        buf.extend(b"123")
+        buf.extend(b"456")
+        assert buf == b"3456"
+        buf.extend(b"7890abc")
+        assert buf == b"0abc"
+        assert buf.discarded == 9
+
+
+class SpillBuffer_:
+    def stays_in_memory_under_the_limit(self):
+        buf = SpillBuffer(10)
+        buf.extend(b"12345")
+        assert not buf.spilled
+        assert len(buf) == 5
+        data = buf.finish()
+        assert isinstance(data, bytearray)
+        assert data == b"12345"
+
+    def spills_to_a_temporary_file_beyond_the_limit(self):
+        buf = SpillBuffer(4)
+        buf.extend(b"123")
+        buf.extend(b"456")
+        assert buf.spilled
+        buf.extend(b"789")
+        assert len(buf) == 9
+        buf.file.seek(0)
+        assert buf.file.read() == b"123456789"
+
+    def finishes_as_a_readonly_mmap_once_spilled(self):
+        buf = SpillBuffer(4)
+        buf.extend(b"123456789")
+        data = buf.finish()
+        assert isinstance(data, mmap.mmap)
+        assert data[:] == b"123456789"
+        assert buf.file.closed
+
+
+class NullBuffer_:
+    def discards_everything(self):
+        buf = NullBuffer()
+        buf.extend(b"whatever")
+        assert len(buf) == 0
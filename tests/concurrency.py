@@ -1,4 +1,5 @@
 from queue import Queue
+from unittest.mock import Mock
 
 from invoke.util import ExceptionWrapper, ExceptionHandlingThread as EHThread
 
@@ -47,6 +48,22 @@ class ExceptionHandlingThread_:
             # Not dead, just uh...sleeping?
             assert not t.is_dead
 
+        def calls_on_exception_hook_when_excepting(self):
+            hook = Mock()
+            t = EHThread(target=self.worker, args=[None])
+            t.on_exception = hook
+            t.start()
+            t.join()
+            hook.assert_called_once_with()
+
+        def does_not_call_on_exception_hook_when_happy(self):
+            hook = Mock()
+            t = EHThread(target=self.worker, args=[Queue()])
+            t.on_exception = hook
+            t.start()
+            t.join()
+            assert not hook.called
+
     class via_subclassing:
         def setup_method(self):
             class MyThread(EHThread):
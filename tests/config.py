@@ -7,7 +7,7 @@ import pytest
 from pytest_relaxed import raises
 
 from invoke import config as config_mod  # for accessing mocks
-from invoke.runners import Local
+from invoke.runners import AsyncLocal, Local
 from invoke.config import Config
 from invoke.exceptions import (
     AmbiguousEnvVar,
@@ -91,8 +91,16 @@ class Config_:
             # reliably (even if their defaults are often implied by the tests
             # which override them, e.g. runner tests around warn=True, etc).
             expected = {
+                "pool": {
+                    "dispatch": "least_busy",
+                    "max_commands": 1000,
+                    "size": 4,
+                },
                 "run": {
                     "asynchronous": False,
+                    "capture": True,
+                    "capture_limit": 1048576,
+                    "cwd": None,
                     "disown": False,
                     "dry": False,
                     "echo": False,
@@ -104,14 +112,18 @@ class Config_:
                     "fallback": True,
                     "hide": None,
                     "in_stream": None,
+                    "io_backend": "threads",
                     "out_stream": None,
                     "pty": False,
+                    "read_chunk_max": 1048576,
+                    "read_chunk_min": None,
                     "replace_env": False,
                     "shell": "bash",
+                    "spawn_backend": "direct",
                     "warn": False,
                     "watchers": [],
                 },
-                "runners": {"local": Local},
+                "runners": {"async_local": AsyncLocal, "local": Local},
                 "sudo": {
                     "password": None,
                     "prompt": "[sudo] password: ",
@@ -119,10 +131,19 @@ class Config_:
                 },
                 "tasks": {
                     "auto_dash_names": True,
+                    "cache": {
+                        "backend": "directory",
+                        "enabled": True,
+                        "max_age": None,
+                        "max_size": None,
+                        "path": None,
+                    },
                     "collection_name": "tasks",
                     "dedupe": True,
                     "executor_class": None,
+                    "fingerprint_file": ".invoke-fingerprints.json",
                     "ignore_unknown_help": False,
+                    "max_workers": None,
                     "search_root": None,
                 },
                 "timeouts": {"command": None},
@@ -243,7 +264,7 @@ class Config_:
                 expected = """
 No attribute or config key found for 'nope'
 
-Valid keys: ['run', 'runners', 'sudo', 'tasks', 'timeouts']
+Valid keys: ['pool', 'run', 'runners', 'sudo', 'tasks', 'timeouts']
 
 Valid real attributes: ['clear', 'clone', 'env_prefix', 'file_prefix', 'from_data', 'global_defaults', 'load_base_conf_files', 'load_collection', 'load_defaults', 'load_overrides', 'load_project', 'load_runtime', 'load_shell_env', 'load_system', 'load_user', 'merge', 'pop', 'popitem', 'prefix', 'set_project_location', 'set_runtime_path', 'setdefault', 'update']
 """.strip()  # noqa
@@ -588,7 +609,7 @@ Valid real attributes: ['clear', 'clone', 'env_prefix', 'file_prefix', 'from_dat
             assert c._project_path is None
             c.load_project()
             assert list(c._project.keys()) == []
-            defaults = ["tasks", "run", "runners", "sudo", "timeouts"]
+            defaults = ["tasks", "pool", "run", "runners", "sudo", "timeouts"]
             assert set(c.keys()) == set(defaults)
 
         def project_location_can_be_set_after_init(self):
@@ -1,8 +1,11 @@
+import asyncio
 import os
 import pickle
 import re
 import sys
-from unittest.mock import Mock, call, patch
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, call, patch
 
 from _util import _Dummy, mock_subprocess
 from pytest import mark, raises, skip
@@ -10,16 +13,20 @@ from pytest_relaxed import trap
 
 from invoke import (
     AuthFailure,
+    BatchFailure,
     Config,
     Context,
+    Failure,
     FailingResponder,
     MockContext,
     ResponseNotAccepted,
     Result,
     StreamWatcher,
+    UnexpectedExit,
 )
 
 local_path = "invoke.config.Local"
+async_local_path = "invoke.config.AsyncLocal"
 _escaped_prompt = re.escape(Config().sudo.prompt)
 
 
@@ -62,6 +69,29 @@ class Context_:
         def sudo(self):
             self._expect_attr("sudo")
 
+        class arun:
+            def exists(self):
+                self._expect_attr("arun")
+
+            @patch(async_local_path)
+            def defaults_to_AsyncLocal(self, AsyncLocal):
+                AsyncLocal.return_value.arun = AsyncMock()
+                c = Context()
+                asyncio.run(c.arun("foo"))
+                AsyncLocal.assert_called_once_with(c)
+                AsyncLocal.return_value.arun.assert_awaited_once_with("foo")
+
+            def honors_runner_config_setting(self):
+                runner_class = Mock()
+                runner_class.return_value.arun = AsyncMock()
+                config = Config({"runners": {"async_local": runner_class}})
+                c = Context(config)
+                asyncio.run(c.arun("foo"))
+                runner_class.return_value.arun.assert_awaited_once_with("foo")
+
+        def asudo(self):
+            self._expect_attr("asudo")
+
     class configuration_proxy:
         "Dict-like proxy for self.config"
 
@@ -227,6 +257,34 @@ class Context_:
             cmd = "cd foo && whoami"
             assert runner.run.call_args[0][0] == cmd
 
+        @patch(local_path)
+        def becomes_cwd_kwarg_for_argv_commands(self, Local):
+            runner = Local.return_value
+            c = Context()
+            with c.cd("/var/www"):
+                with c.cd("my site"):
+                    c.run(["ls", "-l"], hide=True)
+            runner.run.assert_called_once_with(
+                ["ls", "-l"], hide=True, cwd="/var/www/my site"
+            )
+
+        @patch(local_path)
+        def expands_home_directory_for_argv_commands(self, Local):
+            runner = Local.return_value
+            c = Context()
+            with c.cd("~/code"):
+                c.run(["ls"])
+            cwd = runner.run.call_args[1]["cwd"]
+            assert cwd == os.path.expanduser("~/code")
+
+        @patch(local_path)
+        def does_not_override_explicit_cwd_for_argv_commands(self, Local):
+            runner = Local.return_value
+            c = Context()
+            with c.cd("foo"):
+                c.run(["ls"], cwd="bar")
+            assert runner.run.call_args[1]["cwd"] == "bar"
+
     class prefix:
         @patch(local_path)
         def prefixes_should_apply_to_run(self, Local):
@@ -292,6 +350,22 @@ class Context_:
             # When bug present, this would be "cd foo && ls"
             assert runner.run.call_args[0][0] == "ls"
 
+        @patch(local_path)
+        def argv_commands_fall_back_to_shell_strings(self, Local):
+            runner = Local.return_value
+            c = Context()
+            with c.cd("foo"):
+                with c.prefix("workon myvenv"):
+                    c.run(["ls", "my dir"])
+            cmd = "cd foo && workon myvenv && ls 'my dir'"
+            runner.run.assert_called_once_with(cmd)
+
+        @patch(local_path)
+        def argv_commands_without_prefixes_are_left_alone(self, Local):
+            runner = Local.return_value
+            Context().run(["ls", "my dir"])
+            runner.run.assert_called_once_with(["ls", "my dir"])
+
     class sudo:
         @patch(local_path)
         def prefixes_command_with_sudo(self, Local):
@@ -513,7 +587,7 @@ class Context_:
         def raises_auth_failure_when_failure_detected(self):
             with patch("invoke.context.FailingResponder") as klass:
                 unacceptable = Mock(side_effect=ResponseNotAccepted)
-                klass.return_value.submit = unacceptable
+                klass.return_value.submit_window = unacceptable
                 excepted = False
                 try:
                     config = Config(overrides={"sudo": {"password": "nope"}})
@@ -530,6 +604,217 @@ class Context_:
                 if not excepted:
                     assert False, "Did not raise AuthFailure!"
 
+    class arun:
+        @patch(async_local_path)
+        def honors_cd_and_prefix(self, AsyncLocal):
+            runner = AsyncLocal.return_value
+            runner.arun = AsyncMock()
+            c = Context()
+            with c.cd("foo"):
+                with c.prefix("source env"):
+                    asyncio.run(c.arun("whoami", hide=True))
+            cmd = "cd foo && source env && whoami"
+            runner.arun.assert_awaited_once_with(cmd, hide=True)
+
+        @patch(async_local_path)
+        def returns_arun_result(self, AsyncLocal):
+            runner = AsyncLocal.return_value
+            runner.arun = AsyncMock(return_value=Result("yup"))
+            assert asyncio.run(Context().arun("whoami")).stdout == "yup"
+
+    class asudo:
+        def _asudo(self, AsyncLocal, **kwargs):
+            runner = AsyncLocal.return_value
+            runner.arun = AsyncMock()
+            asyncio.run(Context().asudo("whoami", **kwargs))
+            return runner.arun.call_args
+
+        @patch(async_local_path)
+        def prefixes_command_with_sudo(self, AsyncLocal):
+            args, _ = self._asudo(AsyncLocal, user="rando")
+            cmd = "sudo -S -p '[sudo] password: ' -H -u rando whoami"
+            assert args[0] == cmd
+
+        @patch(async_local_path)
+        def autoresponds_with_password(self, AsyncLocal):
+            _, kwargs = self._asudo(AsyncLocal, password="secret", warn=True)
+            assert kwargs["warn"] is True
+            (watcher,) = kwargs["watchers"]
+            assert isinstance(watcher, FailingResponder)
+            assert watcher.pattern == _escaped_prompt
+            assert watcher.response == "secret\n"
+
+        @patch(async_local_path)
+        def raises_auth_failure_when_failure_detected(self, AsyncLocal):
+            failure = Failure(Result(), reason=ResponseNotAccepted())
+            AsyncLocal.return_value.arun = AsyncMock(side_effect=failure)
+            with raises(AuthFailure):
+                asyncio.run(Context().asudo("whoami", password="nope"))
+
+        @patch(async_local_path)
+        def reraises_other_failures(self, AsyncLocal):
+            failure = Failure(Result())
+            AsyncLocal.return_value.arun = AsyncMock(side_effect=failure)
+            with raises(Failure) as info:
+                asyncio.run(Context().asudo("whoami"))
+            assert info.value is failure
+
+    class run_many:
+        def _context(self, fail=(), delays=None):
+            # Runner stand-in whose commands "exit 1" if named in 'fail', and
+            # take 'delays[command]' seconds to do so.
+            delays = delays or {}
+
+            def run(command, **kwargs):
+                time.sleep(delays.get(command, 0))
+                result = Result(command=command, exited=int(command in fail))
+                if result.failed and not kwargs.get("warn"):
+                    raise UnexpectedExit(result)
+                return result
+
+            runner_class = Mock()
+            runner_class.return_value.run.side_effect = run
+            config = Config({"runners": {"local": runner_class}})
+            return Context(config), runner_class.return_value.run
+
+        def returns_results_in_command_order_by_default(self):
+            c, _ = self._context(delays={"a": 0.2})
+            results = c.run_many(["a", "b", "c"], max_parallel=3)
+            assert [x.command for x in results] == ["a", "b", "c"]
+
+        def can_return_results_in_completion_order(self):
+            c, _ = self._context(delays={"a": 0.2})
+            results = c.run_many(["a", "b"], max_parallel=2, ordered=False)
+            assert [x.command for x in results] == ["b", "a"]
+
+        def passes_kwargs_through_to_run(self):
+            c, run = self._context()
+            c.run_many(["a"], hide=True, warn=True)
+            run.assert_called_once_with(
+                "a", hide=True, warn=True, in_stream=False
+            )
+
+        def honors_cd_and_prefix(self):
+            c, run = self._context()
+            with c.cd("foo"):
+                c.run_many(["a"])
+            assert run.call_args[0][0] == "cd foo && a"
+
+        def does_not_override_configured_in_stream(self):
+            c, run = self._context()
+            c.config.run.in_stream = sys.stdin
+            c.run_many(["a"])
+            assert "in_stream" not in run.call_args[1]
+
+        def runs_at_most_max_parallel_commands_at_once(self):
+            lock = threading.Lock()
+            counts = {"now": 0, "peak": 0}
+
+            def run(command, **kwargs):
+                with lock:
+                    counts["now"] += 1
+                    counts["peak"] = max(counts["peak"], counts["now"])
+                time.sleep(0.05)
+                with lock:
+                    counts["now"] -= 1
+                return Result(command=command)
+
+            c, runner_run = self._context()
+            runner_run.side_effect = run
+            c.run_many(["a", "b", "c", "d", "e"], max_parallel=2)
+            assert counts["peak"] == 2
+
+        def failures_are_aggregated_into_BatchFailure(self):
+            c, _ = self._context(fail=("b", "d"))
+            with raises(BatchFailure) as info:
+                c.run_many(["a", "b", "c", "d"], max_parallel=2)
+            e = info.value
+            assert [x.command for x in e.results] == ["a", "b", "c", "d"]
+            assert sorted(x.result.command for x in e.failures) == ["b", "d"]
+            assert all(isinstance(x, UnexpectedExit) for x in e.failures)
+            assert e.skipped == []
+
+        def warn_means_failures_are_returned(self):
+            c, _ = self._context(fail=("b",))
+            results = c.run_many(["a", "b"], warn=True)
+            assert [x.exited for x in results] == [0, 1]
+
+        def fail_fast_skips_commands_not_yet_started(self):
+            c, run = self._context(fail=("a",))
+            with raises(BatchFailure) as info:
+                c.run_many(["a", "b", "c"], max_parallel=1, fail_fast=True)
+            assert run.call_count == 1
+            assert info.value.skipped == ["b", "c"]
+
+        def fail_fast_lets_running_commands_finish(self):
+            c, _ = self._context(fail=("a",), delays={"b": 0.2})
+            with raises(BatchFailure) as info:
+                c.run_many(["a", "b", "c"], max_parallel=2, fail_fast=True)
+            assert [x.command for x in info.value.results] == ["a", "b"]
+            assert info.value.skipped == ["c"]
+
+        def other_exceptions_propagate(self):
+            c, run = self._context()
+            run.side_effect = ValueError("nope")
+            with raises(ValueError):
+                c.run_many(["a"])
+
+    class session:
+        @patch("invoke.context.ShellSession")
+        def yields_a_ShellSession_closed_upon_exit(self, ShellSession):
+            c = Context()
+            with c.session() as session:
+                assert session is ShellSession.return_value
+                ShellSession.assert_called_once_with(c)
+                session.close.assert_not_called()
+            session.close.assert_called_once_with()
+
+        @patch("invoke.context.ShellSession")
+        def run_goes_through_the_session(self, ShellSession):
+            session = ShellSession.return_value
+            session.can_run.return_value = True
+            c = Context()
+            with c.session():
+                result = c.run("foo", hide=True)
+            session.can_run.assert_called_once_with({"hide": True})
+            session.run.assert_called_once_with("foo", hide=True)
+            assert result is session.run.return_value
+
+        @patch(local_path)
+        @patch("invoke.context.ShellSession")
+        def run_falls_back_to_Local_when_session_cannot_run(
+            self, ShellSession, Local
+        ):
+            session = ShellSession.return_value
+            session.can_run.return_value = False
+            c = Context()
+            with c.session():
+                c.run("foo", pty=True)
+            session.run.assert_not_called()
+            Local.return_value.run.assert_called_once_with("foo", pty=True)
+
+        @patch(local_path)
+        @patch("invoke.context.ShellSession")
+        def only_applies_within_the_block(self, ShellSession, Local):
+            c = Context()
+            with c.session():
+                pass
+            c.run("foo")
+            ShellSession.return_value.run.assert_not_called()
+            Local.return_value.run.assert_called_once_with("foo")
+
+        @patch("invoke.context.ShellSession")
+        def nested_sessions_restore_the_outer_one(self, ShellSession):
+            outer, inner = Mock(), Mock()
+            ShellSession.side_effect = [outer, inner]
+            c = Context()
+            with c.session():
+                with c.session():
+                    c.run("foo")
+                c.run("bar")
+            inner.run.assert_called_once_with("foo")
+            outer.run.assert_called_once_with("bar")
+
     def can_be_pickled(self):
         c = Context()
         c.foo = {"bar": {"biz": ["baz", "buzz"]}}
@@ -553,6 +838,12 @@ class MockContext_:
         c = MockContext(run=Result("some output"))
         assert c.run("doesn't mattress").stdout == "some output"
 
+    def arun_and_asudo_yield_results_too(self):
+        c = MockContext(arun=Result("a"), asudo=Result("b"))
+        assert asyncio.run(c.arun("whatever")).stdout == "a"
+        assert asyncio.run(c.asudo("whatever")).stdout == "b"
+        c.arun.assert_called_once_with("whatever")
+
     def return_value_kwargs_can_take_iterables_too(self):
         c = MockContext(run=(Result("some output"), Result("more!")))
         assert c.run("doesn't mattress").stdout == "some output"
@@ -574,6 +865,12 @@ class MockContext_:
         assert c.run("string").stdout == "yup"
         assert c.run("foobar").stdout == "bar"
 
+    def argv_commands_match_as_equivalent_strings(self):
+        c = MockContext(run={"ls 'my dir'": Result("yup")})
+        result = c.run(["ls", "my dir"])
+        assert result.stdout == "yup"
+        assert result.command == "ls 'my dir'"
+
     class boolean_result_shorthand:
         def as_singleton_args(self):
             assert MockContext(run=True).run("anything").ok
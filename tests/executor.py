@@ -1,9 +1,22 @@
-from unittest.mock import Mock
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
 
 import pytest
 from _util import expect
 
-from invoke import Collection, Config, Context, Executor, Task, call, task
+from invoke import (
+    Call,
+    Collection,
+    Config,
+    Context,
+    Executor,
+    ParallelExecutor,
+    Task,
+    call,
+    task,
+)
 from invoke.parser import ParserContext, ParseResult
 
 # TODO: why does this not work as a decorator? probably relaxed's fault - but
@@ -264,6 +277,221 @@ bar
                 param_list.append(body_call[0][1])
             assert set(param_list) == {5, 7}
 
+        def deduping_handles_calls_with_unhashable_args(self):
+            body = Mock()
+            t1 = Task(body)
+            pre = [call(t1, [5]), call(t1, [7]), call(t1, [5])]
+            t2 = Task(Mock(), pre=pre)
+            e = Executor(collection=Collection(t1=t1, t2=t2))
+            e.execute("t2")
+            param_list = [x[0][1] for x in body.call_args_list]
+            assert param_list == [[5], [7]]
+
+        def expansion_walks_shared_pre_tasks_once(self):
+            class Pre(list):
+                walks = 0
+
+                def __iter__(self):
+                    self.walks += 1
+                    return super().__iter__()
+
+            setup = Task(Mock())
+            pre = Pre([setup])
+            t1 = Task(Mock(), pre=pre)
+            t2 = Task(Mock(), pre=[t1])
+            t3 = Task(Mock(), pre=[t1, t2])
+            e = Executor(collection=Collection(t1=t1, t2=t2, t3=t3))
+            calls = e.expand_calls([Call(t3), Call(t2)])
+            expected = [setup, t1, setup, t1, t2, t3, setup, t1, t2]
+            assert [x.task for x in calls] == expected
+            assert pre.walks == 1
+
+        def expansion_preserves_each_calls_name(self):
+            t1 = Task(Mock())
+            coll = Collection(t1=t1)
+            e = Executor(collection=coll)
+            calls = e.expand_calls([Call(t1, called_as="one"), Call(t1)])
+            assert [x.called_as for x in calls] == ["one", None]
+
+    class incremental:
+        def setup_method(self):
+            self.runs = 0
+
+        def _collection(self, root, **kwargs):
+            def build(c):
+                self.runs += 1
+                (root / "out.txt").write_text("built")
+                return "built"
+
+            kwargs.setdefault("inputs", ["src/*.py"])
+            kwargs.setdefault("outputs", ["out.txt"])
+            self._files = kwargs
+            self._build = Task(build, name="build", **kwargs)
+            coll = Collection(loaded_from=str(root))
+            coll.add_task(self._build)
+            (root / "src").mkdir()
+            (root / "src" / "a.py").write_text("a")
+            return coll
+
+        def skips_tasks_whose_files_are_unchanged(self, tmp_path):
+            coll = self._collection(tmp_path)
+            assert Executor(coll).execute("build") == {self._build: "built"}
+            assert Executor(coll).execute("build") == {}
+            assert self.runs == 1
+            assert (tmp_path / ".invoke-fingerprints.json").exists()
+
+        def runs_tasks_whose_inputs_changed(self, tmp_path):
+            coll = self._collection(tmp_path)
+            Executor(coll).execute("build")
+            (tmp_path / "src" / "a.py").write_text("changed")
+            Executor(coll).execute("build")
+            (tmp_path / "src" / "b.py").write_text("new")
+            Executor(coll).execute("build")
+            assert self.runs == 3
+
+        def runs_tasks_whose_outputs_changed_or_vanished(self, tmp_path):
+            coll = self._collection(tmp_path)
+            Executor(coll).execute("build")
+            (tmp_path / "out.txt").write_text("tampered")
+            Executor(coll).execute("build")
+            (tmp_path / "out.txt").unlink()
+            Executor(coll).execute("build")
+            assert self.runs == 3
+
+        def touching_files_does_not_count_as_change(self, tmp_path):
+            coll = self._collection(tmp_path)
+            Executor(coll).execute("build")
+            os.utime(str(tmp_path / "src" / "a.py"), ns=(1, 1))
+            Executor(coll).execute("build")
+            assert self.runs == 1
+
+        def failed_runs_are_not_recorded(self, tmp_path):
+            coll = self._collection(tmp_path)
+
+            def explode(c):
+                self.runs += 1
+                raise ValueError
+
+            coll.tasks["build"].body = explode
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    Executor(coll).execute("build")
+            assert self.runs == 2
+
+        def calls_with_other_arguments_are_tracked_separately(self, tmp_path):
+            coll = self._collection(tmp_path, outputs=[])
+            coll.tasks["build"].body = lambda c, n=0: setattr(
+                self, "runs", self.runs + 1
+            )
+            executor = Executor(coll)
+            executor.execute(("build", {"n": 1}))
+            executor.execute(("build", {"n": 2}))
+            executor.execute(("build", {"n": 1}))
+            assert self.runs == 2
+
+        def same_named_tasks_in_other_namespaces_are_tracked_separately(
+            self, tmp_path
+        ):
+            coll = self._collection(tmp_path)
+
+            # Same name, inputs & outputs, but from another tasks module
+            def build(c):
+                return self._build.body(c)
+
+            build.__module__ = "other_tasks"
+            other = Collection("other")
+            other.add_task(Task(build, name="build", **self._files))
+            coll.add_collection(other)
+            Executor(coll).execute("build")
+            Executor(coll).execute("other.build")
+            assert self.runs == 2
+
+        def tasks_without_inputs_or_outputs_always_run(self, tmp_path):
+            coll = self._collection(tmp_path, inputs=[], outputs=[])
+            Executor(coll).execute("build")
+            Executor(coll).execute("build")
+            assert self.runs == 2
+            assert not (tmp_path / ".invoke-fingerprints.json").exists()
+
+        def may_be_disabled_via_config(self, tmp_path):
+            coll = self._collection(tmp_path)
+            config = Config(overrides={"tasks": {"fingerprint_file": None}})
+            Executor(coll, config).execute("build")
+            Executor(coll, config).execute("build")
+            assert self.runs == 2
+
+        def database_location_is_configurable(self, tmp_path):
+            coll = self._collection(tmp_path)
+            path = str(tmp_path / "elsewhere.json")
+            config = Config(overrides={"tasks": {"fingerprint_file": path}})
+            Executor(coll, config).execute("build")
+            assert os.path.exists(path)
+
+    class caching:
+        def _collection(self, root, cache=True):
+            self._body = Mock(return_value={"version": "1.2.3"})
+            self._task = Task(self._body, name="resolve", cache=cache)
+            coll = Collection(loaded_from=str(root))
+            coll.add_task(self._task)
+            return coll
+
+        def reuses_results_across_executors(self, tmp_path):
+            coll = self._collection(tmp_path)
+            first = Executor(coll).execute("resolve")
+            second = Executor(coll).execute("resolve")
+            assert first == second == {self._task: {"version": "1.2.3"}}
+            assert self._body.call_count == 1
+            assert (tmp_path / ".invoke-cache").is_dir()
+
+        def is_opt_in(self, tmp_path):
+            coll = self._collection(tmp_path, cache=False)
+            Executor(coll).execute("resolve")
+            Executor(coll).execute("resolve")
+            assert self._body.call_count == 2
+            assert not (tmp_path / ".invoke-cache").exists()
+
+        def caches_calls_with_other_arguments_separately(self, tmp_path):
+            coll = self._collection(tmp_path)
+            for kwargs in ({"n": 1}, {"n": 2}, {"n": 1}):
+                Executor(coll).execute(("resolve", kwargs))
+            assert self._body.call_count == 2
+
+        def honors_key_functions(self, tmp_path):
+            lockfile = tmp_path / "lockfile"
+            lockfile.write_text("v1")
+            coll = self._collection(
+                tmp_path, cache=lambda c: lockfile.read_text()
+            )
+            Executor(coll).execute("resolve")
+            Executor(coll).execute("resolve")
+            lockfile.write_text("v2")
+            Executor(coll).execute("resolve")
+            assert self._body.call_count == 2
+
+        def failures_are_not_cached(self, tmp_path):
+            coll = self._collection(tmp_path)
+            self._body.side_effect = ValueError
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    Executor(coll).execute("resolve")
+            assert self._body.call_count == 2
+
+        def may_be_disabled_via_config(self, tmp_path):
+            coll = self._collection(tmp_path)
+            config = Config(overrides={"tasks": {"cache": {"enabled": False}}})
+            Executor(coll, config).execute("resolve")
+            Executor(coll, config).execute("resolve")
+            assert self._body.call_count == 2
+
+        def backend_is_configurable(self, tmp_path):
+            coll = self._collection(tmp_path)
+            overrides = {"tasks": {"cache": {"backend": "sqlite"}}}
+            config = Config(overrides=overrides)
+            Executor(coll, config).execute("resolve")
+            Executor(coll, config).execute("resolve")
+            assert self._body.call_count == 1
+            assert (tmp_path / ".invoke-cache.sqlite3").is_file()
+
     class collection_driven_config:
         "Collection-driven config concerns"
 
@@ -334,6 +562,58 @@ bar
         def does_not_fire_on_post_tasks(self):
             expect("-c autoprint post-check", out="")
 
+    class config_loading:
+        def _collection(self):
+            @task
+            def task1(c):
+                return c
+
+            @task
+            def task2(c):
+                return c
+
+            self._tasks = task1, task2
+            coll = Collection(task1, task2)
+            coll.configure({"foo": "default"})
+            return coll
+
+        def collection_configuration_is_obtained_once_per_name(self):
+            coll = self._collection()
+            with patch.object(
+                coll, "configuration", wraps=coll.configuration
+            ) as configuration:
+                config = Config(overrides={"tasks": {"dedupe": False}})
+                Executor(coll, config).execute("task1", "task2", "task1")
+            # (Ignoring the collection's own internal, argument-less calls.)
+            names = [x[0] for x in configuration.call_args_list if x[0]]
+            assert names == [("task1",), ("task2",)]
+
+        def unchanged_levels_are_not_reloaded(self):
+            coll = self._collection()
+            config = Config()
+            with patch.object(
+                config, "load_shell_env", wraps=config.load_shell_env
+            ) as load_shell_env:
+                Executor(coll, config).execute("task1", "task2")
+            assert load_shell_env.call_count == 1
+
+        def shell_env_is_reloaded_when_os_environ_changes(self):
+            coll = self._collection()
+            task1, task2 = self._tasks
+            task1.body = lambda c: os.environ.update(INVOKE_FOO="fromenv")
+            results = Executor(coll).execute("task1", "task2")
+            assert results[task2].foo == "fromenv"
+
+        def shell_env_is_reloaded_when_config_keys_change(self):
+            coll = self._collection()
+            task1, task2 = self._tasks
+            inner = Collection("inner", task2)
+            inner.configure({"newkey": "default"})
+            coll.add_collection(inner)
+            os.environ["INVOKE_NEWKEY"] = "fromenv"
+            results = Executor(coll).execute("task1", "inner.task2")
+            assert results[task2].newkey == "fromenv"
+
     class inter_task_context_and_config_sharing:
         def context_is_new_but_config_is_same(self):
             @task
@@ -404,3 +684,182 @@ bar
             ret = Executor(collection=coll).execute("task1", "task2")
             c2 = ret[task2]
             assert "echo" not in c2.config.run
+
+
+class ParallelExecutor_:
+    def setup_method(self):
+        self.order = []
+        self.lock = threading.Lock()
+
+    def _task(self, name, pre=None, post=None, delay=0):
+        def body(c, *args):
+            time.sleep(delay)
+            with self.lock:
+                self.order.append(name)
+            return name
+
+        return Task(body, name=name, pre=pre or [], post=post or [])
+
+    def _execute(self, coll, *tasks, **settings):
+        config = Config(overrides={"tasks": settings})
+        return ParallelExecutor(collection=coll, config=config).execute(*tasks)
+
+    def is_an_Executor(self):
+        assert issubclass(ParallelExecutor, Executor)
+
+    class graph:
+        def pre_and_post_tasks_are_dependencies(self):
+            setup = self._task("setup")
+            post = self._task("post")
+            build = self._task("build", pre=[setup], post=[post])
+            nodes = ParallelExecutor(Collection(build)).graph([Call(build)])
+            assert [x.call.task for x in nodes] == [setup, build, post]
+            assert [x.deps for x in nodes] == [set(), {0}, {1}]
+
+        def matches_Executor_order(self):
+            foo = self._task("foo")
+            bar = self._task("bar", pre=[foo])
+            post = self._task("post", pre=[bar])
+            biz = self._task("biz", pre=[foo, bar], post=[post, foo])
+            coll = Collection(biz)
+            calls = [Call(biz)]
+            for dedupe in (True, False):
+                executor = ParallelExecutor(coll)
+                nodes = executor.graph(calls, dedupe=dedupe)
+                expanded = executor.expand_calls(calls)
+                if dedupe:
+                    expanded = executor.dedupe(expanded)
+                assert [x.call for x in nodes] == expanded
+
+    class execute:
+        def runs_independent_pre_tasks_concurrently(self):
+            barrier = threading.Barrier(2, timeout=5)
+            setup = self._task("setup")
+            one = Task(lambda c: barrier.wait(), name="one", pre=[setup])
+            two = Task(lambda c: barrier.wait(), name="two", pre=[setup])
+            release = self._task("release", pre=[one, two])
+            self._execute(Collection(release), "release")
+            assert self.order == ["setup", "release"]
+
+        def runs_shared_pre_tasks_once(self):
+            setup = self._task("setup", delay=0.1)
+            one = self._task("one", pre=[setup])
+            two = self._task("two", pre=[setup])
+            release = self._task("release", pre=[one, two])
+            self._execute(Collection(release), "release")
+            assert self.order[0] == "setup"
+            assert sorted(self.order[1:3]) == ["one", "two"]
+            assert self.order[3] == "release"
+
+        def honors_dedupe_setting(self):
+            setup = self._task("setup")
+            one = self._task("one", pre=[setup])
+            two = self._task("two", pre=[setup])
+            release = self._task("release", pre=[one, two])
+            self._execute(Collection(release), "release", dedupe=False)
+            assert self.order.count("setup") == 2
+
+        def post_tasks_finish_before_dependents(self):
+            post = self._task("post", delay=0.1)
+            one = self._task("one", post=[post])
+            two = self._task("two")
+            release = self._task("release", pre=[one, two])
+            self._execute(Collection(release), "release")
+            assert self.order.index("post") < self.order.index("release")
+
+        def runs_top_level_tasks_in_order(self):
+            one = self._task("one", delay=0.1)
+            two = self._task("two")
+            self._execute(Collection(one, two), "one", "two")
+            assert self.order == ["one", "two"]
+
+        def single_worker_runs_tasks_in_Executor_order(self):
+            foo = self._task("foo")
+            bar = self._task("bar", pre=[foo])
+            post = self._task("post")
+            biz = self._task("biz", pre=[bar, foo], post=[post])
+            self._execute(Collection(biz), "biz", max_workers=1)
+            assert self.order == ["foo", "bar", "biz", "post"]
+
+        def returns_task_results(self):
+            setup = self._task("setup")
+            build = self._task("build", pre=[setup])
+            results = self._execute(Collection(build), "build")
+            assert results == {setup: "setup", build: "build"}
+
+        def autoprints_top_level_tasks_only(self, capsys):
+            setup = Task(lambda c: "pre", name="setup")
+            build = Task(
+                lambda c: "built", name="build", pre=[setup], autoprint=True
+            )
+            self._execute(Collection(build), "build")
+            assert capsys.readouterr().out == "built\n"
+
+        def hands_collection_configuration_to_context(self):
+            @task
+            def mytask(c):
+                return c.my_key
+
+            inner = Collection("inner", mytask)
+            inner.configure({"my_key": "value"})
+            results = self._execute(Collection(inner), "inner.mytask")
+            assert results[mytask] == "value"
+
+        def gives_each_task_its_own_config(self):
+            one = Task(lambda c: c.config, name="one")
+            two = Task(lambda c: c.config, name="two")
+            results = self._execute(Collection(one, two), "one", "two")
+            assert results[one] is not results[two]
+
+        def loads_the_shell_env_into_every_tasks_config(self):
+            one = Task(lambda c: c.my_key, name="one")
+            two = Task(lambda c: c.my_key, name="two")
+            coll = Collection(one, two)
+            coll.configure({"my_key": "default"})
+            with patch.dict(os.environ, INVOKE_MY_KEY="fromenv"):
+                results = self._execute(coll, "one", "two")
+            assert results == {one: "fromenv", two: "fromenv"}
+
+        def skips_up_to_date_tasks(self, tmp_path):
+            (tmp_path / "in.txt").write_text("in")
+            setup = self._task("setup")
+            build = Task(
+                lambda c: self.order.append("build"),
+                name="build",
+                pre=[setup],
+                inputs=["in.txt"],
+            )
+            coll = Collection(build, loaded_from=str(tmp_path))
+            self._execute(coll, "build")
+            results = self._execute(coll, "build")
+            assert self.order == ["setup", "build", "setup"]
+            assert build not in results
+
+        def reuses_cached_results(self, tmp_path):
+            body = Mock(return_value="resolved")
+            resolve = Task(body, name="resolve", cache=True)
+            coll = Collection(resolve, loaded_from=str(tmp_path))
+            self._execute(coll, "resolve")
+            assert self._execute(coll, "resolve") == {resolve: "resolved"}
+            assert body.call_count == 1
+
+    class failures:
+        def are_reraised(self):
+            def explode(c):
+                raise ValueError("nope")
+
+            boom = Task(explode, name="boom")
+            with pytest.raises(ValueError, match="nope"):
+                self._execute(Collection(boom), "boom")
+
+        def stop_further_tasks_from_starting(self):
+            def explode(c):
+                raise ValueError("nope")
+
+            boom = Task(explode, name="boom")
+            slow = self._task("slow", delay=0.2)
+            after = self._task("after", pre=[boom, slow])
+            with pytest.raises(ValueError):
+                self._execute(Collection(after), "after")
+            # Already-running tasks are waited for, though
+            assert self.order == ["slow"]
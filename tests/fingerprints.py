@@ -0,0 +1,138 @@
+import json
+import os
+
+from invoke import Call, Task
+from invoke.fingerprints import (
+    VERSION,
+    FingerprintDatabase,
+    call_key,
+    fingerprint_files,
+)
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+class fingerprint_files_:
+    def maps_patterns_to_matching_files(self, tmp_path):
+        _write(tmp_path / "src" / "a.py", "a")
+        _write(tmp_path / "src" / "sub" / "b.py", "b")
+        _write(tmp_path / "src" / "c.txt", "c")
+        prints = fingerprint_files(["src/**/*.py", "*.whl"], str(tmp_path))
+        assert list(prints) == ["src/**/*.py", "*.whl"]
+        expected = ["src/a.py", os.path.join("src", "sub", "b.py")]
+        assert sorted(prints["src/**/*.py"]) == expected
+        assert prints["*.whl"] == {}
+
+    def records_mtime_size_and_digest(self, tmp_path):
+        path = _write(tmp_path / "a.py", "hello")
+        prints = fingerprint_files(["a.py"], str(tmp_path))
+        stat = os.stat(path)
+        mtime, size, digest = prints["a.py"]["a.py"]
+        assert (mtime, size) == (stat.st_mtime_ns, 5)
+        assert digest == (
+            "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"
+        )
+
+    def ignores_directories(self, tmp_path):
+        (tmp_path / "dir").mkdir()
+        assert fingerprint_files(["*"], str(tmp_path)) == {"*": {}}
+
+    def reuses_digests_of_files_with_same_mtime_and_size(self, tmp_path):
+        _write(tmp_path / "a.py", "hello")
+        prints = fingerprint_files(["a.py"], str(tmp_path))
+        prints["a.py"]["a.py"][2] = "not really"
+        again = fingerprint_files(["a.py"], str(tmp_path), prints)
+        assert again["a.py"]["a.py"][2] == "not really"
+
+    def rehashes_files_with_other_mtimes(self, tmp_path):
+        path = _write(tmp_path / "a.py", "hello")
+        prints = fingerprint_files(["a.py"], str(tmp_path))
+        digest = prints["a.py"]["a.py"][2]
+        prints["a.py"]["a.py"][2] = "not really"
+        os.utime(path, ns=(1, 1))
+        again = fingerprint_files(["a.py"], str(tmp_path), prints)
+        assert again["a.py"]["a.py"] == [1, 5, digest]
+
+
+class call_key_:
+    def includes_task_module_name_and_arguments(self):
+        t = Task(lambda c, x=None: None, name="mytask")
+        assert call_key(Call(t)) == "fingerprints.mytask((), [])"
+        assert call_key(Call(t, args=(1,), kwargs={"x": 2})) == (
+            "fingerprints.mytask((1,), [('x', 2)])"
+        )
+
+    def ignores_called_as(self):
+        t = Task(lambda c: None, name="mytask")
+        assert call_key(Call(t, called_as="alias")) == call_key(Call(t))
+
+
+class FingerprintDatabase_:
+    def setup_method(self):
+        self._prints = {"*.py": {"a.py": [1, 5, "abc"]}}
+
+    def get_is_empty_for_unknown_keys(self, tmp_path):
+        db = FingerprintDatabase(str(tmp_path / "db.json"))
+        assert db.get("nope") == {}
+
+    def set_saves_to_disk(self, tmp_path):
+        path = tmp_path / "sub" / "db.json"
+        FingerprintDatabase(str(path)).set("key", self._prints, {})
+        data = json.loads(path.read_text())
+        assert data["version"] == VERSION
+        db = FingerprintDatabase(str(path))
+        assert db.get("key") == {"inputs": self._prints, "outputs": {}}
+
+    def ignores_unreadable_files(self, tmp_path):
+        path = _write(tmp_path / "db.json", "{nope")
+        assert FingerprintDatabase(str(path)).get("key") == {}
+
+    def ignores_other_versions(self, tmp_path):
+        data = {"version": VERSION + 1, "calls": {"key": {}}}
+        path = _write(tmp_path / "db.json", json.dumps(data))
+        db = FingerprintDatabase(str(path))
+        assert db.get("key") == {}
+        db.set("other", {}, {})
+        assert json.loads(path.read_text())["version"] == VERSION
+
+    class is_up_to_date:
+        def setup_method(self):
+            self._prints = {"*.py": {"a.py": [1, 5, "abc"]}}
+            self._outputs = {"*.whl": {"a.whl": [1, 2, "def"]}}
+
+        def false_without_a_record(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            assert not db.is_up_to_date("key", self._prints, self._outputs)
+
+        def true_for_matching_fingerprints(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            db.set("key", self._prints, self._outputs)
+            assert db.is_up_to_date("key", self._prints, self._outputs)
+
+        def ignores_mtimes(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            db.set("key", self._prints, self._outputs)
+            touched = {"*.py": {"a.py": [2, 5, "abc"]}}
+            assert db.is_up_to_date("key", touched, self._outputs)
+
+        def false_for_changed_contents(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            db.set("key", self._prints, self._outputs)
+            changed = {"*.py": {"a.py": [1, 5, "xyz"]}}
+            assert not db.is_up_to_date("key", changed, self._outputs)
+
+        def false_for_added_or_removed_files(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            db.set("key", self._prints, self._outputs)
+            added = {"*.py": {"a.py": [1, 5, "abc"], "b.py": [1, 1, "b"]}}
+            assert not db.is_up_to_date("key", added, self._outputs)
+            assert not db.is_up_to_date("key", {"*.py": {}}, self._outputs)
+
+        def false_for_unmatched_output_patterns(self, tmp_path):
+            db = FingerprintDatabase(str(tmp_path / "db.json"))
+            db.set("key", self._prints, {"*.whl": {}})
+            assert not db.is_up_to_date("key", self._prints, {"*.whl": {}})
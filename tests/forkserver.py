@@ -0,0 +1,183 @@
+import os
+import signal
+import time
+from subprocess import DEVNULL, PIPE
+from tempfile import TemporaryFile
+
+import pytest
+
+from invoke.forkserver import (
+    SUPPORTED,
+    ForkServer,
+    ServedProcess,
+    get_fork_server,
+)
+
+pytestmark = pytest.mark.skipif(
+    not SUPPORTED, reason="Fork server unsupported on this platform"
+)
+
+
+def _wait(process, timeout=5):
+    deadline = time.monotonic() + timeout
+    while process.poll() is None:
+        assert time.monotonic() < deadline, "Subprocess never exited!"
+        time.sleep(0.01)
+    return process.returncode
+
+
+class ForkServer_:
+    def setup_method(self):
+        self.server = ForkServer()
+        self.env = dict(os.environ)
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def _spawn(self, args, **kwargs):
+        kwargs.setdefault("env", self.env)
+        return self.server.spawn(args, shell="/bin/sh", **kwargs)
+
+    def starts_lazily(self):
+        assert self.server.process is None
+        self._spawn("true").close()
+        assert self.server.process is not None
+
+    def start_is_idempotent(self):
+        self.server.start()
+        process = self.server.process
+        self.server.start()
+        assert self.server.process is process
+
+    def stop_makes_the_server_exit(self):
+        self.server.start()
+        process = self.server.process
+        self.server.stop()
+        assert process.returncode is not None
+        assert self.server.process is None
+
+    class spawn:
+        def returns_a_ServedProcess(self):
+            process = self._spawn("true")
+            assert isinstance(process, ServedProcess)
+            assert process.pid > 0
+            _wait(process)
+            process.close()
+
+        def runs_strings_via_the_shell(self):
+            process = self._spawn("echo $((1 + 2))")
+            assert process.stdout.read() == b"3\n"
+            assert _wait(process) == 0
+            process.close()
+
+        def runs_argument_vectors_directly(self):
+            process = self._spawn(["echo", "$((1 + 2))"])
+            assert process.stdout.read() == b"$((1 + 2))\n"
+            process.close()
+
+        def hands_back_stdin_stdout_and_stderr_pipes(self):
+            process = self._spawn("cat; echo oops >&2")
+            process.stdin.write(b"hello")
+            process.stdin.close()
+            assert process.stdout.read() == b"hello"
+            assert process.stderr.read() == b"oops\n"
+            process.close()
+
+        def reports_exit_codes(self):
+            process = self._spawn("exit 17")
+            assert _wait(process) == 17
+            process.close()
+
+        def reports_signals_as_negative_exit_codes(self):
+            process = self._spawn(["sleep", "5"])
+            os.kill(process.pid, signal.SIGTERM)
+            assert _wait(process) == -signal.SIGTERM
+            process.close()
+
+        def reports_resource_usage(self):
+            process = self._spawn("exit 0")
+            _wait(process)
+            assert process.rusage.ru_maxrss > 0
+            assert process.rusage.ru_utime >= 0
+            process.close()
+
+        def status_fd_becomes_readable_upon_exit(self):
+            process = self._spawn("exit 0")
+            _wait(process)
+            assert process.status_fd >= 0
+            process.close()
+            assert process.status_fd == -1
+
+        def uses_given_env(self):
+            env = dict(self.env, INVOKE_FORKSERVER_TEST="yup")
+            process = self._spawn("echo $INVOKE_FORKSERVER_TEST", env=env)
+            assert process.stdout.read() == b"yup\n"
+            process.close()
+
+        def uses_given_cwd(self):
+            process = self._spawn(["pwd"], cwd="/")
+            assert process.stdout.read() == b"/\n"
+            process.close()
+
+        def may_hand_over_file_descriptors(self):
+            with TemporaryFile() as out:
+                process = self._spawn("echo hi", stdout=out.fileno())
+                assert process.stdout is None
+                _wait(process)
+                process.close()
+                out.seek(0)
+                assert out.read() == b"hi\n"
+
+        def may_discard_output(self):
+            process = self._spawn("echo hi; echo oops >&2", stderr=DEVNULL)
+            assert process.stderr is None
+            assert process.stdout.read() == b"hi\n"
+            process.close()
+
+        def defaults_to_pipes(self):
+            process = self._spawn("true", stdout=PIPE, stderr=PIPE)
+            assert process.stdout is not None
+            assert process.stderr is not None
+            process.close()
+
+        def raises_OSError_when_unable_to_spawn(self):
+            with pytest.raises(FileNotFoundError):
+                self._spawn(["/nonexistent/program"])
+            # And the server is fine afterwards
+            process = self._spawn("exit 3")
+            assert _wait(process) == 3
+            process.close()
+
+        def restarts_a_dead_server(self):
+            self.server.start()
+            dead = self.server.process
+            dead.kill()
+            dead.wait()
+            process = self._spawn("exit 4")
+            assert _wait(process) == 4
+            assert self.server.process is not dead
+            process.close()
+
+    class ServedProcess_:
+        def poll_returns_None_while_running(self):
+            process = self._spawn(["sleep", "5"])
+            assert process.poll() is None
+            assert process.returncode is None
+            os.kill(process.pid, signal.SIGKILL)
+            _wait(process)
+            process.close()
+
+        def poll_raises_ChildProcessError_if_server_dies(self):
+            process = self._spawn(["sleep", "5"])
+            self.server.process.kill()
+            with pytest.raises(ChildProcessError):
+                _wait(process)
+            os.kill(process.pid, signal.SIGKILL)
+            process.close()
+
+
+class get_fork_server_:
+    def returns_a_shared_ForkServer(self):
+        server = get_fork_server()
+        assert isinstance(server, ForkServer)
+        assert get_fork_server() is server
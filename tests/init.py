@@ -48,6 +48,22 @@ class Init:
         def promise_class(self):
             assert invoke.Promise is invoke.runners.Promise
 
+        def promise_helpers(self):
+            assert invoke.wait is invoke.runners.wait
+            assert invoke.as_completed is invoke.runners.as_completed
+            assert invoke.FIRST_COMPLETED is invoke.runners.FIRST_COMPLETED
+
+        def session_classes(self):
+            assert invoke.ShellSession is invoke.session.ShellSession
+            assert invoke.SessionRunner is invoke.session.SessionRunner
+
+        def pool_classes(self):
+            assert invoke.PooledLocal is invoke.pool.PooledLocal
+            assert invoke.ShellPool is invoke.pool.ShellPool
+
+        def resources_class(self):
+            assert invoke.Resources is invoke.runners.Resources
+
         def failure_class(self):
             assert invoke.Failure is invoke.runners.Failure
 
@@ -88,6 +104,9 @@ class Init:
         def executor(self):
             assert invoke.Executor is invoke.executor.Executor
 
+        def parallel_executor(self):
+            assert invoke.ParallelExecutor is invoke.executor.ParallelExecutor
+
         def call(self):
             assert invoke.call is invoke.tasks.call
 
@@ -0,0 +1,208 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from invoke import Config, Context, Local, Result
+from invoke.pool import PooledLocal, ShellPool, get_shell_pool
+from invoke.terminals import WINDOWS
+
+pytestmark = pytest.mark.skipif(
+    WINDOWS, reason="Shell pools unsupported on Windows"
+)
+
+
+def _context(**pool):
+    return Context(
+        Config(
+            {
+                "runners": {"local": PooledLocal},
+                "run": {"hide": True, "in_stream": False},
+                "pool": pool,
+            }
+        )
+    )
+
+
+class ShellPool_:
+    def setup_method(self):
+        self.c = _context()
+        self.pool = ShellPool(size=2)
+
+    def teardown_method(self):
+        self.pool.close()
+
+    def _pid(self):
+        return int(self.pool.run(self.c, "echo $$").stdout)
+
+    def _sessions(self):
+        return [x.session for x in self.pool._workers]
+
+    class init:
+        def size_must_be_positive(self):
+            with pytest.raises(ValueError):
+                ShellPool(size=0)
+
+        def dispatch_must_be_known(self):
+            with pytest.raises(ValueError):
+                ShellPool(dispatch="random")
+
+    class run:
+        def returns_Results(self):
+            result = self.pool.run(self.c, "echo hi; exit 3", warn=True)
+            assert isinstance(result, Result)
+            assert result.stdout == "hi\n"
+            assert result.exited == 3
+
+        def starts_all_shells_upfront(self):
+            self.pool.run(self.c, "true")
+            sessions = self._sessions()
+            assert all(x.process.poll() is None for x in sessions)
+
+        def does_not_apply_context_prefixes(self):
+            # As Context.run has already done so by the time we're called.
+            with self.c.prefix("echo nope"):
+                assert self.pool.run(self.c, "echo yup").stdout == "yup\n"
+
+        def reuses_shells(self):
+            pids = {self._pid() for _ in range(6)}
+            assert len(pids) == 2
+
+        def raises_ValueError_once_closed(self):
+            self.pool.close()
+            with pytest.raises(ValueError):
+                self.pool.run(self.c, "true")
+
+    class dispatch:
+        def least_busy_prefers_idle_workers(self):
+            first = self.pool._checkout()
+            second = self.pool._checkout()
+            assert first is not second
+            first.pending -= 1
+            assert self.pool._checkout() is first
+
+        def least_busy_spreads_ties(self):
+            first = self.pool._checkout()
+            first.pending -= 1
+            assert self.pool._checkout() is not first
+
+        def round_robin_takes_turns(self):
+            pool = ShellPool(size=2, dispatch="round_robin")
+            first = pool._checkout()
+            first.pending -= 1
+            second = pool._checkout()
+            assert second is not first
+            # Even though the first worker is idle
+            assert pool._checkout() is first
+
+    class recycling:
+        def happens_after_max_commands(self):
+            pool = ShellPool(size=1, max_commands=2)
+            try:
+                first = int(pool.run(self.c, "echo $$").stdout)
+                assert int(pool.run(self.c, "echo $$").stdout) == first
+                assert int(pool.run(self.c, "echo $$").stdout) != first
+            finally:
+                pool.close()
+
+        def never_happens_without_max_commands(self):
+            pool = ShellPool(size=1, max_commands=None)
+            try:
+                pids = {int(pool.run(self.c, "echo $$").stdout) for _ in "abc"}
+                assert len(pids) == 1
+            finally:
+                pool.close()
+
+        def happens_upon_cwd_drift(self, tmp_path):
+            self.pool.run(self.c, "true")
+            cwd = os.getcwd()
+            os.chdir(str(tmp_path))
+            try:
+                result = self.pool.run(self.c, "pwd")
+            finally:
+                os.chdir(cwd)
+            assert result.stdout == "{}\n".format(os.path.realpath(tmp_path))
+
+        def happens_upon_environment_drift(self):
+            self.pool.run(self.c, "true")
+            sessions = self._sessions()
+            os.environ["INVOKE_POOL_TEST"] = "yup"
+            try:
+                result = self.pool.run(self.c, "echo $INVOKE_POOL_TEST")
+            finally:
+                del os.environ["INVOKE_POOL_TEST"]
+            assert result.stdout == "yup\n"
+            # Just the shell which ran the command; others do so as needed
+            assert len(set(self._sessions()) - set(sessions)) == 1
+
+        def starts_replacement_shells_right_away(self):
+            pool = ShellPool(size=1, max_commands=1)
+            try:
+                pool.run(self.c, "true")
+                pool.run(self.c, "true")
+                session = pool._workers[0].session
+                assert session.process is not None
+            finally:
+                pool.close()
+
+    class close:
+        def makes_shells_exit(self):
+            self.pool.run(self.c, "true")
+            processes = [x.process for x in self._sessions()]
+            self.pool.close()
+            assert all(x.returncode is not None for x in processes)
+            assert self._sessions() == [None, None]
+
+
+class get_shell_pool_:
+    def returns_a_shared_ShellPool(self):
+        pool = get_shell_pool()
+        assert isinstance(pool, ShellPool)
+        assert get_shell_pool() is pool
+
+    def replaces_pool_with_different_settings(self):
+        pool = get_shell_pool(size=2)
+        other = get_shell_pool(size=3)
+        assert other is not pool
+        assert other.size == 3
+        assert pool._closed
+
+
+class PooledLocal_:
+    def is_a_Local(self):
+        assert issubclass(PooledLocal, Local)
+
+    def runs_commands_in_the_shared_pool(self):
+        c = _context(size=2, max_commands=None)
+        pids = {c.run("echo $$").stdout for _ in range(4)}
+        assert len(pids) == 2
+        assert get_shell_pool(size=2, max_commands=None).size == 2
+
+    def honors_cd_and_prefix(self):
+        c = _context()
+        with c.cd("/"):
+            with c.prefix("export INVOKE_POOL_TEST=yup"):
+                result = c.run("pwd; echo $INVOKE_POOL_TEST")
+        assert result.stdout == "/\nyup\n"
+
+    def honors_cd_for_argument_vectors(self):
+        c = _context()
+        with c.cd("/etc"):
+            assert c.run(["pwd"]).stdout == "/etc\n"
+
+    def honors_cwd(self):
+        c = _context()
+        assert c.run("pwd", cwd="/usr").stdout == "/usr\n"
+        assert c.run(["pwd"], cwd="/usr").stdout == "/usr\n"
+
+    def configures_pool_from_config(self):
+        c = _context(size=3, dispatch="round_robin", max_commands=5)
+        c.run("true")
+        pool = get_shell_pool(3, 5, "round_robin")
+        assert pool._started
+
+    @patch.object(Local, "run")
+    def falls_back_to_Local_for_unsupported_options(self, run):
+        c = _context()
+        c.run("true", pty=True)
+        run.assert_called_once_with("true", pty=True)
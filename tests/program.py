@@ -21,6 +21,7 @@ from pytest_relaxed import trap
 
 from invoke import (
     Argument,
+    BatchFailure,
     Collection,
     Config,
     Executor,
@@ -97,6 +98,28 @@ class Program_:
                 Program().run("invoke -c debugging foo")
                 debug.assert_called_with("my-sentinel")
 
+        def fork_server_started_before_and_after_loading_tasks(self):
+            p = Program()
+            loaded = []
+            p.start_fork_server = Mock(
+                side_effect=lambda: loaded.append(hasattr(p, "collection"))
+            )
+            p.run("invoke -c integration print-foo", exit=False)
+            assert loaded == [False, True]
+
+        @patch("invoke.program.forkserver.get_fork_server")
+        def fork_server_started_when_configured(self, get_fork_server):
+            p = Program()
+            overrides = {"run": {"spawn_backend": "forkserver"}}
+            p.config = Config(overrides=overrides)
+            p.start_fork_server()
+            get_fork_server.return_value.start.assert_called_once_with()
+
+        @patch("invoke.program.forkserver.get_fork_server")
+        def fork_server_not_started_by_default(self, get_fork_server):
+            expect("-c integration print-foo", out="foo\n")
+            assert not get_fork_server.called
+
         def bytecode_skipped_by_default(self):
             expect("-c foo mytask")
             assert sys.dont_write_bytecode
@@ -495,6 +518,24 @@ this is also not ascii: \xe4\x8c\xa1
             got = BytesIO.getvalue(sys.stderr)
             assert got == expected
 
+        @trap
+        @patch("invoke.program.sys.exit")
+        def BatchFailure_summary_printed_and_exits_1(self, mock_exit):
+            p = Program()
+            ok = Result(command="fine", exited=0)
+            bad = Result(command="meh", exited=17)
+            oops = BatchFailure([ok, bad], [UnexpectedExit(bad)], ["later"])
+            p.execute = Mock(side_effect=oops)
+            p.run("myapp foo")
+            expected = """1 of 3 commands failed:
+
+- 'meh' (exit code 17)
+
+Skipped 1 more.
+"""
+            assert sys.stderr.getvalue() == expected
+            mock_exit.assert_called_with(1)
+
         class Exit_:
             @patch("invoke.program.sys.exit")
             def defaults_to_exiting_0(self, mock_exit):
@@ -575,6 +616,8 @@ Core options:
   --complete                         Print tab-completion candidates for given
                                      parse remainder.
   --hide=STRING                      Set default value of run()'s 'hide' kwarg.
+  --no-cache                         Ignore and do not update cached task
+                                     results.
   --no-dedupe                        Disable task deduplication.
   --print-completion-script=STRING   Print the tab-completion script for your
                                      preferred shell (bash|zsh|fish).
@@ -1336,6 +1379,14 @@ Default 'build' task: .all
                     # string. If the env var won, this would explode.
                     expect("-c runtime -f yaml/invoke.yaml mytask")
 
+        def no_cache_flag_disables_task_cache(self):
+            p = Program()
+            p.execute = Mock()  # neuter
+            p.run("inv --no-cache foo")
+            assert p.config.tasks.cache.enabled is False
+            # Without clobbering the rest of the tree
+            assert p.config.tasks.cache.backend == "directory"
+
         def tasks_dedupe_honors_configuration(self):
             # Kinda-sorta duplicates some tests in executor.py, but eh.
             with cd("configs"):
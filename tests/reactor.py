@@ -0,0 +1,189 @@
+import os
+import threading
+from unittest.mock import patch
+
+from invoke.reactor import Reactor, ReactorHandle, get_reactor
+from invoke.util import ExceptionWrapper
+
+
+class _Boom(Exception):
+    pass
+
+
+class Reactor_:
+    def setup_method(self):
+        self.reactor = Reactor()
+        self.pipes = []
+
+    def teardown_method(self):
+        for fd in self.pipes:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _pipe(self):
+        r, w = os.pipe()
+        self.pipes.extend([r, w])
+        return r, w
+
+    def _reader(self, fd, seen):
+        def callback():
+            data = os.read(fd, 1024)
+            if not data:
+                return False
+            seen.append(data)
+            return True
+
+        return callback
+
+    def services_readable_fds_until_callback_returns_False(self):
+        r, w = self._pipe()
+        seen = []
+        handle = ReactorHandle(self.reactor, r, self._reader(r, seen))
+        handle.start()
+        os.write(w, b"hello")
+        os.close(w)
+        handle.join(5)
+        assert not handle.is_alive()
+        assert b"".join(seen) == b"hello"
+        assert handle.exception() is None
+        assert not handle.is_dead
+
+    def services_many_fds_from_one_thread(self):
+        before = threading.active_count()
+        handles, seens, writers = [], [], []
+        for _ in range(50):
+            r, w = self._pipe()
+            seen = []
+            handle = ReactorHandle(self.reactor, r, self._reader(r, seen))
+            handle.start()
+            handles.append(handle)
+            seens.append(seen)
+            writers.append(w)
+        assert threading.active_count() == before + 1
+        for i, w in enumerate(writers):
+            os.write(w, str(i).encode())
+            os.close(w)
+        for handle in handles:
+            handle.join(5)
+        assert [b"".join(x) for x in seens] == [
+            str(i).encode() for i in range(50)
+        ]
+        assert self.reactor.handle_count == 0
+
+    def callback_exceptions_are_captured(self):
+        r, w = self._pipe()
+
+        def explode():
+            raise _Boom
+
+        handle = ReactorHandle(self.reactor, r, explode, target=explode)
+        handle.start()
+        os.write(w, b"x")
+        handle.join(5)
+        assert handle.is_dead
+        wrapper = handle.exception()
+        assert isinstance(wrapper, ExceptionWrapper)
+        assert wrapper.type is _Boom
+        assert wrapper.kwargs == {"target": explode}
+
+    def bad_fds_are_captured_instead_of_killing_the_reactor(self):
+        r, w = self._pipe()
+        os.close(r)
+        handle = ReactorHandle(self.reactor, r, lambda: True)
+        handle.start()
+        handle.join(5)
+        assert handle.is_dead
+        # Reactor still functional afterwards
+        r, w = self._pipe()
+        seen = []
+        handle = ReactorHandle(self.reactor, r, self._reader(r, seen))
+        handle.start()
+        os.write(w, b"still here")
+        os.close(w)
+        handle.join(5)
+        assert seen == [b"still here"]
+
+    def cancel_unregisters_and_finishes(self):
+        r, w = self._pipe()
+        handle = ReactorHandle(self.reactor, r, lambda: True)
+        handle.start()
+        handle.cancel()
+        assert not handle.is_alive()
+        assert self.reactor.handle_count == 0
+
+    def owned_fds_are_closed_only_once_unregistered(self):
+        r, w = self._pipe()
+        calls = []
+        real_close = os.close
+        real_unregister = self.reactor.selector.unregister
+
+        def unregister(fd):
+            calls.append(("unregister", fd))
+            return real_unregister(fd)
+
+        def close(fd):
+            calls.append(("close", fd))
+            return real_close(fd)
+
+        self.reactor.selector.unregister = unregister
+        handle = ReactorHandle(self.reactor, r, lambda: False, close_fd=True)
+        with patch("invoke.reactor.os.close", side_effect=close):
+            handle.start()
+            os.write(w, b"x")
+            handle.join(5)
+        assert [x for x in calls if x[1] == r] == [
+            ("unregister", r),
+            ("close", r),
+        ]
+        assert r not in self.reactor.selector.get_map()
+
+    def join_cancels_when_stop_event_is_set(self):
+        r, w = self._pipe()
+        event = threading.Event()
+        handle = ReactorHandle(self.reactor, r, lambda: True, stop_event=event)
+        handle.start()
+        event.set()
+        handle.join()
+        assert not handle.is_alive()
+        assert not handle.is_dead
+
+    class add_poller:
+        def calls_poller_until_it_returns_True(self):
+            calls = []
+            finished = threading.Event()
+
+            def poller():
+                calls.append(1)
+                if len(calls) < 3:
+                    return False
+                finished.set()
+                return True
+
+            self.reactor.add_poller(poller)
+            assert finished.wait(5)
+            # One more spin of the loop, to show it's no longer called.
+            r, w = self._pipe()
+            handle = ReactorHandle(self.reactor, r, lambda: False)
+            handle.start()
+            os.write(w, b"x")
+            handle.join(5)
+            assert len(calls) == 3
+
+        def exceptions_drop_the_poller_but_not_the_reactor(self):
+            finished = threading.Event()
+
+            def explode():
+                raise _Boom
+
+            self.reactor.add_poller(explode)
+            self.reactor.add_poller(lambda: finished.set() or True)
+            assert finished.wait(5)
+            assert self.reactor._pollers == []
+
+
+class get_reactor_:
+    def returns_a_shared_instance(self):
+        assert get_reactor() is get_reactor()
+        assert isinstance(get_reactor(), Reactor)
@@ -1,15 +1,23 @@
+import asyncio
 import errno
+import io
+import mmap
 import os
+import shutil
 import signal
 import struct
 import sys
 import termios
 import threading
 import types
+from concurrent.futures import FIRST_COMPLETED, FIRST_EXCEPTION, Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from contextlib import AbstractContextManager
 from io import BytesIO, StringIO
 from itertools import chain, repeat
-from unittest.mock import Mock, call, patch
+from subprocess import DEVNULL, PIPE
+from tempfile import TemporaryFile
+from unittest.mock import AsyncMock, Mock, call, patch
 
 from _util import (
     OhNoz,
@@ -24,12 +32,14 @@ from pytest import raises, skip
 from pytest_relaxed import trap
 
 from invoke import (
+    AsyncLocal,
     CommandTimedOut,
     Config,
     Context,
     Failure,
     Local,
     Promise,
+    Resources,
     Responder,
     Result,
     Runner,
@@ -38,7 +48,10 @@ from invoke import (
     ThreadException,
     UnexpectedExit,
     WatcherError,
+    as_completed,
+    wait,
 )
+from invoke.capture import TailBuffer
 from invoke.runners import default_encoding
 from invoke.terminals import WINDOWS
 
@@ -164,6 +177,29 @@ class Runner_:
             else:
                 assert False, "Invalid run() kwarg didn't raise TypeError"
 
+    class argv:
+        def is_kept_for_runners_to_execute(self):
+            runner = self._runner()
+            runner.run(["ls", "-l", "my dir"])
+            assert runner.argv == ["ls", "-l", "my dir"]
+
+        def is_None_for_command_strings(self):
+            runner = self._runner()
+            runner.run(_)
+            assert runner.argv is None
+
+        def shows_up_as_an_equivalent_command_string(self):
+            runner = self._runner()
+            runner.start = Mock()
+            result = runner.run(["ls", "-l", "my dir"])
+            assert result.command == "ls -l 'my dir'"
+            assert runner.start.call_args[0][0] == "ls -l 'my dir'"
+
+        @trap
+        def is_echoed_as_a_command_string(self):
+            self._run(["ls", "my dir"], echo=True, echo_format="{command}")
+            assert sys.stdout.getvalue() == "ls 'my dir'\n"
+
     class warn:
         def honors_config(self):
             runner = self._runner(run={"warn": True}, exits=1)
@@ -258,6 +294,37 @@ class Runner_:
             foo = self._run(_, settings=settings, env=kwarg).env["FOO"]
             assert foo == "NOTBAR"
 
+        def is_cached_between_runs(self):
+            first = self._run(_, env={"FOO": "BAR"}).env
+            assert self._run(_, env={"FOO": "BAR"}).env is first
+
+        def cache_notices_os_environ_changes(self):
+            first = self._run(_).env
+            os.environ["INVOKE_RUNNER_TEST"] = "yup"
+            try:
+                env = self._run(_).env
+            finally:
+                del os.environ["INVOKE_RUNNER_TEST"]
+            assert env is not first
+            assert env["INVOKE_RUNNER_TEST"] == "yup"
+            assert "INVOKE_RUNNER_TEST" not in self._run(_).env
+
+        def cache_notices_overlay_changes(self):
+            self._run(_, env={"FOO": "BAR"})
+            assert self._run(_, env={"FOO": "BIZ"}).env["FOO"] == "BIZ"
+            assert "FOO" not in self._run(_).env
+
+        def cached_env_is_read_only(self):
+            for overlay in ({}, {"FOO": "BAR"}):
+                env = self._run(_, env=overlay).env
+                with raises(TypeError):
+                    env["LEAKED"] = "1"
+                assert "LEAKED" not in self._run(_, env=overlay).env
+
+        def replacement_envs_are_used_as_is(self):
+            env = {"JUST": "ME"}
+            assert self._run(_, env=env, replace_env=True).env is env
+
     class return_value:
         def return_code(self):
             """
@@ -415,6 +482,126 @@ class Runner_:
                 fake_locale.getpreferredencoding.return_value = "FALLBACK"
                 assert self._runner().default_encoding() == "FALLBACK"
 
+    class io_hooks:
+        @trap
+        def overridden_decode_is_used_for_output(self):
+            class Shouty(_Dummy):
+                def decode(self, data):
+                    return super().decode(data).upper()
+
+            runner = self._runner(klass=Shouty, out="hi\n", err="oops\n")
+            result = runner.run(_)
+            assert sys.stdout.getvalue() == "HI\n"
+            assert result.stdout == "HI\n"
+            assert result.stderr == "OOPS\n"
+
+        @trap
+        def overridden_read_proc_output_is_used_for_output(self):
+            class Prefixed(_Dummy):
+                def read_proc_output(self, reader):
+                    for text in super().read_proc_output(reader):
+                        yield "> " + text
+
+            result = self._runner(klass=Prefixed, out="hi\n").run(_)
+            assert sys.stdout.getvalue() == "> hi\n"
+            assert result.stdout == "> hi\n"
+
+    class capture:
+        def defaults_to_keeping_everything(self):
+            result = self._runner(out="x" * 2000).run(_, hide=True)
+            assert type(result.stdout_bytes) is bytearray
+            assert result.stdout == "x" * 2000
+
+        def tail_keeps_last_capture_limit_bytes(self):
+            klass = type("Chunky", (_Dummy,), {"read_chunk_size": 3})
+            runner = self._runner(klass=klass, out="line1\nline2\nline3\n")
+            result = runner.run(_, hide=True, capture="tail", capture_limit=8)
+            assert isinstance(result.stdout_bytes, TailBuffer)
+            assert result.stdout == "2\nline3\n"
+            assert result.tail("stdout", 1) == "\n\nline3"
+
+        def tail_still_yields_useful_UnexpectedExit_messages(self):
+            runner = self._runner(out="", err="lots\nof\nnoise\nboom\n")
+            runner.returncode = Mock(return_value=1)
+            with raises(UnexpectedExit) as info:
+                runner.run(_, hide=True, capture="tail", capture_limit=5)
+            assert "boom" in str(info.value)
+
+        def spill_exposes_spilled_output_via_mmap(self):
+            runner = self._runner(out="0123456789" * 100)
+            result = runner.run(
+                _, hide=True, capture="spill", capture_limit=64
+            )
+            assert isinstance(result.stdout_bytes, mmap.mmap)
+            assert result.stdout == "0123456789" * 100
+            raw = result.raw("stdout")
+            assert raw.read(12) == b"012345678901"
+            # Rewound on each call
+            assert result.raw("stdout").read(3) == b"012"
+
+        def spilled_failures_only_decode_the_tail(self):
+            out = "".join("line{}\n".format(x) for x in range(100000))
+            runner = self._runner(out=out, exits=1)
+            decoded = []
+            real_decode = Result._decode
+
+            def _decode(self, data):
+                decoded.append(len(data))
+                return real_decode(self, data)
+
+            with patch.object(Result, "_decode", _decode):
+                with raises(UnexpectedExit) as info:
+                    runner.run(_, hide=True, capture="spill", capture_limit=64)
+                message = str(info.value)
+            assert isinstance(info.value.result.stdout_bytes, mmap.mmap)
+            assert "line99990\nline99991" in message
+            assert "line99999" in message
+            assert "line99989" not in message
+            assert max(decoded) < 64 * 1024
+
+        def spill_under_limit_stays_in_memory(self):
+            runner = self._runner(out="small")
+            result = runner.run(_, hide=True, capture="spill")
+            assert type(result.stdout_bytes) is bytearray
+            assert result.raw("stdout").read() == b"small"
+
+        def False_captures_nothing(self):
+            result = self._runner(out="foo", err="bar").run(_, capture=False)
+            assert result.captured is False
+            assert result.stdout == ""
+            assert result.stderr == ""
+            assert result.stdout_bytes == b""
+
+        def False_still_displays_output(self):
+            out = StringIO()
+            self._runner(out="foo").run(_, capture=False, out_stream=out)
+            assert out.getvalue() == "foo"
+
+        def False_still_runs_watchers(self):
+            klass = self._mock_stdin_writer()
+            responder = Responder(pattern="jump", response="how high?")
+            runner = self._runner(klass=klass, out="jump, wait, jump")
+            runner.run(_, capture=False, watchers=[responder], hide=True)
+            assert klass.write_proc_stdin.call_count == 2
+
+        def False_is_noted_in_UnexpectedExit_messages(self):
+            runner = self._runner(out="foo", err="bar", exits=1)
+            with raises(UnexpectedExit) as info:
+                runner.run(_, capture=False, hide=True)
+            message = str(info.value)
+            assert "Stdout: not captured" in message
+            assert "Stderr: not captured" in message
+
+        def honors_config(self):
+            runner = self._runner(
+                out="abcdef", run={"capture": "tail", "capture_limit": 2}
+            )
+            assert runner.run(_, hide=True).stdout == "ef"
+
+        def rejects_unknown_values(self):
+            with raises(ValueError, match="'capture' got 'lol'"):
+                self._runner().run(_, capture="lol")
+
     class output_hiding:
         @trap
         def _expect_hidden(self, hide, expect_out="", expect_err=""):
@@ -540,6 +727,105 @@ class Runner_:
             err.write.assert_called_once_with("whatever")
             err.flush.assert_called_once_with()
 
+        def terminal_streams_are_flushed_every_write(self):
+            klass = type("Chunky", (_Dummy,), {"read_chunk_size": 2})
+            out = Mock(spec=StringIO)
+            out.isatty.return_value = True
+            runner = self._runner(klass=klass, out="abcdef")
+            runner.run(_, out_stream=out, read_chunk_max=2)
+            assert out.write.call_count == 3
+            assert out.flush.call_count == 3
+
+        def other_streams_have_their_flushes_coalesced(self):
+            attrs = {"read_chunk_size": 2, "output_flush_interval": 60}
+            klass = type("Chunky", (_Dummy,), attrs)
+            out = Mock(spec=StringIO)
+            out.isatty.return_value = False
+            runner = self._runner(klass=klass, out="abcdef")
+            runner.run(_, out_stream=out, read_chunk_max=2)
+            assert out.write.call_count == 3
+            # Just the one, at the end.
+            out.flush.assert_called_once_with()
+
+        def coalesced_flushes_respect_output_flush_size(self):
+            attrs = {
+                "read_chunk_size": 2,
+                "output_flush_interval": 60,
+                "output_flush_size": 4,
+            }
+            klass = type("Chunky", (_Dummy,), attrs)
+            out = Mock(spec=StringIO)
+            out.isatty.return_value = False
+            runner = self._runner(klass=klass, out="abcdef")
+            runner.run(_, out_stream=out, read_chunk_max=2)
+            # Once on hitting 4 pending characters, once at the end.
+            assert out.flush.call_count == 2
+
+        def multibyte_characters_split_across_reads_survive(self):
+            klass = type("Chunky", (_Dummy,), {"read_chunk_size": 1})
+            out = StringIO()
+            result = self._runner(klass=klass, out="hé").run(
+                _, out_stream=out, encoding="utf-8"
+            )
+            assert out.getvalue() == "hé"
+            assert result.stdout == "hé"
+
+        def hidden_output_is_not_decoded(self):
+            runner = self._runner(out="meh", err="whatever")
+            with patch("invoke.runners.codecs") as codecs:
+                result = runner.run(_, hide=True)
+            assert not codecs.getincrementaldecoder.called
+            assert result.stdout_bytes == b"meh"
+            assert result.stderr_bytes == b"whatever"
+
+    class read_chunk_sizing:
+        def _sizes(self, runner, **kwargs):
+            reader = Mock(wraps=runner.read_proc_stdout)
+            runner.read_proc_stdout = reader
+            runner.run(_, hide=True, **kwargs)
+            return [x[0][0] for x in reader.call_args_list]
+
+        def starts_at_read_chunk_size(self):
+            assert self._sizes(self._runner(out="x"))[0] == 1000
+
+        def grows_while_reads_come_back_full(self):
+            sizes = self._sizes(self._runner(out="x" * 10000))
+            assert sizes[:4] == [1000, 2000, 4000, 8000]
+
+        def stops_growing_at_read_chunk_max(self):
+            runner = self._runner(out="x" * 10000)
+            sizes = self._sizes(runner, read_chunk_max=2500)
+            assert sizes == [1000, 2000, 2500, 2500, 2500, 2500]
+
+        def shrinks_when_reads_come_back_short(self):
+            runner = self._runner()
+            chunks = [b"x" * 1000, b"x" * 2000, b"x", b"x", b""]
+            runner.read_proc_stdout = Mock(side_effect=chunks)
+            assert self._sizes(runner) == [1000, 2000, 4000, 2000, 1000]
+
+        def never_shrinks_below_read_chunk_min(self):
+            runner = self._runner()
+            runner.read_proc_stdout = Mock(side_effect=[b"x", b"x", b""])
+            assert self._sizes(runner, read_chunk_min=10) == [10, 10, 10]
+
+        def may_be_fixed_by_matching_min_and_max(self):
+            runner = self._runner(out="x" * 5000)
+            sizes = self._sizes(runner, read_chunk_max=1000)
+            assert sizes == [1000] * 6
+
+        def honors_config(self):
+            runner = self._runner(
+                out="x" * 100, run={"read_chunk_min": 10, "read_chunk_max": 20}
+            )
+            assert self._sizes(runner)[:3] == [10, 20, 20]
+
+        def output_is_unaffected(self):
+            out = StringIO()
+            text = "".join("line {}\n".format(x) for x in range(5000))
+            result = self._runner(out=text).run(_, out_stream=out)
+            assert out.getvalue() == text
+            assert result.stdout == text
+
     class input_stream_handling:
         # NOTE: actual autoresponder tests are elsewhere. These just test that
         # stdin works normally & can be overridden.
@@ -1086,6 +1372,46 @@ stderr 25
             runner.run(_, hide=True, watchers=[kwarg])
             klass.write_proc_stdin.assert_called_once_with("and my body spray")
 
+        def legacy_watchers_are_given_full_stream(self):
+            seen = []
+
+            class Legacy(StreamWatcher):
+                def submit(self, stream):
+                    seen.append(stream)
+                    return []
+
+            klass = self._mock_stdin_writer()
+            klass.read_chunk_size = 2
+            runner = self._runner(klass=klass, out="abcdef")
+            runner.run(_, watchers=[Legacy()], hide=True, read_chunk_max=2)
+            assert seen == ["ab", "abcd", "abcdef"]
+
+        def incremental_watchers_are_given_bounded_windows(self):
+            seen = []
+
+            class Incremental(StreamWatcher):
+                lookback = 1
+
+                def submit_window(self, window):
+                    seen.append(window.text)
+                    return []
+
+            klass = self._mock_stdin_writer()
+            klass.read_chunk_size = 2
+            runner = self._runner(klass=klass, out="abcdef")
+            runner.run(
+                _, watchers=[Incremental()], hide=True, read_chunk_max=2
+            )
+            assert seen == ["ab", "bcd", "def"]
+
+        def buffer_is_not_joined_without_watchers(self):
+            class NotJoinable(list):
+                def __iter__(self):
+                    assert False, "buffer was joined!"
+
+            runner = self._runner(out="foo")
+            runner.respond(NotJoinable(["foo"]))
+
     class io_sleeping:
         # NOTE: there's an explicit CPU-measuring test in the integration suite
         # which ensures the *point* of the sleeping - avoiding CPU hogging - is
@@ -1111,6 +1437,102 @@ stderr 25
             # process. Still worth testing more than the first tho.
             assert mock_time.sleep.call_args_list[:3] == [call(0.007)] * 3
 
+    class fileno_stdin:
+        def _pipe(self, data=None):
+            read_fd, write_fd = os.pipe()
+            if data is not None:
+                os.write(write_fd, data)
+                os.close(write_fd)
+            return os.fdopen(read_fd, "rb", buffering=0), write_fd
+
+        def input_block_size_attribute_defaults_to_64KiB(self):
+            assert Runner(Context()).input_block_size == 65536
+
+        @skip_if_windows
+        def available_data_is_forwarded_in_one_write(self):
+            klass = self._mock_stdin_writer()
+            in_stream, _ = self._pipe(b"Hey, listen!")
+            with in_stream:
+                self._runner(klass=klass).run(_, in_stream=in_stream)
+            klass.write_proc_stdin.assert_called_once_with("Hey, listen!")
+
+        @skip_if_windows
+        def multibyte_characters_split_across_blocks_survive(self):
+            klass = self._mock_stdin_writer()
+            klass.input_block_size = 1
+            in_stream, _ = self._pipe("hé".encode("utf-8"))
+            with in_stream:
+                self._runner(klass=klass).run(
+                    _, in_stream=in_stream, encoding="utf-8"
+                )
+            assert klass.write_proc_stdin.call_args_list == [
+                call("h"),
+                call("é"),
+            ]
+
+        @skip_if_windows
+        def files_are_forwarded_in_whole_blocks(self, tmp_path):
+            path = tmp_path / "big.bin"
+            path.write_bytes(b"x" * (4 * 1024 * 1024))
+            for mode in ("rb", "r"):
+                klass = self._mock_stdin_writer()
+                with open(path, mode) as in_stream:
+                    self._runner(klass=klass).run(_, in_stream=in_stream)
+                written = klass.write_proc_stdin.call_args_list
+                total = sum(len(x[0][0]) for x in written)
+                assert total == 4 * 1024 * 1024
+                # 64 KiB blocks, rather than a write per byte
+                assert len(written) <= 64
+
+        @skip_if_windows
+        def data_already_buffered_by_python_is_not_skipped(self):
+            klass = self._mock_stdin_writer()
+            raw, _ = self._pipe(b"Hey, listen!")
+            with io.BufferedReader(raw) as in_stream:
+                # Pull everything into the Python-level buffer up front
+                in_stream.peek(1)
+                self._runner(klass=klass).run(_, in_stream=in_stream)
+            written = klass.write_proc_stdin.call_args_list
+            assert "".join(x[0][0] for x in written) == "Hey, listen!"
+
+        @skip_if_windows
+        def EOF_triggers_closing_of_proc_stdin(self):
+            class Fake(_Dummy):
+                pass
+
+            Fake.close_proc_stdin = Mock()
+            in_stream, _ = self._pipe(b"what?")
+            with in_stream:
+                self._runner(klass=Fake).run(_, in_stream=in_stream)
+            Fake.close_proc_stdin.assert_called_once_with()
+
+        @skip_if_windows
+        def waits_without_sleeping_until_program_finishes(self):
+            # Write end stays open, so stdin never hits EOF; only completion
+            # of the program can end the stdin worker.
+            in_stream, write_fd = self._pipe()
+            try:
+                with patch("invoke.runners.time") as mock_time:
+                    runner = self._runner()
+                    runner.run(_, in_stream=in_stream)
+                assert not mock_time.sleep.called
+                assert runner._stdin_wakeup is None
+            finally:
+                in_stream.close()
+                os.close(write_fd)
+
+        @skip_if_windows
+        def notices_program_finishing_before_it_starts_waiting(self):
+            in_stream, write_fd = self._pipe()
+            try:
+                runner = self._runner()
+                runner.program_finished.set()
+                # Would block forever if the early finish went unnoticed.
+                runner.handle_stdin(in_stream, StringIO(), echo=False)
+            finally:
+                in_stream.close()
+                os.close(write_fd)
+
     class stdin_mirroring:
         def _test_mirroring(self, expect_mirroring, **kwargs):
             # Setup
@@ -1500,6 +1922,16 @@ Stderr: already printed
             assert err.getvalue() == "bar"
             assert klass.write_proc_stdin.called  # lazy
 
+        def future_returns_a_Future_instead(self):
+            future = self._runner().run(_, asynchronous="future")
+            assert isinstance(future, Future)
+            assert future.result(timeout=5).exited == 0
+
+        def rejects_unknown_values(self):
+            with raises(ValueError) as info:
+                self._runner().run(_, asynchronous="later")
+            assert "'asynchronous' got 'later'" in str(info.value)
+
     class disown:
         @patch.object(threading.Thread, "start")
         def starts_but_does_nothing_else_and_returns_emptyish_Result(
@@ -1534,6 +1966,24 @@ Stderr: already printed
             runner.run(_)
             assert runner.get_pid() is None
 
+    class resources:
+        def default_to_just_wall_time(self):
+            resources = self._run(_).resources
+            assert isinstance(resources, Resources)
+            assert resources.wall_time >= 0
+            assert resources.user_time is None
+            assert resources.max_rss is None
+
+        def are_None_for_dry_runs(self):
+            assert self._run(_, dry=True, hide=True).resources is None
+
+        def are_available_on_failures(self):
+            with raises(UnexpectedExit) as info:
+                self._runner(exits=1).run(_, hide=True)
+            e = info.value
+            assert e.resources is e.result.resources
+            assert e.resources.wall_time >= 0
+
 
 class _FastLocal(Local):
     # Neuter this for same reason as in _Dummy above
@@ -1578,7 +2028,7 @@ class Local_:
             expected_check.return_value = True
             unexpected_check.return_value = False
             self._run(_, pty=True)
-            exitstatus = mock_os.waitpid.return_value[1]
+            exitstatus = mock_os.wait4.return_value[1]
             expected_get.assert_called_once_with(exitstatus)
             assert not unexpected_get.called
 
@@ -1705,6 +2155,176 @@ class Local_:
             env = mock_os.execvpe.call_args_list[0][0][2]
             assert env == expected
 
+    class argv:
+        @mock_subprocess(insert_Popen=True)
+        def is_executed_without_a_shell(self, mock_Popen):
+            self._run(["ls", "-l"])
+            args, kwargs = mock_Popen.call_args
+            assert args == (["ls", "-l"],)
+            assert "shell" not in kwargs
+            assert kwargs["executable"] == shutil.which("ls")
+
+        @mock_subprocess(insert_Popen=True)
+        def leaves_fds_open_so_posix_spawn_may_be_used(self, mock_Popen):
+            self._run(["ls"])
+            assert mock_Popen.call_args[1]["close_fds"] is False
+
+        @mock_subprocess(insert_Popen=True)
+        def program_is_looked_up_on_subprocess_PATH(self, mock_Popen):
+            self._run(["ls"], env={"PATH": "/nonexistent"}, replace_env=True)
+            assert mock_Popen.call_args[1]["executable"] == "ls"
+
+        @mock_subprocess(insert_Popen=True)
+        def program_lookup_is_left_to_subprocess_given_cwd(self, mock_Popen):
+            self._run(["ls"], cwd="/tmp")
+            assert mock_Popen.call_args[1]["executable"] == "ls"
+            assert mock_Popen.call_args[1]["cwd"] == "/tmp"
+
+        @mock_pty(insert_os=True)
+        def is_execed_directly_when_pty_True(self, mock_os):
+            self._run(["ls", "-l"], pty=True, cwd="/tmp", in_stream=False)
+            mock_os.chdir.assert_called_once_with("/tmp")
+            args = mock_os.execvpe.call_args[0]
+            assert args[:2] == ("ls", ["ls", "-l"])
+
+    class cwd:
+        @mock_subprocess(insert_Popen=True)
+        def defaults_to_None(self, mock_Popen):
+            self._run(_)
+            assert mock_Popen.call_args[1]["cwd"] is None
+
+        @mock_subprocess(insert_Popen=True)
+        def is_given_to_Popen_for_command_strings(self, mock_Popen):
+            self._run(_, cwd="/tmp")
+            assert mock_Popen.call_args[1]["cwd"] == "/tmp"
+            assert mock_Popen.call_args[1]["shell"] is True
+
+        @mock_pty(insert_os=True)
+        def is_changed_into_when_pty_True(self, mock_os):
+            self._run(_, pty=True, cwd="/tmp", in_stream=False)
+            mock_os.chdir.assert_called_once_with("/tmp")
+
+    class spawn_backend:
+        def _spawn(self, mock_Popen, *args, **kwargs):
+            # Run via a mock fork server, handing back the mock subprocess.
+            kwargs.setdefault("spawn_backend", "forkserver")
+            with patch("invoke.runners.get_fork_server") as get_fork_server:
+                spawn = get_fork_server.return_value.spawn
+                spawn.return_value = mock_Popen.return_value
+                self._run(*args, **kwargs)
+            return spawn
+
+        @mock_subprocess(insert_Popen=True)
+        def direct_by_default(self, mock_Popen):
+            spawn = self._spawn(mock_Popen, _, spawn_backend="direct")
+            assert mock_Popen.called
+            assert not spawn.called
+
+        @mock_subprocess(insert_Popen=True)
+        def forkserver_spawns_via_the_fork_server(self, mock_Popen):
+            spawn = self._spawn(mock_Popen, _, cwd="/tmp", env={"A": 1})
+            assert not mock_Popen.called
+            args, kwargs = spawn.call_args
+            assert args == (_,)
+            assert kwargs["cwd"] == "/tmp"
+            assert kwargs["env"]["A"] == 1
+            assert kwargs["stdout"] == kwargs["stderr"] == PIPE
+
+        @mock_subprocess(insert_Popen=True)
+        def forkserver_spawns_argument_vectors_too(self, mock_Popen):
+            spawn = self._spawn(mock_Popen, ["ls", "-l"])
+            assert spawn.call_args[0] == (["ls", "-l"],)
+
+        @mock_subprocess(insert_Popen=True)
+        def forkserver_hands_over_passthrough_targets(self, mock_Popen):
+            with TemporaryFile() as out:
+                spawn = self._spawn(
+                    mock_Popen, _, capture=False, out_stream=out, hide="err"
+                )
+                assert spawn.call_args[1]["stdout"] == out.fileno()
+            assert spawn.call_args[1]["stderr"] == DEVNULL
+
+        @mock_subprocess(insert_Popen=True)
+        def forkserver_falls_back_to_direct_where_unsupported(
+            self, mock_Popen
+        ):
+            with patch("invoke.runners.forkserver.SUPPORTED", False):
+                spawn = self._spawn(mock_Popen, _)
+            assert mock_Popen.called
+            assert not spawn.called
+
+        @mock_pty()
+        def forkserver_is_ignored_when_pty_True(self):
+            with patch("invoke.runners.get_fork_server") as get_fork_server:
+                self._run(
+                    _, pty=True, spawn_backend="forkserver", in_stream=False
+                )
+            assert not get_fork_server.called
+
+    class output_passthrough:
+        def _popen_kwargs(self, mock_Popen, **kwargs):
+            with TemporaryFile() as out, TemporaryFile() as err:
+                self._run(_, out_stream=out, err_stream=err, **kwargs)
+                popen_kwargs = mock_Popen.call_args_list[0][1]
+                return popen_kwargs, out.fileno(), err.fileno()
+
+        @mock_subprocess(insert_Popen=True)
+        def real_files_get_their_fds_handed_over_when_not_capturing(
+            self, mock_Popen
+        ):
+            kwargs, out, err = self._popen_kwargs(mock_Popen, capture=False)
+            assert kwargs["stdout"] == out
+            assert kwargs["stderr"] == err
+
+        @mock_subprocess(insert_Popen=True)
+        def hidden_streams_go_to_devnull(self, mock_Popen):
+            # NOTE: explicitly given streams are never hidden
+            with TemporaryFile() as err:
+                self._run(_, capture=False, hide="out", err_stream=err)
+                kwargs = mock_Popen.call_args_list[0][1]
+                assert kwargs["stdout"] == DEVNULL
+                assert kwargs["stderr"] == err.fileno()
+
+        @mock_subprocess(insert_Popen=True)
+        def pipes_are_used_when_capturing(self, mock_Popen):
+            kwargs, _, _ = self._popen_kwargs(mock_Popen)
+            assert kwargs["stdout"] == PIPE
+            assert kwargs["stderr"] == PIPE
+
+        @mock_subprocess(insert_Popen=True)
+        def pipes_are_used_when_watching(self, mock_Popen):
+            kwargs, _, _ = self._popen_kwargs(
+                mock_Popen,
+                capture=False,
+                watchers=[Responder("nope", "nope")],
+            )
+            assert kwargs["stdout"] == PIPE
+            assert kwargs["stderr"] == PIPE
+
+        @mock_subprocess(insert_Popen=True)
+        def pipes_are_used_for_streams_without_fileno(self, mock_Popen):
+            self._run(_, capture=False, out_stream=StringIO())
+            assert mock_Popen.call_args_list[0][1]["stdout"] == PIPE
+
+        @skip_if_windows
+        @mock_subprocess(insert_Popen=True)
+        def pipes_are_used_for_terminal_streams(self, mock_Popen):
+            parent_fd, child_fd = os.openpty()
+            with os.fdopen(child_fd, "w") as out:
+                try:
+                    self._run(_, capture=False, out_stream=out)
+                finally:
+                    os.close(parent_fd)
+            assert mock_Popen.call_args_list[0][1]["stdout"] == PIPE
+
+        @mock_subprocess(insert_Popen=True)
+        def python_level_buffers_are_flushed_first(self, mock_Popen):
+            with TemporaryFile("w+") as out:
+                out.write("before")
+                self._run(_, capture=False, out_stream=out)
+                out.seek(0)
+                assert out.read() == "before"
+
     class close_proc_stdin:
         def raises_SubprocessPipeError_when_pty_in_use(self):
             with raises(SubprocessPipeError):
@@ -1736,12 +2356,89 @@ class Local_:
             runner.kill()
             mock_os.kill.assert_called_once_with(30, signal.SIGKILL)
 
+    class io_hooks:
+        def _run(self, klass, backend):
+            return klass(Context()).run(
+                "echo hi", hide=True, in_stream=False, io_backend=backend
+            )
+
+        def overridden_decode_is_used_by_every_backend(self):
+            class Shouty(Local):
+                def decode(self, data):
+                    return super().decode(data).upper()
+
+            for backend in ("threads", "reactor"):
+                assert self._run(Shouty, backend).stdout == "HI\n"
+
+        def overridden_read_proc_output_is_used_by_every_backend(self):
+            class Prefixed(Local):
+                def read_proc_output(self, reader):
+                    for text in super().read_proc_output(reader):
+                        yield "> " + text
+
+            for backend in ("threads", "reactor"):
+                assert self._run(Prefixed, backend).stdout == "> hi\n"
+
+    class resources:
+        def _runner(self, rusage):
+            runner = Local(Context())
+            runner.start_time = 0
+            runner._rusage = rusage
+            return runner
+
+        def include_wait4_resource_usage(self):
+            rusage = types.SimpleNamespace(
+                ru_utime=1.5,
+                ru_stime=0.25,
+                ru_maxrss=2,
+                ru_inblock=3,
+                ru_oublock=4,
+            )
+            resources = self._runner(rusage).resources()
+            assert resources.user_time == 1.5
+            assert resources.system_time == 0.25
+            assert resources.cpu_time == 1.75
+            assert resources.block_input == 3
+            assert resources.block_output == 4
+            if sys.platform == "darwin":
+                assert resources.max_rss == 2
+            else:
+                assert resources.max_rss == 2048
+
+        def fall_back_to_wall_time(self):
+            resources = self._runner(None).resources()
+            assert resources.wall_time > 0
+            assert resources.cpu_time is None
+
+        def come_from_wait4_when_Popen_has_not_reaped(self):
+            runner = self._runner(None)
+            rusage = Mock(name="rusage")
+            with patch("invoke.runners.os") as mock_os:
+                mock_os.wait4.return_value = (1234, 0, rusage)
+                mock_os.waitstatus_to_exitcode.return_value = 3
+                runner.process = Mock(returncode=None, pid=1234)
+                assert runner._poll() == 3
+            mock_os.wait4.assert_called_once_with(1234, mock_os.WNOHANG)
+            assert runner.process.returncode == 3
+            assert runner._rusage is rusage
+
+        def come_from_wait4_when_using_pty(self):
+            runner = self._runner(None)
+            runner.using_pty = True
+            runner.pid = 1234
+            rusage = Mock(name="rusage")
+            with patch("invoke.runners.os") as mock_os:
+                mock_os.wait4.return_value = (1234, 0, rusage)
+                assert runner.process_is_finished
+            mock_os.wait4.assert_called_once_with(1234, mock_os.WNOHANG)
+            assert runner._rusage is rusage
+
     class get_pid:
         @mock_pty(insert_os=True)
         def is_top_level_pid_when_using_pty(self, mock_os):
             runner = self._runner()
             runner.run(_, pty=True)
-            # exitstatus = mock_os.waitpid.return_value[1]
+            # exitstatus = mock_os.wait4.return_value[1]
             assert runner.get_pid() is runner.pid
 
         @mock_subprocess()
@@ -1751,7 +2448,87 @@ class Local_:
             assert runner.get_pid() is runner.process.pid
 
 
-class Result_:
+class AsyncLocal_:
+    def _arun(self, *args, **kwargs):
+        settings = kwargs.pop("settings", {})
+        runner = AsyncLocal(Context(config=Config(overrides=settings)))
+        return asyncio.run(runner.arun(*args, **kwargs))
+
+    def is_the_default_async_local_runner(self):
+        assert Config().runners.async_local is AsyncLocal
+
+    def rejects_asynchronous(self):
+        with raises(ValueError):
+            self._arun(_, asynchronous=True)
+
+    def rejects_disown(self):
+        with raises(ValueError):
+            self._arun(_, disown=True)
+
+    @patch("invoke.runners.asyncio.create_subprocess_shell")
+    def dry_running_never_starts_a_subprocess(self, create):
+        result = self._arun(_, dry=True, hide=True)
+        assert not create.called
+        assert result.exited == 0
+
+    def does_not_mirror_stdin_by_default(self):
+        runner = AsyncLocal(Context())
+        runner._unify_kwargs_with_config({})
+        assert runner.streams["in"] is False
+
+    def mirrors_explicitly_given_stdin(self):
+        runner = AsyncLocal(Context())
+        stdin = StringIO()
+        runner._unify_kwargs_with_config({"in_stream": stdin})
+        assert runner.streams["in"] is stdin
+
+    @trap
+    def falls_back_to_non_pty_with_a_warning(self):
+        runner = AsyncLocal(Context())
+        assert runner.should_use_pty(pty=True) is False
+        assert "does not support pty=True" in sys.stderr.getvalue()
+        assert runner.should_use_pty(pty=True) is False
+        assert sys.stderr.getvalue().count("WARNING") == 1
+
+    @patch("invoke.runners.asyncio.create_subprocess_shell")
+    def results_include_wall_time(self, create):
+        process = Mock(pid=1234, returncode=0)
+        process.stdout.read = process.stderr.read = AsyncMock(return_value=b"")
+        process.wait = AsyncMock()
+        create.return_value = process
+        resources = self._arun(_, hide=True).resources
+        assert resources.wall_time >= 0
+
+    def drains_subprocess_stdin_after_each_block(self):
+        runner = AsyncLocal(Context())
+        runner.input_block_size = 4
+        runner.process = Mock()
+        runner.process.stdin.is_closing.return_value = False
+        runner.process.stdin.drain = AsyncMock()
+        runner.encoding = "utf-8"
+        runner.using_pty = False
+        runner.opts = {"echo_stdin": False}
+        asyncio.run(
+            runner._ahandle_stdin(StringIO("12345678"), StringIO(), False)
+        )
+        assert runner.process.stdin.write.call_count == 2
+        assert runner.process.stdin.drain.await_count == 2
+
+    def forwards_files_in_whole_blocks(self, tmp_path):
+        path = tmp_path / "big.txt"
+        path.write_bytes(b"x" * (4 * 1024 * 1024))
+        runner = AsyncLocal(Context())
+        runner.process = Mock()
+        runner.process.stdin.is_closing.return_value = False
+        runner.process.stdin.drain = AsyncMock()
+        runner.encoding = "utf-8"
+        runner.using_pty = False
+        with open(path) as in_stream:
+            asyncio.run(runner._ahandle_stdin(in_stream, StringIO(), False))
+        writes = runner.process.stdin.write.call_args_list
+        assert sum(len(x[0][0]) for x in writes) == 4 * 1024 * 1024
+        assert len(writes) <= 64
+
     def nothing_is_required(self):
         Result()
 
@@ -1785,9 +2562,64 @@ class Result_:
     def pid_defaults_to_None(self):
         assert Result().pid is None
 
+    def resources_defaults_to_None(self):
+        assert Result().resources is None
+
     def repr_contains_useful_info(self):
         assert repr(Result(command="foo")) == "<Result cmd='foo' exited=0>"
 
+    class raw_bytes:
+        def stdout_is_decoded_from_stdout_bytes(self):
+            result = Result(stdout_bytes=b"caf\xc3\xa9", encoding="utf-8")
+            assert result.stdout == "caf\u00e9"
+
+        def stderr_is_decoded_from_stderr_bytes(self):
+            result = Result(stderr_bytes=b"caf\xc3\xa9", encoding="utf-8")
+            assert result.stderr == "caf\u00e9"
+
+        def decoding_is_lazy_and_cached(self):
+            result = Result(stdout_bytes=b"text", encoding="utf-8")
+            with patch.object(
+                Result, "_decode", wraps=result._decode
+            ) as decode:
+                assert not decode.called
+                assert result.stdout == "text"
+                assert result.stdout == "text"
+            decode.assert_called_once_with(b"text")
+
+        def undecodable_bytes_are_replaced(self):
+            result = Result(stdout_bytes=b"\xff", encoding="utf-8")
+            assert result.stdout == "\ufffd"
+
+        def bytes_are_encoded_from_text_when_not_given(self):
+            result = Result("caf\u00e9", encoding="utf-8")
+            assert result.stdout_bytes == b"caf\xc3\xa9"
+            assert Result().stderr_bytes == b""
+
+        def setting_text_replaces_bytes(self):
+            result = Result(stdout_bytes=b"old", encoding="utf-8")
+            result.stdout = "new"
+            assert result.stdout_bytes == b"new"
+
+        def uncaptured_output_is_empty(self):
+            result = Result(stdout_bytes=b"ignored", captured=False)
+            assert result.captured is False
+            assert result.stdout == ""
+            assert result.stderr == ""
+            assert result.stdout_bytes == b""
+            assert result.stderr_bytes == b""
+            assert result.tail("stdout") == "\n\n"
+            assert "(stdout not captured)" in str(result)
+            assert "(stderr not captured)" in str(result)
+
+        def captured_defaults_to_True(self):
+            assert Result().captured is True
+
+        def runner_results_expose_raw_bytes(self):
+            result = _runner(out="foo", err="bar").run(_, hide=True)
+            assert result.stdout_bytes == b"foo"
+            assert result.stderr_bytes == b"bar"
+
     class tail:
         def setup_method(self):
             self.sample = "\n".join(str(x) for x in range(25))
@@ -1825,6 +2657,23 @@ class Result_:
             assert tail == expected
 
 
+class _Finisher(_Dummy):
+    # Dummy whose "subprocess" only exits once told to.
+    _finished = False
+
+    @property
+    def process_is_finished(self):
+        return self._finished
+
+
+def _promise(**kwargs):
+    return _runner(klass=_Finisher, **kwargs).run(_, asynchronous=True)
+
+
+def _finish(promise):
+    promise.runner._finished = True
+
+
 class Promise_:
     def explicitly_inherits_from_abstract_base_class(self) -> None:
         # Supports improved downstream typechecking.
@@ -1881,6 +2730,75 @@ class Promise_:
             with raises(Failure):
                 promise.join()
 
+        def returns_same_Result_when_called_again(self):
+            runner = _runner()
+            promise = runner.run(_, asynchronous=True)
+            runner.stop = Mock()
+            result = promise.join()
+            assert promise.join() is result
+            runner.stop.assert_called_once_with()
+
+        def raises_same_exception_when_called_again(self):
+            promise = _runner(exits=1).run(_, asynchronous=True)
+            with raises(Failure) as first:
+                promise.join()
+            with raises(Failure) as second:
+                promise.join()
+            assert second.value is first.value
+
+    class done:
+        def is_False_until_subprocess_exits(self):
+            promise = _promise()
+            assert not promise.done()
+            _finish(promise)
+            wait([promise], timeout=5)
+            assert promise.done()
+
+        def does_not_join(self):
+            promise = _promise()
+            _finish(promise)
+            wait([promise], timeout=5)
+            assert promise._outcome is None
+
+    class as_future:
+        def is_running_until_subprocess_exits(self):
+            promise = _promise()
+            future = promise.as_future()
+            assert future.running()
+            assert not future.cancel()
+            _finish(promise)
+            assert isinstance(future.result(timeout=5), Result)
+
+        def raises_what_join_would_raise(self):
+            promise = _promise(exits=1)
+            future = promise.as_future()
+            _finish(promise)
+            assert isinstance(future.exception(timeout=5), UnexpectedExit)
+            with raises(UnexpectedExit) as info:
+                promise.join()
+            assert info.value is future.exception()
+
+        def works_after_subprocess_has_exited(self):
+            promise = _promise()
+            _finish(promise)
+            promise.join()
+            assert promise.as_future().result(timeout=5) is promise.join()
+
+        def returns_the_same_future_each_time(self):
+            promise = _promise()
+            assert promise.as_future() is promise.as_future()
+            _finish(promise)
+
+        def does_not_spin_up_a_thread_per_promise(self):
+            promises = [_promise() for _ in range(10)]
+            with patch.object(threading, "Thread", wraps=threading.Thread):
+                futures = [x.as_future() for x in promises]
+                assert not threading.Thread.called
+            for promise in promises:
+                _finish(promise)
+            for future in futures:
+                future.result(timeout=5)
+
     class context_manager:
         def calls_join_or_wait_on_close_of_block(self):
             promise = _runner().run(_, asynchronous=True)
@@ -1893,3 +2811,68 @@ class Promise_:
             promise = _runner().run(_, asynchronous=True)
             with promise as value:
                 assert value is promise
+
+
+class wait_:
+    def returns_done_and_not_done_sets(self):
+        first, second = _promise(), _promise()
+        _finish(first)
+        done, not_done = wait([first, second], return_when=FIRST_COMPLETED)
+        assert done == {first}
+        assert not_done == {second}
+
+    def waits_for_all_promises_by_default(self):
+        promises = [_promise(), _promise()]
+        for promise in promises:
+            threading.Timer(0.05, _finish, [promise]).start()
+        done, not_done = wait(promises, timeout=5)
+        assert done == set(promises)
+        assert not not_done
+
+    def returns_whatever_is_done_once_timeout_elapses(self):
+        first, second = _promise(), _promise()
+        _finish(first)
+        wait([first], timeout=5)
+        done, not_done = wait([first, second], timeout=0.05)
+        assert done == {first}
+        assert not_done == {second}
+
+    def first_exception_returns_once_a_promise_would_raise(self):
+        fine, failing, slow = _promise(), _promise(exits=1), _promise()
+        _finish(fine)
+        threading.Timer(0.05, _finish, [failing]).start()
+        done, not_done = wait(
+            [fine, failing, slow], timeout=5, return_when=FIRST_EXCEPTION
+        )
+        assert done == {fine, failing}
+        assert not_done == {slow}
+
+    def first_exception_acts_like_all_completed_without_failures(self):
+        promises = [_promise(), _promise()]
+        for promise in promises:
+            threading.Timer(0.05, _finish, [promise]).start()
+        done, not_done = wait(promises, timeout=5, return_when=FIRST_EXCEPTION)
+        assert done == set(promises)
+
+    def rejects_unknown_return_when(self):
+        with raises(ValueError):
+            wait([], return_when="WHENEVER")
+
+
+class as_completed_:
+    def yields_promises_in_order_of_exit(self):
+        first, second, third = _promise(), _promise(), _promise()
+        threading.Timer(0.1, _finish, [first]).start()
+        threading.Timer(0.2, _finish, [second]).start()
+        _finish(third)
+        finished = list(as_completed([first, second, third], timeout=5))
+        assert finished == [third, first, second]
+
+    def raises_TimeoutError_if_timeout_elapses(self):
+        done, running = _promise(), _promise()
+        _finish(done)
+        seen = []
+        with raises(FuturesTimeoutError):
+            for promise in as_completed([done, running], timeout=0.1):
+                seen.append(promise)
+        assert seen == [done]
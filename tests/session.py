@@ -0,0 +1,231 @@
+import os
+from io import StringIO
+
+import pytest
+
+from invoke import (
+    CommandTimedOut,
+    Config,
+    Context,
+    Result,
+    ShellSession,
+    UnexpectedExit,
+)
+from invoke.session import _join_cwds, _quote
+from invoke.terminals import WINDOWS
+
+pytestmark = pytest.mark.skipif(
+    WINDOWS, reason="Shell sessions unsupported on Windows"
+)
+
+
+class ShellSession_:
+    def setup_method(self):
+        self.c = Context(Config({"run": {"hide": True, "in_stream": False}}))
+        self.session = ShellSession(self.c)
+
+    def teardown_method(self):
+        self.session.close()
+
+    def _run(self, command, **kwargs):
+        return self.session.run(command, **kwargs)
+
+    class run:
+        def returns_Results(self):
+            result = self._run("echo hi; echo oops >&2")
+            assert isinstance(result, Result)
+            assert result.stdout == "hi\n"
+            assert result.stderr == "oops\n"
+            assert result.exited == 0
+            assert result.command == "echo hi; echo oops >&2"
+
+        def reuses_the_same_shell(self):
+            self._run("true")
+            process = self.session.process
+            self._run("true")
+            assert self.session.process is process
+
+        def raises_UnexpectedExit_on_failure(self):
+            with pytest.raises(UnexpectedExit) as info:
+                self._run("exit 3")
+            assert info.value.result.exited == 3
+
+        def honors_warn(self):
+            assert self._run("exit 3", warn=True).exited == 3
+            # And the session survives that subshell exiting
+            assert self._run("echo still here").stdout == "still here\n"
+
+        def handles_output_without_trailing_newlines(self):
+            result = self._run("printf foo; printf bar >&2")
+            assert result.stdout == "foo"
+            assert result.stderr == "bar"
+
+        def handles_multiline_commands(self):
+            assert self._run("echo one\necho two").stdout == "one\ntwo\n"
+
+        def runs_argument_vectors(self):
+            result = self._run(["printf", "%s|", "a b", "it's", "$HOME\n"])
+            assert result.stdout == "a b|it's|$HOME\n|"
+
+        def feeds_in_stream_to_the_command(self):
+            result = self._run("cat", in_stream=StringIO("hello\nworld"))
+            assert result.stdout == "hello\nworld"
+
+        def commands_see_EOF_without_in_stream(self):
+            assert self._run("cat", in_stream=False).stdout == ""
+
+        def commands_do_not_affect_the_session(self):
+            self._run("cd /; export INVOKE_SESSION_TEST=yup")
+            result = self._run("pwd; echo x${INVOKE_SESSION_TEST}x")
+            assert result.stdout == "{}\nxx\n".format(os.getcwd())
+
+        def applies_env(self):
+            result = self._run(
+                "echo $INVOKE_SESSION_TEST", env={"INVOKE_SESSION_TEST": "a b"}
+            )
+            assert result.stdout == "a b\n"
+            # Only for that command, though
+            assert self._run("echo x${INVOKE_SESSION_TEST}x").stdout == "xx\n"
+
+        def applies_replace_env(self):
+            os.environ["INVOKE_SESSION_TEST"] = "yup"
+            try:
+                result = self._run(
+                    "echo x${INVOKE_SESSION_TEST}x", env={}, replace_env=True
+                )
+            finally:
+                del os.environ["INVOKE_SESSION_TEST"]
+            assert result.stdout == "xx\n"
+
+        def timeouts_restart_the_shell(self):
+            self._run("true")
+            process = self.session.process
+            with pytest.raises(CommandTimedOut):
+                self._run("sleep 5", timeout=0.2)
+            assert self._run("echo hi").stdout == "hi\n"
+            assert self.session.process is not process
+
+        def restarts_a_shell_which_exited(self):
+            self._run("true")
+            self.session.process.kill()
+            self.session.process.wait()
+            assert self._run("echo hi").stdout == "hi\n"
+
+        def honors_cwd(self):
+            result = self._run("pwd", cwd="/usr")
+            assert result.stdout == "/usr\n"
+            assert result.command == "pwd"
+            # Only for that command, though
+            assert self._run("pwd").stdout == "{}\n".format(os.getcwd())
+
+        def honors_cwd_for_argument_vectors(self, tmp_path):
+            path = tmp_path / "it's here"
+            path.mkdir()
+            result = self._run(["pwd"], cwd=str(path))
+            assert result.stdout == "{}\n".format(path)
+
+        def honors_cwd_before_context_cd(self):
+            with self.c.cd("bin"):
+                assert self._run("pwd", cwd="/usr").stdout == "/usr/bin\n"
+
+        def restarts_for_a_different_shell(self):
+            self._run("true")
+            process = self.session.process
+            self._run("true", shell="/bin/sh")
+            assert self.session.process is not process
+
+    class prefixes_and_cwds:
+        def session_start_state_is_applied_to_the_shell(self):
+            with self.c.cd("/"):
+                with self.c.prefix("export INVOKE_SESSION_TEST=yup"):
+                    session = ShellSession(self.c)
+            try:
+                result = session.run("pwd; echo $INVOKE_SESSION_TEST")
+                assert result.stdout == "/\nyup\n"
+                assert result.command == "pwd; echo $INVOKE_SESSION_TEST"
+            finally:
+                session.close()
+
+        def later_state_is_applied_per_command(self):
+            with self.c.cd("/"):
+                with self.c.prefix("export INVOKE_SESSION_TEST=yup"):
+                    result = self._run("pwd; echo $INVOKE_SESSION_TEST")
+            assert result.stdout == "/\nyup\n"
+            assert result.command == (
+                "cd / && export INVOKE_SESSION_TEST=yup"
+                " && pwd; echo $INVOKE_SESSION_TEST"
+            )
+
+        def failing_setup_fails_the_command(self):
+            with self.c.prefix("exit 5"):
+                session = ShellSession(self.c)
+            try:
+                result = session.run("echo hi", warn=True)
+                assert result.exited == 5
+                assert result.stdout == ""
+            finally:
+                session.close()
+
+    class can_run:
+        def true_by_default(self):
+            assert self.session.can_run({})
+
+        def false_for_unsupported_kwargs(self):
+            for key in ("pty", "asynchronous", "disown"):
+                assert not self.session.can_run({key: True})
+                assert self.session.can_run({key: False})
+
+        def false_for_unsupported_config(self):
+            self.c.config.run.pty = True
+            assert not self.session.can_run({})
+            assert self.session.can_run({"pty": False})
+
+        def honors_newer_prefixes_and_cwds(self):
+            with self.c.cd("foo"):
+                assert self.session.can_run({})
+
+        def false_outside_of_starting_prefixes_and_cwds(self):
+            with self.c.prefix("foo"):
+                session = ShellSession(self.c)
+                assert session.can_run({})
+            assert not session.can_run({})
+
+        def false_once_closed(self):
+            self.session.close()
+            assert not self.session.can_run({})
+
+    class close:
+        def makes_the_shell_exit(self):
+            self._run("true")
+            process = self.session.process
+            tempdir = self.session._tempdir
+            self.session.close()
+            assert process.returncode == 0
+            assert self.session.process is None
+            assert not os.path.exists(tempdir)
+
+        def is_fine_without_a_shell(self):
+            self.session.close()
+            self.session.close()
+
+
+class quote_:
+    def never_emits_newlines(self):
+        assert "\n" not in _quote("a\nb")
+
+    def leaves_plain_words_alone(self):
+        assert _quote("foo") == "foo"
+
+
+class join_cwds_:
+    def joins_relative_paths(self):
+        assert _join_cwds(["a", "b"]) == "a/b"
+
+    def starts_from_last_absolute_path(self):
+        assert _join_cwds(["a", "/b", "c", "~/d", "e"]) == "~/d/e"
+
+    def escapes_spaces(self):
+        assert _join_cwds(["a b"]) == r"a\ b"
+
+    def empty_for_no_paths(self):
+        assert _join_cwds([]) == ""
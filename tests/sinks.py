@@ -0,0 +1,94 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from invoke.sinks import CoalescingWriter
+
+
+def _stream():
+    stream = Mock()
+    stream.isatty.return_value = False
+    return stream
+
+
+class CoalescingWriter_:
+    def writes_go_straight_to_the_stream(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=60)
+        writer.write("foo")
+        writer.write("bar")
+        assert stream.write.call_count == 2
+
+    def flushes_are_deferred_within_interval(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=60)
+        writer.write("foo")
+        writer.write("bar")
+        assert not stream.flush.called
+        assert writer.pending == 6
+
+    def flushes_once_size_is_reached(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=60, size=5)
+        writer.write("foo")
+        assert not stream.flush.called
+        writer.write("bar")
+        stream.flush.assert_called_once_with()
+        assert writer.pending == 0
+
+    def flushes_writes_arriving_after_interval_immediately(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=60)
+        with patch("invoke.sinks.time.monotonic", return_value=1e9):
+            writer.write("foo")
+        stream.flush.assert_called_once_with()
+
+    def zero_interval_flushes_every_write(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=0)
+        writer.write("foo")
+        writer.write("bar")
+        assert stream.flush.call_count == 2
+
+    def pending_output_is_flushed_without_further_writes(self):
+        stream = _stream()
+        writer = CoalescingWriter(stream, interval=0.05)
+        writer.write("foo")
+        assert not stream.flush.called
+        time.sleep(0.2)
+        stream.flush.assert_called_once_with()
+        assert writer.pending == 0
+
+    def writers_share_one_flushing_thread(self):
+        streams = [_stream() for _ in range(10)]
+        for stream in streams:
+            CoalescingWriter(stream, interval=0.05).write("foo")
+        flushers = [
+            x for x in threading.enumerate() if x.name == "invoke-flusher"
+        ]
+        assert len(flushers) == 1
+        time.sleep(0.2)
+        for stream in streams:
+            stream.flush.assert_called_once_with()
+
+    class flush:
+        def flushes_pending_output(self):
+            stream = _stream()
+            writer = CoalescingWriter(stream, interval=60)
+            writer.write("foo")
+            writer.flush()
+            stream.flush.assert_called_once_with()
+
+        def cancels_the_scheduled_flush(self):
+            stream = _stream()
+            writer = CoalescingWriter(stream, interval=0.05)
+            writer.write("foo")
+            writer.flush()
+            time.sleep(0.2)
+            stream.flush.assert_called_once_with()
+
+        def is_a_noop_when_nothing_is_pending(self):
+            stream = _stream()
+            writer = CoalescingWriter(stream, interval=60)
+            writer.flush()
+            assert not stream.flush.called
@@ -66,6 +66,14 @@ class task_:
     def allows_annotating_args_as_iterable(self):
         assert self.vanilla["iterable_values"].iterable == ["mylist"]
 
+    def allows_declaring_inputs_and_outputs(self):
+        @task(inputs=["src/*.py"], outputs=["dist/*.whl"])
+        def mytask(c):
+            pass
+
+        assert mytask.inputs == ["src/*.py"]
+        assert mytask.outputs == ["dist/*.whl"]
+
     def allows_annotating_args_as_incrementable(self):
         arg = self.vanilla["incrementable_values"]
         assert arg.incrementable == ["verbose"]
@@ -215,6 +223,19 @@ class Task_:
         def can_override_name(self):
             assert Task(_func, name="foo").name == "foo"
 
+        def inputs_and_outputs_default_to_empty_lists(self):
+            t = Task(_func)
+            assert t.inputs == []
+            assert t.outputs == []
+
+        def cache_defaults_to_False(self):
+            assert Task(_func).cache is False
+
+        def inputs_and_outputs_may_be_given(self):
+            t = Task(_func, inputs=("src/*.py",), outputs=["dist/*"])
+            assert t.inputs == ["src/*.py"]
+            assert t.outputs == ["dist/*"]
+
     class callability:
         def setup_method(self):
             @task
@@ -517,6 +538,43 @@ class Call_:
             call = Call(self.task, called_as="mytask")
             assert str(call) == "<Call 'mytask', args: (), kwargs: {}>"
 
+    class hashing:
+        def equal_calls_hash_equally(self):
+            one = Call(self.task, args=(1,), kwargs={"a": 1, "b": 2})
+            two = Call(self.task, args=(1,), kwargs={"b": 2, "a": 1})
+            assert one == two
+            assert hash(one) == hash(two)
+            assert len({one, two}) == 1
+
+        def ignores_called_as(self):
+            one = Call(self.task, called_as="foo")
+            assert hash(one) == hash(Call(self.task))
+
+        def differing_args_or_kwargs_hash_differently(self):
+            calls = {
+                Call(self.task),
+                Call(self.task, args=(1,)),
+                Call(self.task, kwargs={"a": 1}),
+            }
+            assert len(calls) == 3
+
+        def tasks_sharing_code_hash_equally(self):
+            # As Task.__eq__ considers those equal, too
+            def make():
+                def mytask(c):
+                    pass
+
+                return Task(mytask)
+
+            one, two = Call(make()), Call(make())
+            assert one.task.body is not two.task.body
+            assert one == two
+            assert hash(one) == hash(two)
+
+        def calls_with_unhashable_args_are_unhashable(self):
+            with raises(TypeError):
+                hash(Call(self.task, kwargs={"a": []}))
+
     class make_context:
         def requires_config_and_core_parse_result_arguments(self):
             # Neither
@@ -1,7 +1,21 @@
+import re
 from queue import Queue, Empty
 from threading import Thread, Event
 
-from invoke import Responder, FailingResponder, ResponseNotAccepted
+from invoke import (
+    FailingResponder,
+    Responder,
+    ResponseNotAccepted,
+    StreamWatcher,
+    StreamWindow,
+)
+
+
+def _window(*chunks, size=4096):
+    window = StreamWindow(size)
+    for chunk in chunks:
+        window.append(chunk)
+    return window
 
 
 # NOTE: StreamWatcher is basically just an interface/protocol; no behavior to
@@ -79,6 +93,102 @@ Just to say hi
 """
         assert list(r.submit(output)) == ["So sorry"]
 
+    def precompiles_its_pattern(self):
+        r = Responder(pattern=r"tech.*debt", response="pay it down")
+        assert r.regex.pattern == r"tech.*debt"
+        assert r.regex.flags & re.S
+
+    class submit_window:
+        def yields_response_when_pattern_seen_in_chunk(self):
+            r = Responder(pattern="empty", response="handed")
+            assert r.submit_window(_window("the house was empty")) == [
+                "handed"
+            ]
+
+        def matches_spanning_chunks_are_found_via_lookback(self):
+            r = Responder(pattern="jump", response="how high?")
+            window = StreamWindow(100)
+            responses = []
+            for char in "jump, wait, jump, wait":
+                window.append(char)
+                responses.extend(r.submit_window(window))
+            assert responses == ["how high?"] * 2
+
+        def already_matched_data_is_not_rematched(self):
+            r = Responder(pattern="jump", response="how high?")
+            window = _window("jump")
+            assert r.submit_window(window) == ["how high?"]
+            window.append(", wait")
+            assert r.submit_window(window) == []
+
+        def matches_longer_than_lookback_are_not_found(self):
+            r = Responder(pattern="jump", response="how high?")
+            window = StreamWindow(1)
+            for char in "jump":
+                window.append(char)
+                assert r.submit_window(window) == []
+
+        def seek_index_is_tracked_per_window(self):
+            r = Responder(pattern="hello", response="goodbye")
+            out, err = _window("hello"), _window("hello")
+            assert r.submit_window(out) == ["goodbye"]
+            assert r.submit_window(err) == ["goodbye"]
+
+        def seek_index_attribute_is_still_advanced(self):
+            r = Responder(pattern="hello", response="goodbye")
+            window = _window("hello there")
+            r.submit_window(window)
+            assert r.index == len("hello there")
+
+    class legacy_subclasses:
+        def overriding_only_submit_disables_incremental_api(self):
+            class MyResponder(Responder):
+                def submit(self, stream):
+                    yield "custom"
+
+            assert Responder.lookback is not None
+            assert MyResponder.lookback is None
+
+        def overriding_both_keeps_incremental_api(self):
+            class MyResponder(Responder):
+                def submit(self, stream):
+                    yield "custom"
+
+                def submit_window(self, window):
+                    return ["custom"]
+
+            assert MyResponder.lookback == Responder.lookback
+
+
+class StreamWatcher_:
+    def defaults_to_full_stream_api(self):
+        assert StreamWatcher.lookback is None
+
+
+class StreamWindow_:
+    def chunk_is_most_recent_append(self):
+        window = _window("foo", "bar")
+        assert window.chunk == "bar"
+        assert window.text == "foobar"
+
+    def discards_data_beyond_lookback_size(self):
+        window = _window("abcdef", "gh", size=3)
+        assert window.text == "defgh"
+        assert window.start == 3
+        assert window.end == 8
+        assert window.chunk == "gh"
+
+    def chunks_larger_than_size_are_kept_whole(self):
+        window = _window("ab", "cdefgh", size=1)
+        assert window.text == "bcdefgh"
+        assert window.chunk == "cdefgh"
+
+    def since_returns_text_after_absolute_offset(self):
+        window = _window("abcdef", "gh", size=3)
+        assert window.since(6) == "gh"
+        # Offsets already scrolled away just yield everything retained
+        assert window.since(0) == "defgh"
+
 
 class FailingResponder_:
     def behaves_like_regular_responder_by_default(self):
@@ -105,3 +215,24 @@ class FailingResponder_:
             assert "lolnope" in message, err
         else:
             assert False, "Did not raise ResponseNotAccepted!"
+
+    class submit_window:
+        def raises_failure_exception_when_sentinel_detected(self):
+            r = FailingResponder(
+                pattern="ju[^ ]{2}", response="how high?", sentinel="lolnope"
+            )
+            window = _window("jump")
+            assert r.submit_window(window) == ["how high?"]
+            window.append("lolnope")
+            try:
+                r.submit_window(window)
+            except ResponseNotAccepted:
+                pass
+            else:
+                assert False, "Did not raise ResponseNotAccepted!"
+
+        def sentinel_without_prior_response_is_ignored(self):
+            r = FailingResponder(
+                pattern="ju[^ ]{2}", response="how high?", sentinel="lolnope"
+            )
+            assert r.submit_window(_window("lolnope")) == []